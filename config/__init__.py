@@ -3,6 +3,6 @@ The package to load application configuration
 """
 
 from .load_environment import load_environment
-from .database_config import get_db_session, Base
+from .database_config import get_db_session, run_in_db_session, Base
 
-__all__ = ["load_environment", "get_db_session", "Base"]
+__all__ = ["load_environment", "get_db_session", "run_in_db_session", "Base"]
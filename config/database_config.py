@@ -1,6 +1,8 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Any, Generator
+from typing import Any, Callable, Generator, TypeVar
 
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
@@ -15,14 +17,28 @@ DATABASE_URL = (
     f"@{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
 )
 
+DB_POOL_SIZE = 20
+DB_MAX_OVERFLOW = 30
+
 engine = create_engine(
-    DATABASE_URL, pool_size=20, max_overflow=30, pool_timeout=60, pool_recycle=1800
+    DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=60,
+    pool_recycle=1800,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+T = TypeVar("T")
+
+# Threads used to run blocking database work off the event loop. Kept at or
+# below the pool size so offloaded calls never wait on a pool checkout.
+DB_EXECUTOR_WORKERS = min(int(os.getenv("DB_EXECUTOR_WORKERS", "10")), DB_POOL_SIZE)
+_db_executor: ThreadPoolExecutor | None = None
+
 
 @contextmanager
 def get_db_session() -> Generator[Session, Any, Any]:
@@ -32,3 +48,31 @@ def get_db_session() -> Generator[Session, Any, Any]:
         yield db
     finally:
         db.close()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used for offloaded database calls"""
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db-worker"
+        )
+    return _db_executor
+
+
+async def run_in_db_session(func: Callable[[Session], T]) -> T:
+    """
+    Run a blocking database callable in the DB thread pool.
+
+    The callable receives a fresh session which is closed once it returns,
+    so the event loop keeps serving Telegram updates while the query runs.
+    Objects returned are detached; load every attribute the caller needs
+    before returning.
+    """
+
+    def _run() -> T:
+        with get_db_session() as db:
+            return func(db)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), _run)
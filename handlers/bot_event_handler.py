@@ -9,10 +9,10 @@ from helper import total_summary_report, daily_transaction_report, weekly_transa
 from helper.logger_utils import force_log
 from services import (
     ConversationService,
-    IncomeService,
     ChatService,
     GroupPackageService,
 )
+from services.income_aggregate_service import IncomeAggregateService, totals_by_currency
 
 
 class CommandHandler:
@@ -20,7 +20,7 @@ class CommandHandler:
         self.chat_service = ChatService()
         self.group_package_service = GroupPackageService()
 
-    async def format_totals_message(self, incomes, report_date: datetime = None, requesting_user=None,
+    async def format_totals_message(self, daily_totals, report_date: datetime = None, requesting_user=None,
                                     start_date: datetime = None, end_date: datetime = None,
                                     is_daily: bool = False, is_weekly: bool = False, is_monthly: bool = False, chat_id: int = None):
         # Check if this is a daily report (contains "ថ្ងៃទី")
@@ -39,17 +39,17 @@ class CommandHandler:
                     telegram_username = requesting_user.first_name
                 # If user is anonymous, username will remain "Admin"
 
-            return await daily_transaction_report(incomes, report_date, telegram_username, None, chat_id)
+            return await daily_transaction_report(list(totals_by_currency(daily_totals).values()), report_date, telegram_username, None, chat_id)
         elif is_weekly and start_date and end_date:
             # This is a weekly report, use the new weekly format
-            return weekly_transaction_report(incomes, start_date, end_date)
+            return weekly_transaction_report(daily_totals, start_date, end_date)
         elif is_monthly and start_date and end_date:
             # This is a monthly report, use the new monthly format
-            return monthly_transaction_report(incomes, start_date, end_date)
+            return monthly_transaction_report(daily_totals, start_date, end_date)
         else:
             # Fallback only - shouldn't be any cases
             title = f"សរុបប្រតិបត្តិការ:"
-            return total_summary_report(incomes, title)
+            return total_summary_report(list(totals_by_currency(daily_totals).values()), title)
 
     async def handle_date_input_response(self, event, question):
         try:
@@ -109,22 +109,19 @@ class CommandHandler:
                     force_log(f"Date range query: {start_date} to {end_date} (exclusive)", "CommandHandler", "DEBUG")
                     force_log(f"User input range: day {start_day} to {end_day}", "CommandHandler", "DEBUG")
 
-                    income_service = IncomeService()
-                    incomes = await income_service.get_income_by_date_and_chat_id(
-                        chat_id=event.chat_id,
-                        start_date=start_date,
-                        end_date=end_date,
+                    daily_totals = await IncomeAggregateService().get_totals(
+                        event.chat_id, start_date, end_date, group_by=("day",)
                     )
 
                     # Don't delete user's reply message
-                    if not incomes:
+                    if not daily_totals:
                         await event.respond(
                             f"គ្មានប្រតិបត្តិការសម្រាប់ថ្ងៃទី {start_day} ដល់ {end_day} ទេ។"
                         )
                         return
 
                     message = await self.format_totals_message(
-                        incomes=incomes,
+                        daily_totals=daily_totals,
                         report_date=start_date,
                         requesting_user=event.sender,
                         start_date=start_date,
@@ -133,7 +130,7 @@ class CommandHandler:
                         chat_id=event.chat_id
                     )
                     force_log(
-                        f"Sending message for date range {start_day}-{end_day}, found {len(incomes)} transactions",
+                        f"Sending message for date range {start_day}-{end_day}, found {sum(total.count for total in daily_totals)} transactions",
                         "CommandHandler"
                     )
                     await event.client.send_message(event.chat_id, message, parse_mode='html')
@@ -157,21 +154,19 @@ class CommandHandler:
                         chat_id=event.chat_id, thread_id=question.thread_id, message_id=question.message_id
                     )
 
-                    income_service = IncomeService()
-                    incomes = await income_service.get_income_by_specific_date_and_chat_id(
-                        chat_id=event.chat_id,
-                        target_date=selected_date
+                    daily_totals = await IncomeAggregateService().get_totals(
+                        event.chat_id, *DateUtils.day_bounds(selected_date), group_by=("day",)
                     )
 
                     # Don't delete user's reply message
-                    if not incomes:
+                    if not daily_totals:
                         await event.respond(
                             f"គ្មានប្រតិបត្តិការសម្រាប់ថ្ងៃទី {selected_date.strftime('%d %b %Y')} ទេ។"
                         )
                         return
 
                     message = await self.format_totals_message(
-                        incomes=incomes,
+                        daily_totals=daily_totals,
                         report_date=selected_date,
                         requesting_user=event.sender,
                         is_daily=True,
@@ -198,15 +193,13 @@ class CommandHandler:
         group_package = await self.group_package_service.get_package_by_chat_id(chat_id)
 
         try:
-            income_service = IncomeService()
-            incomes = await income_service.get_income_by_specific_date_and_chat_id(
-                chat_id=chat_id,
-                target_date=today,
+            daily_totals = await IncomeAggregateService().get_totals(
+                chat_id, *DateUtils.day_bounds(today), group_by=("day",)
             )
 
             await event.delete()
 
-            if not incomes:
+            if not daily_totals:
                 await event.client.send_message(
                     chat_id,
                     f"គ្មានប្រតិបត្តិការសម្រាប់ថ្ងៃទី {today.strftime('%d %b %Y')} ទេ។",
@@ -214,13 +207,13 @@ class CommandHandler:
                 return
 
             # Check package limits
-            if group_package and group_package.package == ServicePackage.FREE and len(incomes) > 10:
+            if group_package and group_package.package == ServicePackage.FREE and sum(total.count for total in daily_totals) > 10:
                 contact_message = "អ្នកមានទិន្នន័យច្រើនជាង 10 ប្រតិបត្តិការ។ \nសម្រាប់មើលទិន្នន័យពេញលេញ \nសូមប្រើប្រាស់កញ្ចប់ Pay version.សូមទាក់ទងទៅAdmin \n\n https://t.me/HK_688"
                 await event.client.send_message(chat_id, contact_message)
                 return
 
             message = await self.format_totals_message(
-                incomes=incomes,
+                daily_totals=daily_totals,
                 report_date=today,
                 requesting_user=event.sender,
                 is_daily=True,
@@ -346,18 +339,15 @@ class CommandHandler:
 
         try:
             selected_date = datetime.strptime(date_str, "%Y-%m-%d")
-            income_service = IncomeService()
-            incomes = await income_service.get_income_by_date_and_chat_id(
-                chat_id=chat_id,
-                start_date=selected_date,
-                end_date=selected_date + timedelta(days=1),
+            daily_totals = await IncomeAggregateService().get_totals(
+                chat_id, selected_date, selected_date + timedelta(days=1), group_by=("day",)
             )
 
             await event.answer(
                 f"Fetching data for {selected_date.strftime('%d %b %Y')}"
             )
             await event.delete()
-            if not incomes:
+            if not daily_totals:
                 await event.client.send_message(
                     chat_id,
                     f"គ្មានប្រតិបត្តិការសម្រាប់ថ្ងៃទី {selected_date.strftime('%d %b %Y')} ទេ។",
@@ -365,7 +355,7 @@ class CommandHandler:
                 return
 
             message = await self.format_totals_message(
-                incomes=incomes,
+                daily_totals=daily_totals,
                 report_date=selected_date,
                 requesting_user=event.sender,
                 is_daily=True,
@@ -427,12 +417,11 @@ class CommandHandler:
             await event.answer(f"Fetching data for {period_text}")
 
             await event.delete()
-            income_service = IncomeService()
-            incomes = await income_service.get_income_by_date_and_chat_id(
-                chat_id=chat_id, start_date=start_date, end_date=end_date
+            daily_totals = await IncomeAggregateService().get_totals(
+                chat_id, start_date, end_date, group_by=("day",)
             )
 
-            if not incomes:
+            if not daily_totals:
                 await event.client.send_message(
                     chat_id, f"គ្មានប្រតិបត្តិការសម្រាប់ {period_text} ទេ។"
                 )
@@ -442,7 +431,7 @@ class CommandHandler:
             is_weekly = data.startswith("summary_week_")
             is_monthly = data.startswith("summary_month_")
             message = await self.format_totals_message(
-                incomes=incomes,
+                daily_totals=daily_totals,
                 requesting_user=event.sender,
                 start_date=start_date,
                 end_date=end_date,
@@ -8,6 +8,7 @@ from models import User
 from services.bot_registry import BotRegistry
 from services.chat_service import ChatService
 from services.group_package_service import GroupPackageService
+from services.income_aggregate_service import IncomeAggregateService
 from services.income_balance_service import IncomeService
 from services.private_bot_group_binding_service import PrivateBotGroupBindingService
 from services.shift_configuration_service import ShiftConfigurationService
@@ -26,6 +27,7 @@ class BusinessEventHandler:
         self.command_handler = CommandHandler()
         self.chat_service = ChatService()
         self.income_service = IncomeService()
+        self.income_aggregate_service = IncomeAggregateService()
         self.shift_service = ShiftService()
         self.shift_config_service = ShiftConfigurationService()
         self.shift_permission_service = ShiftPermissionService()
@@ -955,14 +957,12 @@ Telegram: https://t.me/HK_688
             start_date = datetime(year, month, start_day)
             end_date = datetime(year, month, end_day, 23, 59, 59)
 
-            # Get income data for the week
-            incomes = await self.income_service.get_income_by_date_and_chat_id(
-                chat_id=chat_id,
-                start_date=start_date,
-                end_date=end_date,
+            # Per-day currency totals for the week
+            daily_totals = await self.income_aggregate_service.get_totals(
+                chat_id, start_date, end_date, group_by=("day",)
             )
 
-            if not incomes:
+            if not daily_totals:
                 message = f"""
 📆 របាយការណ៍សប្តាហ៍ {week_number} ({start_day}-{end_day} {start_date.strftime('%B %Y')})
 
@@ -971,7 +971,7 @@ Telegram: https://t.me/HK_688
             else:
                 # Use weekly report format similar to telegram bot service
                 from helper import weekly_transaction_report
-                message = weekly_transaction_report(incomes, start_date, end_date)
+                message = weekly_transaction_report(daily_totals, start_date, end_date)
 
             await event.delete()
             await event.respond(message, parse_mode='HTML')
@@ -998,20 +998,18 @@ Telegram: https://t.me/HK_688
             _, last_day = monthrange(start_date.year, start_date.month)
             end_date = start_date.replace(day=last_day, hour=23, minute=59, second=59)
 
-            # Get income data for the month
-            incomes = await self.income_service.get_income_by_date_and_chat_id(
-                chat_id=chat_id,
-                start_date=start_date,
-                end_date=end_date,
+            # Per-day currency totals for the month
+            daily_totals = await self.income_aggregate_service.get_totals(
+                chat_id, start_date, end_date, group_by=("day",)
             )
 
-            if not incomes:
+            if not daily_totals:
                 period_text = start_date.strftime("%B %Y")
                 message = f"គ្មានប្រតិបត្តិការសម្រាប់ {period_text} ទេ។"
             else:
                 # Use monthly report format similar to telegram bot service
                 from helper import monthly_transaction_report
-                message = monthly_transaction_report(incomes, start_date, end_date)
+                message = monthly_transaction_report(daily_totals, start_date, end_date)
 
             await event.delete()
             await event.respond(message, parse_mode='HTML')
@@ -1,27 +1,31 @@
 """
 Bot-specific parser functions for optimized message parsing.
-Each bot has a dedicated parser that returns (currency, amount, datetime, paid_by, paid_by_name).
+Each bot's parser is compiled from its ParserSpec (helper.parser_specs) and
+returns a ParsedPayment, or None when the message has no amount.
 """
 
 from datetime import datetime, time as dt_time
-from typing import Tuple, Optional
+from decimal import Decimal
+from re import Match
+from typing import Callable, Iterable, Optional, Tuple
 
 import pytz
 
 from helper.message_patterns import (
-    # Bot-specific patterns
-    ACLEDA_RECEIVED, ABA_SYMBOL_START, PLB_CREDITED, CANADIA_PAID,
-    HLB_IS_PAID, VATTANAC_IS_PAID, CPBANK_RECEIVED, SATHAPANA_AMOUNT,
-    CHIPMONG_IS_PAID, PRASAC_PAYMENT_AMOUNT, AMK_BOLD_AMOUNT, PRINCE_AMOUNT_BOLD,
-    CCU_IS_PAID_BY, S7POS_FINAL_AMOUNT, S7DAYS_USD_VALUES,
     # Universal patterns
-    KHMER_RIEL_PATTERN, KHMER_DOLLAR_PATTERN,
-    CURRENCY_SYMBOL_BEFORE, AMOUNT_BEFORE_CODE, CODE_BEFORE_AMOUNT, AMOUNT_WITH_LABEL,
+    UNIVERSAL_AMOUNT_PATTERNS,
     # Time patterns
-    TIME_PATTERNS, MONTH_MAP,
+    TIME_PATTERNS, TIME_PATTERN_SEPARATORS, MONTH_MAP,
     # Helpers
     CURRENCY_MAP, PAID_BY_PATTERN, PAID_BY_NAME_PATTERN,
 )
+from helper.bot_parsers_registry import ParserFunction
+from helper.message_parser import extract_trx_id
+from helper.parsed_payment import ParsedPayment, to_minor_units
+from helper.parser_specs import CURRENCY_SYMBOLS, PARSER_SPECS, ParserSpec
+from helper.pattern_stats import UNIVERSAL_AMOUNT_CASCADE, UNIVERSAL_TIME_CASCADE
+
+_UNIVERSAL_AMOUNT_PATTERNS_BY_NAME = {candidate.name: candidate for candidate in UNIVERSAL_AMOUNT_PATTERNS}
 
 
 # ========================================
@@ -73,306 +77,166 @@ def extract_paid_by_name(text: str) -> Optional[str]:
 # Time Extraction Helper
 # ========================================
 
-def extract_transaction_time(text: str) -> Optional[datetime]:
-    """
-    Extract transaction timestamp from message.
+ICT = pytz.timezone('Asia/Phnom_Penh')
 
-    Args:
-        text: Payment message text
 
-    Returns:
-        datetime object in ICT timezone, or None if not found
-    """
-    ict = pytz.timezone('Asia/Phnom_Penh')
+def _to_24h(hour: int, am_pm: str) -> int:
+    """Convert a 12-hour clock hour to 24-hour"""
+    am_pm = am_pm.upper()
+    if am_pm == 'PM' and hour != 12:
+        return hour + 12
+    if am_pm == 'AM' and hour == 12:
+        return 0
+    return hour
 
-    # Try Sathapana format: "2025-10-04 08.58.45 AM"
-    match = TIME_PATTERNS['datetime_iso_dots_12h'].search(text)
-    if match:
-        try:
-            year = int(match.group(1))
-            month = int(match.group(2))
-            day = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            second = int(match.group(6))
-            am_pm = match.group(7).upper()
-
-            # Convert 12-hour to 24-hour
-            if am_pm == 'PM' and hour != 12:
-                hour += 12
-            elif am_pm == 'AM' and hour == 12:
-                hour = 0
-
-            dt = datetime(year, month, day, hour, minute, second)
-            return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
 
-    # Try CP Bank format: "11-10-2025 10:52:51 AM"
-    match = TIME_PATTERNS['datetime_dmy_dash_12h'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month = int(match.group(2))
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            second = int(match.group(6))
-            am_pm = match.group(7).upper()
-
-            # Convert 12-hour to 24-hour
-            if am_pm == 'PM' and hour != 12:
-                hour += 12
-            elif am_pm == 'AM' and hour == 12:
-                hour = 0
-
-            dt = datetime(year, month, day, hour, minute, second)
-            return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
+def _time_iso_dots_12h(match: Match) -> Optional[datetime]:
+    # Sathapana format: "2025-10-04 08.58.45 AM"
+    year, month, day, hour, minute, second = (int(match.group(i)) for i in range(1, 7))
+    return datetime(year, month, day, _to_24h(hour, match.group(7)), minute, second)
+
+
+def _time_dmy_dash_12h(match: Match) -> Optional[datetime]:
+    # CP Bank format: "11-10-2025 10:52:51 AM"
+    day, month, year, hour, minute, second = (int(match.group(i)) for i in range(1, 7))
+    return datetime(year, month, day, _to_24h(hour, match.group(7)), minute, second)
 
-    # Try CP Bank/AMK format: "15-09-2025 04:17 PM" (no seconds)
-    match = TIME_PATTERNS['datetime_dmy_dash_12h_nosec'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month = int(match.group(2))
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            am_pm = match.group(6).upper()
-
-            # Convert 12-hour to 24-hour
-            if am_pm == 'PM' and hour != 12:
-                hour += 12
-            elif am_pm == 'AM' and hour == 12:
-                hour = 0
-
-            dt = datetime(year, month, day, hour, minute, 0)
-            return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
 
-    # Try Vattanac format: "04/10/2025 09:32 PM"
-    match = TIME_PATTERNS['datetime_dmy_slash_12h'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month = int(match.group(2))
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            am_pm = match.group(6).upper()
-
-            # Convert 12-hour to 24-hour
-            if am_pm == 'PM' and hour != 12:
-                hour += 12
-            elif am_pm == 'AM' and hour == 12:
-                hour = 0
-
-            dt = datetime(year, month, day, hour, minute, 0)
-            return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
+def _time_dmy_12h_nosec(match: Match) -> Optional[datetime]:
+    # CP Bank/AMK format: "15-09-2025 04:17 PM", Vattanac format: "04/10/2025 09:32 PM"
+    day, month, year, hour, minute = (int(match.group(i)) for i in range(1, 6))
+    return datetime(year, month, day, _to_24h(hour, match.group(6)), minute, 0)
 
-    # Try ACLEDA format: "11-Oct-2025 10:12AM" (no space before AM/PM)
-    match = TIME_PATTERNS['datetime_month_name_nospace'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month_name = match.group(2).lower()
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            am_pm = match.group(6).upper()
-            month = MONTH_MAP.get(month_name[:3], None)
-
-            if month:
-                # Convert 12-hour to 24-hour
-                if am_pm == 'PM' and hour != 12:
-                    hour += 12
-                elif am_pm == 'AM' and hour == 12:
-                    hour = 0
-
-                dt = datetime(year, month, day, hour, minute, 0)
-                return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
 
-    # Try datetime_at pattern: "11-Oct-2025 @10:23:23"
-    match = TIME_PATTERNS['datetime_at'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month_name = match.group(2).lower()
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            second = int(match.group(6))
-            month = MONTH_MAP.get(month_name[:3], None)
-            if month:
-                dt = datetime(year, month, day, hour, minute, second)
-                return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
+def _time_month_name_nospace(match: Match) -> Optional[datetime]:
+    # ACLEDA format: "11-Oct-2025 10:12AM" (no space before AM/PM)
+    month = MONTH_MAP.get(match.group(2).lower()[:3], None)
+    if not month:
+        return None
+    hour = _to_24h(int(match.group(4)), match.group(6))
+    return datetime(int(match.group(3)), month, int(match.group(1)), hour, int(match.group(5)), 0)
 
-    # Try datetime_month_name: "11 OCT 2025 at 10:08:53"
-    match = TIME_PATTERNS['datetime_month_name'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month_name = match.group(2).lower()
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            second = int(match.group(6))
-            month = MONTH_MAP.get(month_name[:3], None)
-            if month:
-                dt = datetime(year, month, day, hour, minute, second)
-                return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
 
-    # Try datetime_month_name_short: "11-Oct-25 09:43.44 AM"
-    match = TIME_PATTERNS['datetime_month_name_short'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month_name = match.group(2).lower()
-            year_short = int(match.group(3))
-            year = 2000 + year_short if year_short < 100 else year_short
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            second = int(match.group(6))
-            am_pm = match.group(7).upper()
-            month = MONTH_MAP.get(month_name[:3], None)
-
-            if month:
-                # Convert 12-hour to 24-hour
-                if am_pm == 'PM' and hour != 12:
-                    hour += 12
-                elif am_pm == 'AM' and hour == 12:
-                    hour = 0
-
-                dt = datetime(year, month, day, hour, minute, second)
-                return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
+def _time_month_name_seconds(match: Match) -> Optional[datetime]:
+    # "11-Oct-2025 @10:23:23" (datetime_at), "11 OCT 2025 at 10:08:53" (datetime_month_name)
+    month = MONTH_MAP.get(match.group(2).lower()[:3], None)
+    if not month:
+        return None
+    day, year, hour, minute, second = (int(match.group(i)) for i in (1, 3, 4, 5, 6))
+    return datetime(year, month, day, hour, minute, second)
 
-    # Try datetime_comma: "Oct 11, 2025 10:21 AM" or "Oct 11, 10:21 AM"
-    match = TIME_PATTERNS['datetime_comma'].search(text)
-    if match:
-        try:
-            month_name = match.group(1).lower()
-            day = int(match.group(2))
-            year_str = match.group(3)
-            year = int(year_str) if year_str else datetime.now(ict).year
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            am_pm = match.group(6).upper()
-            month = MONTH_MAP.get(month_name[:3], None)
-
-            if month:
-                # Convert 12-hour to 24-hour
-                if am_pm == 'PM' and hour != 12:
-                    hour += 12
-                elif am_pm == 'AM' and hour == 12:
-                    hour = 0
-
-                dt = datetime(year, month, day, hour, minute, 0)
-                return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
 
-    # Try CCU Bank format: "31-October-2025, 08:35PM"
-    match = TIME_PATTERNS['datetime_full_month_12h'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month_name = match.group(2).lower()
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            am_pm = match.group(6).upper()
-            month = MONTH_MAP.get(month_name, None)
-
-            if month:
-                # Convert 12-hour to 24-hour
-                if am_pm == 'PM' and hour != 12:
-                    hour += 12
-                elif am_pm == 'AM' and hour == 12:
-                    hour = 0
-
-                dt = datetime(year, month, day, hour, minute, 0)
-                return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
+def _time_month_name_short(match: Match) -> Optional[datetime]:
+    # "11-Oct-25 09:43.44 AM"
+    month = MONTH_MAP.get(match.group(2).lower()[:3], None)
+    if not month:
+        return None
+    year_short = int(match.group(3))
+    year = 2000 + year_short if year_short < 100 else year_short
+    hour = _to_24h(int(match.group(4)), match.group(7))
+    return datetime(year, month, int(match.group(1)), hour, int(match.group(5)), int(match.group(6)))
 
-    # Try datetime_slash_12h: "2025/09/26, 10:07 pm"
-    match = TIME_PATTERNS['datetime_slash_12h'].search(text)
-    if match:
-        try:
-            year = int(match.group(1))
-            month = int(match.group(2))
-            day = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            am_pm = match.group(6).upper()
-
-            # Convert 12-hour to 24-hour
-            if am_pm == 'PM' and hour != 12:
-                hour += 12
-            elif am_pm == 'AM' and hour == 12:
-                hour = 0
-
-            dt = datetime(year, month, day, hour, minute, 0)
-            return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
 
-    # Try datetime_iso: "2025-10-10 14:35:22"
-    match = TIME_PATTERNS['datetime_iso'].search(text)
-    if match:
-        try:
-            year = int(match.group(1))
-            month = int(match.group(2))
-            day = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            second = int(match.group(6)) if match.group(6) else 0
-            dt = datetime(year, month, day, hour, minute, second)
-            return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
+def _time_comma(match: Match) -> Optional[datetime]:
+    # "Oct 11, 2025 10:21 AM" or "Oct 11, 10:21 AM"
+    month = MONTH_MAP.get(match.group(1).lower()[:3], None)
+    if not month:
+        return None
+    year_str = match.group(3)
+    year = int(year_str) if year_str else datetime.now(ICT).year
+    hour = _to_24h(int(match.group(4)), match.group(6))
+    return datetime(year, month, int(match.group(2)), hour, int(match.group(5)), 0)
 
-    # Try datetime_slash: "10/10/2025 14:35"
-    match = TIME_PATTERNS['datetime_slash'].search(text)
-    if match:
-        try:
-            day = int(match.group(1))
-            month = int(match.group(2))
-            year = int(match.group(3))
-            hour = int(match.group(4))
-            minute = int(match.group(5))
-            second = int(match.group(6)) if match.group(6) else 0
-            dt = datetime(year, month, day, hour, minute, second)
-            return ict.localize(dt)
-        except (ValueError, AttributeError):
-            pass
 
-    # Try time_dots: "08.58.45" (time only, combine with today)
-    match = TIME_PATTERNS['time_dots'].search(text)
-    if match:
+def _time_full_month_12h(match: Match) -> Optional[datetime]:
+    # CCU Bank format: "31-October-2025, 08:35PM"
+    month = MONTH_MAP.get(match.group(2).lower(), None)
+    if not month:
+        return None
+    hour = _to_24h(int(match.group(4)), match.group(6))
+    return datetime(int(match.group(3)), month, int(match.group(1)), hour, int(match.group(5)), 0)
+
+
+def _time_slash_12h(match: Match) -> Optional[datetime]:
+    # "2025/09/26, 10:07 pm"
+    year, month, day, hour, minute = (int(match.group(i)) for i in range(1, 6))
+    return datetime(year, month, day, _to_24h(hour, match.group(6)), minute, 0)
+
+
+def _time_iso(match: Match) -> Optional[datetime]:
+    # "2025-10-10 14:35:22"
+    year, month, day, hour, minute = (int(match.group(i)) for i in range(1, 6))
+    second = int(match.group(6)) if match.group(6) else 0
+    return datetime(year, month, day, hour, minute, second)
+
+
+def _time_slash(match: Match) -> Optional[datetime]:
+    # "10/10/2025 14:35"
+    day, month, year, hour, minute = (int(match.group(i)) for i in range(1, 6))
+    second = int(match.group(6)) if match.group(6) else 0
+    return datetime(year, month, day, hour, minute, second)
+
+
+def _time_dots(match: Match) -> Optional[datetime]:
+    # "08.58.45" (time only, combine with today)
+    hour, minute, second = (int(match.group(i)) for i in range(1, 4))
+    return datetime.combine(datetime.now(ICT).date(), dt_time(hour, minute, second))
+
+
+# TIME_PATTERNS key -> builder, in the universal cascade's declared order
+TIME_MATCHERS: dict[str, Callable[[Match], Optional[datetime]]] = {
+    'datetime_iso_dots_12h': _time_iso_dots_12h,
+    'datetime_dmy_dash_12h': _time_dmy_dash_12h,
+    'datetime_dmy_dash_12h_nosec': _time_dmy_12h_nosec,
+    'datetime_dmy_slash_12h': _time_dmy_12h_nosec,
+    'datetime_month_name_nospace': _time_month_name_nospace,
+    'datetime_at': _time_month_name_seconds,
+    'datetime_month_name': _time_month_name_seconds,
+    'datetime_month_name_short': _time_month_name_short,
+    'datetime_comma': _time_comma,
+    'datetime_full_month_12h': _time_full_month_12h,
+    'datetime_slash_12h': _time_slash_12h,
+    'datetime_iso': _time_iso,
+    'datetime_slash': _time_slash,
+    'time_dots': _time_dots,
+}
+
+
+def extract_transaction_time(text: str, formats: Optional[Iterable[str]] = None) -> Optional[datetime]:
+    """
+    Extract transaction timestamp from message.
+
+    Args:
+        text: Payment message text
+        formats: TIME_PATTERNS keys to try, in order. Bank parsers pass the
+            formats declared in PARSER_TIME_FORMATS; by default the full
+            cascade used by parse_universal runs in UNIVERSAL_TIME_CASCADE
+            order and its hits are counted.
+
+    Returns:
+        datetime object in ICT timezone, or None if not found
+    """
+    counted = formats is None
+    if counted:
+        formats = UNIVERSAL_TIME_CASCADE.order
+        tries, hits = UNIVERSAL_TIME_CASCADE.tries, UNIVERSAL_TIME_CASCADE.hits
+    for name in formats:
+        separators = TIME_PATTERN_SEPARATORS.get(name)
+        if separators and not any(separator in text for separator in separators):
+            continue
+        if counted:
+            tries[name] += 1
+        match = TIME_PATTERNS[name].search(text)
+        if not match:
+            continue
         try:
-            hour = int(match.group(1))
-            minute = int(match.group(2))
-            second = int(match.group(3))
-            today = datetime.now(ict).date()
-            dt = datetime.combine(today, dt_time(hour, minute, second))
-            return ict.localize(dt)
+            dt = TIME_MATCHERS[name](match)
         except (ValueError, AttributeError):
-            pass
-
+            continue
+        if dt:
+            if counted:
+                hits[name] += 1
+            return ICT.localize(dt)
     return None
 
 
@@ -380,352 +244,132 @@ def extract_transaction_time(text: str) -> Optional[datetime]:
 # Bot-Specific Parsers
 # ========================================
 
-def parse_acleda(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse ACLEDA Bank messages (English + Khmer)"""
-    # Try bot-specific pattern first: "Received X.XX USD" or "បានទទួល X.XX ដុល្លារ"
-    match = ACLEDA_RECEIVED.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        currency_raw = match.group(2)
-        # Convert Khmer currency to symbol
-        if currency_raw in ['ដុល្លារ', 'USD']:
-            currency = '$'
-        elif currency_raw in ['រៀល', 'KHR']:
-            currency = '៛'
-        else:
-            currency = currency_raw
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
+def compile_parser(spec: ParserSpec) -> ParserFunction:
+    """
+    Build the parser function for one ParserSpec.
 
-def parse_aba(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse ABA Bank messages (English + Khmer)"""
-    # Try bot-specific pattern: "៛X,XXX paid" or "$X.XX paid" (symbol at start of line)
-    match = ABA_SYMBOL_START.search(text)
-    if match:
-        currency = match.group(1)
-        amount_str = match.group(2).replace(',', '')
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_plb(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse PLB Bank messages (English)"""
-    # Try bot-specific pattern: "X,XXX KHR was credited"
-    match = PLB_CREDITED.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        currency_code = match.group(2).upper()
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_canadia(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse Canadia Bank messages (English)"""
-    # Try bot-specific pattern: "X.XX USD was paid"
-    match = CANADIA_PAID.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        currency_code = match.group(2).upper()
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_hlb(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse Hong Leong Bank messages (English)"""
-    # Try bot-specific pattern: "KHR X,XXX.XX is paid"
-    match = HLB_IS_PAID.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_vattanac(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse Vattanac Bank messages (English)"""
-    # Try bot-specific pattern: "USD X.XX is paid by"
-    match = VATTANAC_IS_PAID.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_cpbank(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse CP Bank messages (English)"""
-    # Try bot-specific pattern: "received KHR X,XXX" or "amount USD X.XX"
-    match = CPBANK_RECEIVED.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_sathapana(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse Sathapana Bank messages (English)"""
-    # Try bot-specific pattern: "The amount X.XX USD"
-    match = SATHAPANA_AMOUNT.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        currency_code = match.group(2).upper()
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_chipmong(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse Chip Mong Bank messages (English)"""
-    # Try bot-specific pattern: "KHR X,XXX is paid"
-    match = CHIPMONG_IS_PAID.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_prasac(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse PRASAC Bank messages (English)"""
-    # Try bot-specific pattern: "Payment Amount X.XX USD"
-    match = PRASAC_PAYMENT_AMOUNT.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        currency_code = match.group(2).upper()
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_amk(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse Advanced Bank of Asia messages (English)"""
-    # Try bot-specific pattern: "**KHR X,XXX**"
-    match = AMK_BOLD_AMOUNT.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_prince(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse Prince Bank messages (English)"""
-    # Try bot-specific pattern: "Amount: **USD X.XX**"
-    match = PRINCE_AMOUNT_BOLD.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_ccu(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse CCU Bank messages (English)"""
-    # Try bot-specific pattern: "X.XX USD is paid by" or "X,XXX KHR is paid by"
-    match = CCU_IS_PAID_BY.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        currency_code = match.group(2).upper()
-        currency = '$' if currency_code == 'USD' else '៛'
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Fallback to universal parser
-    return parse_universal(text)
-
-
-def parse_s7pos(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse s7pos_bot messages (Khmer)"""
-    match = S7POS_FINAL_AMOUNT.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return '$', amount, trx_time, paid_by, paid_by_name
-    return None, None, None, None, None
-
-
-def parse_s7days(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse S7days777 messages (English)"""
-    matches = S7DAYS_USD_VALUES.findall(text)
-    if not matches:
-        return None, None, None, None, None
-    total = round(sum(float(value) for value in matches), 2)
-    if total == int(total):
-        total = int(total)
-    trx_time = extract_transaction_time(text)
-    paid_by = extract_paid_by(text)
-    paid_by_name = extract_paid_by_name(text)
-    return '$', total, trx_time, paid_by, paid_by_name
-
-
-def parse_payment_bk(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
-    """Parse payment_bk_bot messages (English)"""
-    # No specific pattern yet, use universal parser
-    return parse_universal(text)
+    Everything the spec decides (patterns, groups, currency, formats) is
+    bound once here, so parsing a message only runs that bank's patterns.
+    """
+    if spec.amount is None:
+        def parse(text: str, folded: Optional[str] = None) -> Optional[ParsedPayment]:
+            return parse_universal(text, folded)
+        parse.__name__ = spec.name
+        return parse
+
+    parser_name = spec.name
+    amount_pattern = spec.amount
+    amount_group, currency_group, fixed_currency = spec.amount_group, spec.currency_group, spec.currency
+    sum_amounts, fallback = spec.sum_amounts, spec.fallback
+    time_formats = spec.time_formats
+    trx_id_pattern, payer_pattern, payer_name_pattern = spec.trx_id, spec.payer, spec.payer_name
+    breakdown = spec.breakdown
+
+    def parse(text: str, folded: Optional[str] = None) -> Optional[ParsedPayment]:
+        if sum_amounts:
+            amounts = [match.group(amount_group) for match in amount_pattern.finditer(text)]
+            if not amounts:
+                return None
+            currency = fixed_currency
+            amount_str = str(sum(Decimal(amount.replace(',', '')) for amount in amounts))
+        else:
+            match = amount_pattern.search(text)
+            if match is None:
+                return parse_universal(text, folded) if fallback else None
+            if currency_group is None:
+                currency = fixed_currency
+            else:
+                currency_raw = match.group(currency_group)
+                currency = CURRENCY_SYMBOLS.get(currency_raw.upper(), currency_raw)
+            amount_str = match.group(amount_group)
+
+        trx_id = None
+        if trx_id_pattern is not None:
+            trx_match = trx_id_pattern.search(text)
+            trx_id = trx_match.group(1) if trx_match else None
+        if trx_id is None:
+            trx_id = extract_trx_id(text, text.casefold() if folded is None else folded)
+
+        paid_by = paid_by_name = None
+        if payer_pattern is not None:
+            payer_match = payer_pattern.search(text)
+            paid_by = payer_match.group(1) if payer_match else None
+        if payer_name_pattern is not None:
+            name_match = payer_name_pattern.search(text)
+            paid_by_name = ' '.join(name_match.group(1).split()) if name_match else None
+
+        return ParsedPayment(
+            currency=currency,
+            amount_minor=to_minor_units(amount_str),
+            trx_time=extract_transaction_time(text, time_formats),
+            trx_id=trx_id,
+            paid_by=paid_by,
+            paid_by_name=paid_by_name,
+            breakdown=breakdown(text) if breakdown is not None else None,
+            parser=parser_name,
+        )
+
+    parse.__name__ = parser_name
+    return parse
 
 
 # ========================================
 # Universal Fallback Parser
 # ========================================
 
-def parse_universal(text: str) -> Tuple[Optional[str], Optional[float], Optional[datetime], Optional[str], Optional[str]]:
+def _universal_amount(text: str, folded: str) -> Tuple[Optional[str], Optional[str]]:
+    """Currency and amount string from the first UNIVERSAL_AMOUNT_PATTERNS entry that matches"""
+    tries, hits = UNIVERSAL_AMOUNT_CASCADE.tries, UNIVERSAL_AMOUNT_CASCADE.hits
+    for name in UNIVERSAL_AMOUNT_CASCADE.order:
+        candidate = _UNIVERSAL_AMOUNT_PATTERNS_BY_NAME[name]
+        if not candidate.admits(folded):
+            continue
+        tries[name] += 1
+        match = candidate.pattern.search(text)
+        if not match:
+            continue
+        hits[name] += 1
+        if candidate.name == 'khmer_dollar':
+            return '$', match.group(1)
+        if candidate.name == 'khmer_riel':
+            return '៛', match.group(1)
+        if candidate.name == 'symbol_before':
+            return match.group(1), match.group(2)
+        if candidate.name == 'amount_before_code':
+            currency_code = match.group(2).upper()
+            return CURRENCY_MAP.get(currency_code, currency_code), match.group(1)
+        # Currency code before amount, with or without "Amount:" label
+        currency_code = match.group(1).upper()
+        return CURRENCY_MAP.get(currency_code, currency_code), match.group(2)
+    return None, None
+
+
+def parse_universal(text: str, folded: Optional[str] = None) -> Optional[ParsedPayment]:
     """
     Universal fallback parser - tries all common patterns
     Used for unknown bots or when bot-specific parser fails
+
+    ``folded`` is ``text.casefold()`` when the caller already has it; a
+    pattern is only tried when its keyword occurs in the message.
     """
-    # Try Khmer patterns first
-    match = KHMER_DOLLAR_PATTERN.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return '$', amount, trx_time, paid_by, paid_by_name
-
-    match = KHMER_RIEL_PATTERN.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return '៛', amount, trx_time, paid_by, paid_by_name
-
-    # Try currency symbol before amount
-    match = CURRENCY_SYMBOL_BEFORE.search(text)
-    if match:
-        currency = match.group(1)
-        amount_str = match.group(2).replace(',', '')
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Try amount before currency code
-    match = AMOUNT_BEFORE_CODE.search(text)
-    if match:
-        amount_str = match.group(1).replace(',', '')
-        currency_code = match.group(2).upper()
-        currency = CURRENCY_MAP.get(currency_code, currency_code)
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Try currency code before amount
-    match = CODE_BEFORE_AMOUNT.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = CURRENCY_MAP.get(currency_code, currency_code)
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # Try amount with label
-    match = AMOUNT_WITH_LABEL.search(text)
-    if match:
-        currency_code = match.group(1).upper()
-        amount_str = match.group(2).replace(',', '')
-        currency = CURRENCY_MAP.get(currency_code, currency_code)
-        amount = float(amount_str) if '.' in amount_str else int(amount_str)
-        trx_time = extract_transaction_time(text)
-        paid_by = extract_paid_by(text)
-        paid_by_name = extract_paid_by_name(text)
-        return currency, amount, trx_time, paid_by, paid_by_name
-
-    # No match found
-    return None, None, None, None, None
+    if folded is None:
+        folded = text.casefold()
+    currency, amount_str = _universal_amount(text, folded)
+    if currency is None:
+        # No match found
+        return None
+
+    return ParsedPayment(
+        currency=currency,
+        amount_minor=to_minor_units(amount_str),
+        trx_time=extract_transaction_time(text),
+        trx_id=extract_trx_id(text, folded),
+        paid_by=extract_paid_by(text),
+        paid_by_name=extract_paid_by_name(text),
+        parser="parse_universal",
+    )
+
+
+# Parser name -> compiled parser, built once at import
+PARSER_FUNCTIONS: dict[str, ParserFunction] = {spec.name: compile_parser(spec) for spec in PARSER_SPECS}
+PARSER_FUNCTIONS["parse_universal"] = parse_universal
@@ -1,37 +1,34 @@
 """
 Bot-specific parser registry for optimized message parsing.
-Each bot has a dedicated parser function.
+Each bot has a dedicated parser function, defined in helper.parser_specs.
 """
 
-from datetime import datetime
-from typing import Callable, Tuple, Optional
+from typing import Callable, Optional
 
-# Type alias for parser functions
-ParserFunction = Callable[[str], Tuple[Optional[str], Optional[float], Optional[datetime]]]
+from helper.parsed_payment import ParsedPayment
+from helper.parser_specs import FORWARD, LISTENER, PARSER_SPECS, VERIFICATION, bots_for_channel
+
+# Type alias for parser functions: (text, casefolded text) -> payment
+ParserFunction = Callable[[str, Optional[str]], Optional[ParsedPayment]]
 
 # Bot parser registry - maps bot username to parser function name
 BOT_PARSERS: dict[str, str] = {
-    # Khmer banks
-    "ACLEDABankBot": "parse_acleda",
-    "PayWayByABA_bot": "parse_aba",
-    "PLBITBot": "parse_plb",
-    "CanadiaMerchant_bot": "parse_canadia",
-    "HLBCAM_Bot": "parse_hlb",
-    "vattanac_bank_merchant_prod_bot": "parse_vattanac",
-    "CPBankBot": "parse_cpbank",
-    "SathapanaBank_bot": "parse_sathapana",
-    "chipmongbankpaymentbot": "parse_chipmong",
-    "prasac_merchant_payment_bot": "parse_prasac",
-    "AMKPlc_bot": "parse_amk",
-    "prince_pay_bot": "parse_prince",
-    "ccu_bank_bot": "parse_ccu",
-
-    # Special format bots
-    "s7pos_bot": "parse_s7pos",
-    "S7days777": "parse_s7days",
-    "payment_bk_bot": "parse_payment_bk",
+    bot: spec.name for spec in PARSER_SPECS for bot in spec.bots + spec.aliases
 }
 
+# Timestamp format(s) each bank prints, as TIME_PATTERNS keys tried in order.
+# Bank parsers only try these; the full time cascade runs in parse_universal.
+PARSER_TIME_FORMATS: dict[str, tuple[str, ...]] = {spec.name: spec.time_formats for spec in PARSER_SPECS}
+
+# Bot usernames the Telethon listener stores payments from
+LISTENER_ALLOWED_BOTS: frozenset[str] = bots_for_channel(LISTENER)
+
+# Bot usernames the verification scheduler re-checks for missed messages
+VERIFICATION_ALLOWED_BOTS: frozenset[str] = bots_for_channel(VERIFICATION)
+
+# Origin bots whose forwarded messages the business bot stores
+FORWARD_ALLOWED_BOTS: frozenset[str] = bots_for_channel(FORWARD)
+
 
 def get_parser_name(bot_username: str | None) -> str:
     """Get the parser function name for a bot"""
@@ -7,11 +7,10 @@ async def custom_business_monthly_report(chat_id: int, start_date: datetime, end
     """Generate custom monthly report with Shift 1 and Shift 2 columns (only 2 shifts allowed)"""
 
     # Import services here to avoid circular imports
-    from services.income_balance_service import IncomeService
+    from services.income_aggregate_service import IncomeAggregateService
     from services.shift_service import ShiftService
 
     shift_service = ShiftService()
-    income_service = IncomeService()
 
     # Get date range for shifts (convert to date objects)
     start_date_obj = start_date.date()
@@ -23,6 +22,8 @@ async def custom_business_monthly_report(chat_id: int, start_date: datetime, end
 
     # Get all shifts within the date range
     shifts = await shift_service.get_shifts_by_date_range(chat_id, start_date_obj, end_date_obj)
+    # Per-currency totals of every shift in one grouped query
+    shift_totals = await IncomeAggregateService().get_shift_totals([shift.id for shift in shifts])
 
     # Determine the actual end date for the report
     today = date.today()
@@ -58,14 +59,10 @@ async def custom_business_monthly_report(chat_id: int, start_date: datetime, end
         if shift_date <= end_date_actual:
             shift_key = "shift1" if shift_number == 1 else "shift2"
 
-            # Get incomes for this specific shift
-            shift_incomes = await income_service.get_income_by_shift_id(shift.id)
-
-            if shift_incomes:
-                for income in shift_incomes:
-                    currency = income.currency
-                    if currency in ["KHR", "USD"]:
-                        daily_data[shift_date][shift_key][currency] += income.amount
+            for total in shift_totals.get(shift.id, ()):
+                currency = total.currency
+                if currency in ["KHR", "USD"]:
+                    daily_data[shift_date][shift_key][currency] += total.amount
 
     # Calculate totals
     total_shift1_khr = sum(day_data["shift1"]["KHR"] for day_data in daily_data.values())
@@ -143,11 +140,10 @@ async def business_monthly_transaction_report(chat_id: int, start_date: datetime
     """Generate shift-based monthly transaction report for business groups"""
     
     # Import services here to avoid circular imports
-    from services.income_balance_service import IncomeService
+    from services.income_aggregate_service import IncomeAggregateService
     from services.shift_service import ShiftService
     
     shift_service = ShiftService()
-    income_service = IncomeService()
     
     # Get date range for shifts (convert to date objects)
     start_date_obj = start_date.date()
@@ -159,6 +155,8 @@ async def business_monthly_transaction_report(chat_id: int, start_date: datetime
     
     # Get all shifts within the date range
     shifts = await shift_service.get_shifts_by_date_range(chat_id, start_date_obj, end_date_obj)
+    # Per-currency totals of every shift in one grouped query
+    shift_totals = await IncomeAggregateService().get_shift_totals([shift.id for shift in shifts])
     
     # Group shifts by date and summarize daily transaction data based on shifts
     daily_data = {}
@@ -187,14 +185,9 @@ async def business_monthly_transaction_report(chat_id: int, start_date: datetime
         
         # Only process shifts within our actual date range
         if shift_date <= end_date_actual:
-            # Get incomes for this specific shift
-            shift_incomes = await income_service.get_income_by_shift_id(shift.id)
-            
-            if shift_incomes:
-                for income in shift_incomes:
-                    currency = income.currency
-                    daily_data[shift_date][currency] += income.amount
-                    daily_data[shift_date]["count"] += 1
+            for total in shift_totals.get(shift.id, ()):
+                daily_data[shift_date][total.currency] += total.amount
+                daily_data[shift_date]["count"] += total.count
     
     # Calculate totals
     total_khr = sum(day_data["KHR"] for day_data in daily_data.values())
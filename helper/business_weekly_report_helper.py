@@ -8,11 +8,10 @@ async def custom_business_weekly_report(chat_id: int, start_date: datetime, end_
     """Generate custom weekly report with Shift 1 and Shift 2 columns (only 2 shifts allowed)"""
 
     # Import services here to avoid circular imports
-    from services.income_balance_service import IncomeService
+    from services.income_aggregate_service import IncomeAggregateService
     from services.shift_service import ShiftService
 
     shift_service = ShiftService()
-    income_service = IncomeService()
 
     # Get date range for shifts (convert to date objects)
     start_date_obj = start_date.date()
@@ -26,6 +25,8 @@ async def custom_business_weekly_report(chat_id: int, start_date: datetime, end_
 
     # Get all shifts within the date range
     shifts = await shift_service.get_shifts_by_date_range(chat_id, start_date_obj, end_date_obj)
+    # Per-currency totals of every shift in one grouped query
+    shift_totals = await IncomeAggregateService().get_shift_totals([shift.id for shift in shifts])
 
     force_log(f'Shifts: {len(shifts)} shifts', "Business Weekly Report", "DEBUG")
 
@@ -52,14 +53,10 @@ async def custom_business_weekly_report(chat_id: int, start_date: datetime, end_
 
         shift_key = "shift1" if shift_number == 1 else "shift2"
 
-        # Get incomes for this specific shift
-        shift_incomes = await income_service.get_income_by_shift_id(shift.id)
-
-        if shift_incomes:
-            for income in shift_incomes:
-                currency = income.currency
-                if currency in ["KHR", "USD"]:
-                    daily_data[shift_date][shift_key][currency] += income.amount
+        for total in shift_totals.get(shift.id, ()):
+            currency = total.currency
+            if currency in ["KHR", "USD"]:
+                daily_data[shift_date][shift_key][currency] += total.amount
 
     # Calculate totals
     total_shift1_khr = sum(day_data["shift1"]["KHR"] for day_data in daily_data.values())
@@ -142,11 +139,10 @@ async def business_weekly_transaction_report(chat_id: int, start_date: datetime,
     """Generate shift-based weekly transaction report for business groups"""
     
     # Import services here to avoid circular imports
-    from services.income_balance_service import IncomeService
+    from services.income_aggregate_service import IncomeAggregateService
     from services.shift_service import ShiftService
     
     shift_service = ShiftService()
-    income_service = IncomeService()
     
     # Get date range for shifts (convert to date objects)
     start_date_obj = start_date.date()
@@ -158,6 +154,8 @@ async def business_weekly_transaction_report(chat_id: int, start_date: datetime,
     
     # Get all shifts within the date range
     shifts = await shift_service.get_shifts_by_date_range(chat_id, start_date_obj, end_date_obj)
+    # Per-currency totals of every shift in one grouped query
+    shift_totals = await IncomeAggregateService().get_shift_totals([shift.id for shift in shifts])
     
     # Group shifts by date and summarize daily transaction data based on shifts
     daily_data = {}
@@ -174,14 +172,9 @@ async def business_weekly_transaction_report(chat_id: int, start_date: datetime,
     for shift in shifts:
         shift_date = shift.shift_date
         
-        # Get incomes for this specific shift
-        shift_incomes = await income_service.get_income_by_shift_id(shift.id)
-        
-        if shift_incomes:
-            for income in shift_incomes:
-                currency = income.currency
-                daily_data[shift_date][currency] += income.amount
-                daily_data[shift_date]["count"] += 1
+        for total in shift_totals.get(shift.id, ()):
+            daily_data[shift_date][total.currency] += total.amount
+            daily_data[shift_date]["count"] += total.count
     
     # Calculate totals
     total_khr = sum(day_data["KHR"] for day_data in daily_data.values())
@@ -18,8 +18,8 @@ def format_time_12hour(dt: datetime) -> str:
     return dt.strftime("%I:%M%p").replace("AM", "AM").replace("PM", "PM")
 
 
-async def daily_transaction_report(incomes, report_date: datetime, telegram_username: str = "Admin", group_name: str = None, chat_id: int = None) -> str:
-    """Generate daily transaction report in the new format"""
+async def daily_transaction_report(currency_totals, report_date: datetime, telegram_username: str = "Admin", group_name: str = None, chat_id: int = None) -> str:
+    """Generate daily transaction report in the new format from per-currency IncomeTotal records"""
 
     # Calculate totals and transaction counts
     totals = {"KHR": 0, "USD": 0}
@@ -27,12 +27,12 @@ async def daily_transaction_report(incomes, report_date: datetime, telegram_user
 
     transaction_times = []
 
-    for income in incomes:
-        currency = income.currency
+    for total in currency_totals:
+        currency = total.currency
         if currency in totals:
-            totals[currency] += income.amount
-            transaction_counts[currency] += 1
-            transaction_times.append(income.income_date)
+            totals[currency] += total.amount
+            transaction_counts[currency] += total.count
+            transaction_times.extend([total.first_income, total.last_income])
 
     # Get working hours from actual transaction times (first to last transaction)
     working_hours = ""
@@ -99,10 +99,9 @@ async def daily_transaction_report(incomes, report_date: datetime, telegram_user
 
 async def daily_summary_for_shift_close(chat_id: int, close_date: datetime, group_name: str = None, shift_id: int = None) -> str:
     """Generate daily summary for shift close - shows all transactions from all shifts that started on the same day"""
-    from services import IncomeService
+    from services.income_aggregate_service import IncomeAggregateService
     from services.shift_service import ShiftService
 
-    income_service = IncomeService()
     shift_service = ShiftService()
 
     # Determine the target date
@@ -122,36 +121,24 @@ async def daily_summary_for_shift_close(chat_id: int, close_date: datetime, grou
     if not shifts:
         return "\n\n📊 <b>សរុបថ្ងៃនេះ:</b> គ្មានប្រតិបត្តិការ"
 
-    # Get all incomes for these shifts
-    incomes = []
-    for shift in shifts:
-        shift_incomes = await income_service.get_income_by_shift_id(shift.id)
-        incomes.extend(shift_incomes)
+    # Totals of these shifts, summed by the database
+    aggregate_service = IncomeAggregateService()
+    shift_ids = [shift.id for shift in shifts]
+    currency_totals = await aggregate_service.get_totals(shift_ids=shift_ids)
 
-    if not incomes:
+    if not currency_totals:
         return "\n\n📊 <b>សរុបថ្ងៃនេះ:</b> គ្មានប្រតិបត្តិការ"
 
     # Calculate totals for the entire day
     totals = {"KHR": 0, "USD": 0}
     transaction_counts = {"KHR": 0, "USD": 0}
-    source_totals = {}  # Track totals by revenue source
-    period_labels = set()  # Track all unique period labels (e.g., A, B, C, D from bot messages)
+    for total in currency_totals:
+        if total.currency in totals:
+            totals[total.currency] += total.amount
+            transaction_counts[total.currency] += total.count
 
-    for income in incomes:
-        currency = income.currency
-        if currency in totals:
-            totals[currency] += income.amount
-            transaction_counts[currency] += 1
-
-        # Aggregate revenue sources if present
-        if hasattr(income, 'revenue_sources') and income.revenue_sources:
-            for source in income.revenue_sources:
-                # source.shift contains period labels from bot message (not our shift system)
-                if source.shift:
-                    period_labels.add(source.shift)
-                if source.source_name not in source_totals:
-                    source_totals[source.source_name] = 0
-                source_totals[source.source_name] += source.amount
+    # Totals by revenue source, and the period labels (e.g. A, B, C, D) from the bot messages
+    source_totals, period_labels = await aggregate_service.get_revenue_source_totals(shift_ids)
 
     # Format the daily summary section
     summary = "\n\n" + "——----- summary ———----" + "\n"
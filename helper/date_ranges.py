@@ -0,0 +1,40 @@
+"""
+Half-open calendar ranges for filtering datetime columns.
+
+income_date, created_at and shift start_time hold naive local (ICT) time.
+A filter like ``DATE(income_date) = :day`` hides the column from its indexes;
+these helpers compare the raw column with ``[start, end)`` instead, so
+(chat_id, income_date) and similar indexes are searched as a range.
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import and_
+from sqlalchemy.sql.elements import ColumnElement
+
+from helper.dateutils import DateUtils
+
+
+def between(column, start: datetime | date, end: datetime | date) -> ColumnElement:
+    """start <= column < end"""
+    return and_(column >= start, column < end)
+
+
+def on_day(column, day: date | datetime) -> ColumnElement:
+    """column falls on the calendar day of ``day``"""
+    return between(column, *DateUtils.day_bounds(day))
+
+
+def in_days(column, first_day: date | datetime, last_day: date | datetime) -> ColumnElement:
+    """column falls on any day from ``first_day`` to ``last_day``, both included"""
+    return between(column, DateUtils.day_bounds(first_day)[0], DateUtils.day_bounds(last_day)[1])
+
+
+def in_week(column, day: date | datetime) -> ColumnElement:
+    """column falls in the Monday-to-Sunday week containing ``day``"""
+    return between(column, *DateUtils.week_bounds(day))
+
+
+def in_month(column, day: date | datetime) -> ColumnElement:
+    """column falls in the calendar month containing ``day``"""
+    return between(column, *DateUtils.month_bounds(day))
@@ -1,29 +1,103 @@
 import os
-from datetime import datetime, timedelta, time
+import time as time_module
+from datetime import date as date_type, datetime, timedelta, time, timezone, tzinfo
+from functools import lru_cache
+from typing import Iterable, Optional
 
 import pytz
 
+DEFAULT_TIMEZONE = 'Asia/Phnom_Penh'
+
+
+@lru_cache(maxsize=None)
+def _timezone(name: str) -> tzinfo:
+    return pytz.timezone(name)
+
+
+# tz -> (UTC minute, fixed offset, pytz tzinfo) of the last now() call
+_now_offsets: dict = {}
+
+
+def _now(tz) -> datetime:
+    """
+    datetime.now(tz) with the zone's offset looked up once per minute.
+
+    pytz resolves the offset with a search of the zone's transitions on every
+    datetime.now(tz); offsets only change on whole minutes.
+    """
+    timestamp = time_module.time()
+    minute = int(timestamp // 60)
+    cached = _now_offsets.get(tz)
+    if cached is None or cached[0] != minute:
+        local = datetime.fromtimestamp(minute * 60, tz)
+        cached = _now_offsets[tz] = (minute, timezone(local.utcoffset()), local.tzinfo)
+    return datetime.fromtimestamp(timestamp, cached[1]).replace(tzinfo=cached[2])
+
+
+@lru_cache(maxsize=1024)
+def _day_bounds(day: date_type) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+@lru_cache(maxsize=256)
+def _week_bounds(day: date_type) -> tuple[datetime, datetime]:
+    start = datetime.combine(day - timedelta(days=day.weekday()), time.min)
+    return start, start + timedelta(days=7)
+
+
+@lru_cache(maxsize=256)
+def _month_bounds(day: date_type) -> tuple[datetime, datetime]:
+    start = datetime(day.year, day.month, 1)
+    end = datetime(day.year + 1, 1, 1) if day.month == 12 else datetime(day.year, day.month + 1, 1)
+    return start, end
+
 
 class DateUtils:
     """
-    Utility class for handling dates and times with consistent timezone support
+    Utility class for handling dates and times with consistent timezone support.
+
+    The configured timezone is resolved once per process (``reset_timezone``
+    re-reads ``TIMEZONE``); per-chat zones from ``ShiftConfiguration.timezone``
+    go through ``timezone_for``. Day, week and month bounds are half-open
+    ``[start, end)`` naive local datetimes, the way income_date and created_at
+    are stored, and are cached per date.
     """
-    
+
+    _timezone: Optional[tzinfo] = None
+
     @staticmethod
     def get_timezone():
         """Get the configured timezone, defaults to Asia/Phnom_Penh"""
-        timezone_name = os.getenv('TIMEZONE', 'Asia/Phnom_Penh')
-        return pytz.timezone(timezone_name)
-    
+        tz = DateUtils._timezone
+        if tz is None:
+            tz = DateUtils._timezone = _timezone(os.getenv('TIMEZONE', DEFAULT_TIMEZONE))
+        return tz
+
+    @staticmethod
+    def reset_timezone():
+        """Forget the resolved timezone so the next call reads TIMEZONE again"""
+        DateUtils._timezone = None
+
+    @staticmethod
+    def timezone_for(name: Optional[str]):
+        """Timezone by name (e.g. a chat's ShiftConfiguration.timezone); the configured one if unset or unknown"""
+        if not name:
+            return DateUtils.get_timezone()
+        try:
+            return _timezone(name)
+        except pytz.UnknownTimeZoneError:
+            return DateUtils.get_timezone()
+
     @staticmethod
-    def now():
-        """Get current datetime in the configured timezone"""
-        return datetime.now(DateUtils.get_timezone())
+    def now(tz=None):
+        """Get current datetime in the configured timezone (or ``tz``)"""
+        return _now(tz or DateUtils.get_timezone())
     
     @staticmethod
-    def today():
-        """Get current date in the configured timezone"""
-        return DateUtils.now().date()
+    def today(tz=None):
+        """Get current date in the configured timezone (or ``tz``)"""
+        return DateUtils.now(tz).date()
     
     @staticmethod
     def yesterday():
@@ -60,13 +134,62 @@ class DateUtils:
         return datetime.strptime(date_string, format_string)
     
     @staticmethod
-    def localize_datetime(dt):
-        """Localize a naive datetime to the configured timezone"""
+    def localize_datetime(dt, tz=None):
+        """Localize a naive datetime to the configured timezone (or ``tz``)"""
         if dt.tzinfo is None:
-            tz = DateUtils.get_timezone()
-            return tz.localize(dt)
+            return (tz or DateUtils.get_timezone()).localize(dt)
         return dt
     
+    @staticmethod
+    def day_bounds(day):
+        """[start, end) of ``day`` as naive local datetimes"""
+        return _day_bounds(day.date() if isinstance(day, datetime) else day)
+
+    @staticmethod
+    def week_bounds(day):
+        """[Monday, next Monday) of the week containing ``day``"""
+        return _week_bounds(day.date() if isinstance(day, datetime) else day)
+
+    @staticmethod
+    def month_bounds(day):
+        """[first of the month, first of the next month) containing ``day``"""
+        return _month_bounds(day.date() if isinstance(day, datetime) else day)
+
+    @staticmethod
+    def localize_many(dts: Iterable[datetime], tz=None) -> list[datetime]:
+        """
+        Localize naive datetimes to ``tz`` (default: the configured timezone);
+        aware ones are returned as they are.
+
+        pytz's localize searches the zone's transitions on every call, so the
+        offset is looked up once per local hour. This is exact for zones that
+        change offset on the hour.
+        """
+        tz = tz or DateUtils.get_timezone()
+        tzinfos: dict[datetime, tzinfo] = {}
+        result = []
+        for dt in dts:
+            if dt.tzinfo is not None:
+                result.append(dt)
+                continue
+            hour = dt.replace(minute=0, second=0, microsecond=0)
+            hour_tzinfo = tzinfos.get(hour)
+            if hour_tzinfo is None:
+                hour_tzinfo = tzinfos[hour] = tz.localize(hour).tzinfo
+            result.append(dt.replace(tzinfo=hour_tzinfo))
+        return result
+
+    @staticmethod
+    def to_utc_many(dts: Iterable[datetime], tz=None) -> list[datetime]:
+        """Convert datetimes to UTC; naive ones are taken as local time in ``tz``"""
+        return [dt.astimezone(pytz.UTC) for dt in DateUtils.localize_many(dts, tz)]
+
+    @staticmethod
+    def to_local_many(dts: Iterable[datetime], tz=None) -> list[datetime]:
+        """Convert aware datetimes to naive local time in ``tz``; naive ones are kept"""
+        tz = tz or DateUtils.get_timezone()
+        return [dt.astimezone(tz).replace(tzinfo=None) if dt.tzinfo is not None else dt for dt in dts]
+
     @staticmethod
     def days_ago(days):
         """Get a date that is N days ago from today"""
@@ -1,5 +1,11 @@
 import re
 
+from helper.message_patterns import TRX_ID_PATTERNS
+from helper.pattern_stats import TRX_ID_CASCADE
+
+_TRX_ID_PATTERNS_BY_NAME = {candidate.name: candidate for candidate in TRX_ID_PATTERNS}
+
+
 def extract_amount_and_currency(text: str):
     # Pattern 1: Khmer payment notification format (e.g., "ចំនួន 11,500 រៀល")
     khmer_amount = extract_khmer_money_amount(text)
@@ -315,60 +321,21 @@ def extract_shifts_with_breakdown(text: str) -> list[dict]:
 
     return shifts
 
-def extract_trx_id(message_text: str) -> str | None:
-    # Pattern 1: Traditional format "Trx. ID: 123456"
-    match = re.search(r'Trx\. ID:\s*([0-9]+)', message_text)
-    if match:
-        return match.group(1)
-    
-    # Pattern 2: Hash format "(Hash. abc123def)" or "(Hash. abc123def" (missing closing parenthesis)
-    match = re.search(r'\(Hash\.\s*([a-f0-9]+)\)?', message_text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-    
-    # Pattern 3: Khmer format "លេខយោង [reference_number]"
-    match = re.search(r'លេខយោង\s+([0-9]+)', message_text)
-    if match:
-        return match.group(1)
-    
-    # Pattern 4: Khmer transaction format "លេខប្រតិបត្តិការ: 123456"
-    match = re.search(r'លេខប្រតិបត្តិការ:\s*([0-9]+)', message_text)
-    if match:
-        return match.group(1)
-    
-    # Pattern 5: Advanced Bank of Asia "Txn Hash: abc123def"
-    match = re.search(r'Txn Hash:\s*([a-f0-9]+)', message_text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-    
-    # Pattern 6: QRPay "Transaction Hash: XXXXXXXX" format
-    match = re.search(r'Transaction Hash:\s*([a-f0-9]+)', message_text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-    
-    # Pattern 7: Reference ID format "Ref.ID: 123456"
-    match = re.search(r'Ref\.ID:\s*([0-9]+)', message_text)
-    if match:
-        return match.group(1)
-    
-    # Pattern 8: Transaction ID format "Transaction ID: 099QORT252080682"
-    match = re.search(r'Transaction ID:\s*([a-zA-Z0-9]+)', message_text)
-    if match:
-        return match.group(1)
-    
-    # Pattern 9: Reference No format "Reference No: 737407541"
-    match = re.search(r'Reference No:\s*([0-9]+)', message_text)
-    if match:
-        return match.group(1)
-    
-    # Pattern 10: Hash format "Hash: 2e720fc0"
-    match = re.search(r'Hash:\s*([a-f0-9]+)', message_text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-
-    # Pattern 11: Hash ID format "Hash ID #865ecfef"
-    match = re.search(r'Hash ID #([a-f0-9]+)', message_text, re.IGNORECASE)
-    if match:
-        return match.group(1)
+def extract_trx_id(message_text: str, folded: str | None = None) -> str | None:
+    """First transaction id found by TRX_ID_PATTERNS, in TRX_ID_CASCADE order.
 
+    ``folded`` is ``message_text.casefold()`` when the caller already has it.
+    """
+    if folded is None:
+        folded = message_text.casefold()
+    tries, hits = TRX_ID_CASCADE.tries, TRX_ID_CASCADE.hits
+    for name in TRX_ID_CASCADE.order:
+        candidate = _TRX_ID_PATTERNS_BY_NAME[name]
+        if not candidate.admits(folded):
+            continue
+        tries[name] += 1
+        match = candidate.pattern.search(message_text)
+        if match:
+            hits[name] += 1
+            return match.group(1)
     return None
@@ -4,46 +4,103 @@ Optimized message parser with bot-specific routing.
 This module provides optimized parsing by routing messages to bot-specific parsers,
 reducing unnecessary regex pattern attempts from 17 to 1-3 per message.
 
-Returns: Tuple of (currency, amount, transaction_time, paid_by, paid_by_name)
+parse_payment returns a ParsedPayment with every field extracted in one
+call; extract_amount_currency_and_time keeps the tuple API:
+(currency, amount, transaction_time, paid_by, paid_by_name)
 - currency: str (e.g., '$', '៛')
 - amount: float or int
 - transaction_time: datetime object or None
 - paid_by: str (last 3 digits of account number) or None
 - paid_by_name: str (payer name) or None
+
+parse_many parses a list of (text, bot_username) pairs, optionally spread
+over a process pool, for backfills and re-parsing historical messages.
 """
 
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import Tuple, Optional
-
-from helper.bot_parsers import (
-    parse_acleda, parse_aba, parse_plb, parse_canadia,
-    parse_hlb, parse_vattanac, parse_cpbank, parse_sathapana,
-    parse_chipmong, parse_prasac, parse_amk, parse_prince,
-    parse_ccu, parse_s7pos, parse_s7days, parse_payment_bk,
-    parse_universal
-)
-from helper.bot_parsers_registry import get_parser_name
-
-# Parser function lookup table
-PARSER_FUNCTIONS = {
-    "parse_acleda": parse_acleda,
-    "parse_aba": parse_aba,
-    "parse_plb": parse_plb,
-    "parse_canadia": parse_canadia,
-    "parse_hlb": parse_hlb,
-    "parse_vattanac": parse_vattanac,
-    "parse_cpbank": parse_cpbank,
-    "parse_sathapana": parse_sathapana,
-    "parse_chipmong": parse_chipmong,
-    "parse_prasac": parse_prasac,
-    "parse_amk": parse_amk,
-    "parse_prince": parse_prince,
-    "parse_ccu": parse_ccu,
-    "parse_s7pos": parse_s7pos,
-    "parse_s7days": parse_s7days,
-    "parse_payment_bk": parse_payment_bk,
-    "parse_universal": parse_universal,
-}
+from typing import Iterable, Optional, Sequence, Tuple
+
+from helper.bot_parsers import PARSER_FUNCTIONS, parse_universal
+from helper.bot_parsers_registry import BOT_PARSERS, get_parser_name
+from helper.parsed_payment import ParsedPayment
+
+# Bot username -> its compiled parser, so routing is a single dict lookup
+BOT_PARSER_FUNCTIONS = {bot: PARSER_FUNCTIONS[parser_name] for bot, parser_name in BOT_PARSERS.items()}
+
+
+def parse_payment(text: str, bot_username: str | None = None) -> Optional[ParsedPayment]:
+    """
+    Parse a payment message with the bot's dedicated parser.
+
+    Args:
+        text: Payment message text
+        bot_username: Username of the bot that sent the message
+
+    Returns:
+        ParsedPayment with amount, currency, transaction time, trx_id and
+        payer, or None if the message has no amount
+    """
+    parser_func = BOT_PARSER_FUNCTIONS.get(bot_username, parse_universal) if bot_username else parse_universal
+    return parser_func(text, text.casefold())
+
+# Batches smaller than this are parsed in-process even when a pool is given
+PARSE_MANY_POOL_MIN_MESSAGES = 2000
+# Messages per task sent to a pool worker
+PARSE_MANY_POOL_CHUNK = 500
+
+
+def _parse_group(parser_name: str, texts: Sequence[str]) -> list[Optional[ParsedPayment]]:
+    """Parse messages of one bot with its parser (also run in pool workers)"""
+    parser_func = PARSER_FUNCTIONS.get(parser_name, parse_universal)
+    return [parser_func(text, text.casefold()) if text else None for text in texts]
+
+
+def parse_many(
+    messages: Iterable[Tuple[str, str | None]],
+    executor: Executor | None = None,
+    min_messages: int | None = None,
+    task_size: int | None = None,
+) -> list[Optional[ParsedPayment]]:
+    """
+    Parse many (text, bot_username) pairs at once.
+
+    Messages are grouped by parser so each parser is resolved once per
+    batch. When a process pool is given and the batch has at least
+    ``min_messages`` (default PARSE_MANY_POOL_MIN_MESSAGES) messages, the
+    groups are split into tasks of up to ``task_size`` (default
+    PARSE_MANY_POOL_CHUNK) messages and parsed in the pool's workers.
+
+    Returns:
+        ParsedPayment or None for each message, in input order
+    """
+    groups: dict[str, tuple[list[int], list[str]]] = {}
+    count = 0
+    for index, (text, bot_username) in enumerate(messages):
+        indexes, texts = groups.setdefault(get_parser_name(bot_username), ([], []))
+        indexes.append(index)
+        texts.append(text)
+        count += 1
+
+    results: list[Optional[ParsedPayment]] = [None] * count
+    if min_messages is None:
+        min_messages = PARSE_MANY_POOL_MIN_MESSAGES
+    if executor is None or count < min_messages:
+        for parser_name, (indexes, texts) in groups.items():
+            for index, payment in zip(indexes, _parse_group(parser_name, texts)):
+                results[index] = payment
+        return results
+
+    task_size = max(1, task_size or PARSE_MANY_POOL_CHUNK)
+    futures = []
+    for parser_name, (indexes, texts) in groups.items():
+        for start in range(0, len(texts), task_size):
+            end = start + task_size
+            futures.append((indexes[start:end], executor.submit(_parse_group, parser_name, texts[start:end])))
+    for indexes, future in futures:
+        for index, payment in zip(indexes, future.result()):
+            results[index] = payment
+    return results
 
 
 def extract_amount_currency_and_time(
@@ -70,16 +127,12 @@ def extract_amount_currency_and_time(
         >>> text = "$28.00 paid by HORN SAMIV (*708) on Nov 09, 03:02 AM..."
         >>> currency, amount, trx_time, paid_by, paid_by_name = extract_amount_currency_and_time(text, "PayWayByABA_bot")
         >>> print(currency, amount, trx_time, paid_by, paid_by_name)
-        $ 28.0 2025-11-09 03:02:00+07:00 708 HORN SAMIV
+        $ 28 2025-11-09 03:02:00+07:00 708 HORN SAMIV
     """
-    # Get the parser function name for this bot
-    parser_name = get_parser_name(bot_username)
-
-    # Get the actual parser function
-    parser_func = PARSER_FUNCTIONS.get(parser_name, parse_universal)
-
-    # Call the bot-specific parser
-    return parser_func(text)
+    payment = parse_payment(text, bot_username)
+    if payment is None:
+        return None, None, None, None, None
+    return payment.as_tuple()
 
 
 # Convenience function for backward compatibility
@@ -4,6 +4,27 @@ Compiled once at module import for performance
 """
 
 import re
+from typing import NamedTuple, Optional
+
+
+class PrefilteredPattern(NamedTuple):
+    """
+    A pattern that can only match when one of ``literals`` occurs in the
+    message. Literals are casefolded and checked against the casefolded
+    text, so the regex only runs on messages that could contain it.
+    """
+    name: str
+    literals: tuple[str, ...]
+    pattern: re.Pattern
+
+    def admits(self, folded: str) -> bool:
+        for literal in self.literals:
+            if literal in folded:
+                return True
+        return False
+
+    def search(self, text: str, folded: str) -> Optional[re.Match]:
+        return self.pattern.search(text) if self.admits(folded) else None
 
 # ========================================
 # Amount & Currency Patterns
@@ -19,6 +40,16 @@ AMOUNT_BEFORE_CODE = re.compile(r'([\d,]+(?:\.\d+)?)\s+(USD|KHR)', re.IGNORECASE
 CODE_BEFORE_AMOUNT = re.compile(r'(USD|KHR)\s+([\d,]+(?:\.\d+)?)', re.IGNORECASE)
 AMOUNT_WITH_LABEL = re.compile(r'Amount:\s+(USD|KHR)\s+([\d,]+(?:\.\d+)?)', re.IGNORECASE)
 
+# parse_universal's priority order
+UNIVERSAL_AMOUNT_PATTERNS = (
+    PrefilteredPattern('khmer_dollar', ('ដុល្លារ',), KHMER_DOLLAR_PATTERN),
+    PrefilteredPattern('khmer_riel', ('រៀល',), KHMER_RIEL_PATTERN),
+    PrefilteredPattern('symbol_before', ('$', '៛'), CURRENCY_SYMBOL_BEFORE),
+    PrefilteredPattern('amount_before_code', ('usd', 'khr'), AMOUNT_BEFORE_CODE),
+    PrefilteredPattern('code_before_amount', ('usd', 'khr'), CODE_BEFORE_AMOUNT),
+    PrefilteredPattern('amount_with_label', ('amount:',), AMOUNT_WITH_LABEL),
+)
+
 # Special format patterns
 S7POS_FINAL_AMOUNT = re.compile(r'សរុបចុងក្រោយ:\s*([\d,]+(?:\.\d+)?)\s*\$')
 S7DAYS_USD_VALUES = re.compile(r'[=:]\s*([\d]+(?:\.\d+)?)\s*\$')
@@ -70,18 +101,32 @@ CCU_IS_PAID_BY = re.compile(r'([\d,]+(?:\.\d+)?)\s+(USD|KHR)\s+is\s+paid\s+by',
 # Transaction ID Patterns
 # ========================================
 
-TRX_PATTERNS = {
-    'trx_id': re.compile(r'Trx\.\s*ID:\s*([0-9]+)'),
-    'hash_paren': re.compile(r'\(Hash\.\s*([a-f0-9]+)\)?', re.IGNORECASE),
-    'khmer_ref': re.compile(r'លេខយោង\s+([0-9]+)'),
-    'khmer_transaction': re.compile(r'លេខប្រតិបត្តិការ:\s*([0-9]+)'),
-    'txn_hash': re.compile(r'Txn\s+Hash:\s*([a-f0-9]+)', re.IGNORECASE),
-    'transaction_hash': re.compile(r'Transaction\s+Hash:\s*([a-f0-9]+)', re.IGNORECASE),
-    'ref_id': re.compile(r'Ref\.ID:\s*([0-9]+)'),
-    'transaction_id': re.compile(r'Transaction\s+ID:\s*([a-zA-Z0-9]+)'),
-    'reference_no': re.compile(r'Reference\s+No:\s*([0-9]+)'),
-    'hash': re.compile(r'Hash:\s*([a-f0-9]+)', re.IGNORECASE),
-}
+# Tried in order by extract_trx_id; the first match wins
+
+TRX_ID_PATTERNS = (
+    # Traditional format "Trx. ID: 123456"
+    PrefilteredPattern('trx_id', ('trx. id:',), re.compile(r'Trx\. ID:\s*([0-9]+)')),
+    # "(Hash. abc123def)" or "(Hash. abc123def" (missing closing parenthesis)
+    PrefilteredPattern('hash_paren', ('(hash.',), re.compile(r'\(Hash\.\s*([a-f0-9]+)\)?', re.IGNORECASE)),
+    # Khmer format "លេខយោង [reference_number]"
+    PrefilteredPattern('khmer_ref', ('លេខយោង',), re.compile(r'លេខយោង\s+([0-9]+)')),
+    # Khmer transaction format "លេខប្រតិបត្តិការ: 123456"
+    PrefilteredPattern('khmer_transaction', ('លេខប្រតិបត្តិការ:',), re.compile(r'លេខប្រតិបត្តិការ:\s*([0-9]+)')),
+    # Advanced Bank of Asia "Txn Hash: abc123def"
+    PrefilteredPattern('txn_hash', ('txn hash:',), re.compile(r'Txn Hash:\s*([a-f0-9]+)', re.IGNORECASE)),
+    # QRPay "Transaction Hash: XXXXXXXX"
+    PrefilteredPattern('transaction_hash', ('transaction hash:',), re.compile(r'Transaction Hash:\s*([a-f0-9]+)', re.IGNORECASE)),
+    # "Ref.ID: 123456"
+    PrefilteredPattern('ref_id', ('ref.id:',), re.compile(r'Ref\.ID:\s*([0-9]+)')),
+    # "Transaction ID: 099QORT252080682"
+    PrefilteredPattern('transaction_id', ('transaction id:',), re.compile(r'Transaction ID:\s*([a-zA-Z0-9]+)')),
+    # "Reference No: 737407541"
+    PrefilteredPattern('reference_no', ('reference no:',), re.compile(r'Reference No:\s*([0-9]+)')),
+    # "Hash: 2e720fc0"
+    PrefilteredPattern('hash', ('hash:',), re.compile(r'Hash:\s*([a-f0-9]+)', re.IGNORECASE)),
+    # "Hash ID #865ecfef"
+    PrefilteredPattern('hash_id', ('hash id #',), re.compile(r'Hash ID #([a-f0-9]+)', re.IGNORECASE)),
+)
 
 # Currency code mapping
 CURRENCY_MAP = {
@@ -164,6 +209,24 @@ TIME_PATTERNS = {
     'khmer_datetime': re.compile(r'ថ្ងៃទី.*?(\d{1,2}):(\d{2})(AM|PM|ព្រឹក|ល្ងាច)?', re.IGNORECASE),
 }
 
+# Separator each TIME_PATTERNS entry needs; a pattern is skipped when the
+# message has none of them
+TIME_PATTERN_SEPARATORS = {
+    'datetime_iso': ('-',),
+    'datetime_slash': ('/',),
+    'time_dots': ('.',),
+    'datetime_at': ('@',),
+    'datetime_month_name_short': ('-',),
+    'datetime_comma': (',',),
+    'datetime_slash_12h': ('/',),
+    'datetime_month_name_nospace': ('-',),
+    'datetime_dmy_slash_12h': ('/',),
+    'datetime_dmy_dash_12h': ('-',),
+    'datetime_dmy_dash_12h_nosec': ('-',),
+    'datetime_iso_dots_12h': ('-',),
+    'datetime_full_month_12h': ('-',),
+}
+
 # Month name to number mapping
 MONTH_MAP = {
     'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
@@ -0,0 +1,220 @@
+"""
+In-process metrics for the ingest pipeline.
+
+Histograms and counters are kept in memory, rendered in the Prometheus text
+format by a tiny HTTP endpoint (``METRICS_PORT``) and summarised in the logs
+every ``METRICS_LOG_SECONDS``. Observations may come from DB worker threads,
+so updates are guarded by a lock.
+
+Ingest stage histograms: ingest_sender_resolution_seconds,
+ingest_parse_seconds (the single ParsedPayment pass, which includes the trx
+id extraction), ingest_duplicate_check_seconds, ingest_insert_seconds,
+ingest_batch_write_seconds, ingest_revenue_source_insert_seconds,
+ingest_threshold_check_seconds and ingest_end_to_end_lag_seconds.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from helper.logger_utils import force_log
+
+# Seconds; covers in-memory stages (sub-millisecond) up to delayed deliveries
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples for percentiles"""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+                 window: int = 2048):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            index = bisect_left(self.buckets, value)
+            if index < len(self.bucket_counts):
+                self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self._recent.append(value)
+
+    def percentile(self, q: float) -> float | None:
+        """Percentile (0-100) over the recent window, None when empty"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        rank = max(0, math.ceil(q / 100 * len(samples)) - 1)
+        return samples[rank]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            counts = list(self.bucket_counts)
+            total, value_sum = self.count, self.sum
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f"{self.name}_sum {value_sum}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.value}",
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, Counter] = {}
+        self.gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+        self.collectors: list[Callable[[], list[str]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str = "") -> Histogram:
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(name, help_text or name)
+            return self.histograms[name]
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        with self._lock:
+            if name not in self.counters:
+                self.counters[name] = Counter(name, help_text or name)
+            return self.counters[name]
+
+    def gauge(self, name: str, read: Callable[[], float], help_text: str = "") -> None:
+        """Register a gauge whose value is read when metrics are rendered"""
+        self.gauges[name] = (help_text or name, read)
+
+    def collector(self, render: Callable[[], list[str]]) -> None:
+        """Register a callable returning extra metric lines in the text format"""
+        if render not in self.collectors:
+            self.collectors.append(render)
+
+    def observe(self, name: str, seconds: float) -> None:
+        self.histogram(name).observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in histogram ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for histogram in list(self.histograms.values()):
+            lines.extend(histogram.render())
+        for counter in list(self.counters.values()):
+            lines.extend(counter.render())
+        for name, (help_text, read) in list(self.gauges.items()):
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"])
+        for render in list(self.collectors):
+            try:
+                lines.extend(render())
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One line per histogram with count and p50/p95/p99 in milliseconds"""
+        parts = []
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            p50, p95, p99 = (histogram.percentile(q) for q in (50, 95, 99))
+            parts.append(
+                f"{name}: n={histogram.count} p50={p50 * 1000:.1f}ms "
+                f"p95={p95 * 1000:.1f}ms p99={p99 * 1000:.1f}ms"
+            )
+        for name, counter in sorted(self.counters.items()):
+            parts.append(f"{name}={counter.value}")
+        return "; ".join(parts)
+
+
+metrics = MetricsRegistry()
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Drain headers
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        path = request_line.split()[1].decode() if len(request_line.split()) > 1 else "/"
+        if path.startswith("/metrics"):
+            status, body = "200 OK", metrics.render()
+        else:
+            status, body = "404 Not Found", "not found\n"
+        payload = body.encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+    except Exception as e:
+        force_log(f"Error serving metrics: {e}", "Metrics", "WARN")
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port: int | None = None, host: str = "127.0.0.1") -> asyncio.AbstractServer | None:
+    """Serve /metrics on ``port`` (``METRICS_PORT``); disabled when unset"""
+    port = port if port is not None else int(os.getenv("METRICS_PORT", "0") or 0)
+    if not port:
+        return None
+    server = await asyncio.start_server(_handle_scrape, host, port)
+    force_log(f"Metrics endpoint listening on http://{host}:{port}/metrics", "Metrics")
+    return server
+
+
+async def run_metrics_log_summary(interval: float | None = None) -> None:
+    """Log a summary of every histogram periodically until cancelled"""
+    interval = interval if interval is not None else float(os.getenv("METRICS_LOG_SECONDS", "300"))
+    while True:
+        await asyncio.sleep(interval)
+        summary = metrics.summary()
+        if summary:
+            force_log(f"Ingest metrics: {summary}", "Metrics")
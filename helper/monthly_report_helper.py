@@ -3,23 +3,23 @@ from datetime import datetime
 from .daily_report_helper import get_khmer_month_name
 
 
-def monthly_transaction_report(incomes, start_date: datetime, end_date: datetime, group_name: str = None) -> str:
-    """Generate monthly transaction report in format similar to weekly report"""
+def monthly_transaction_report(daily_totals, start_date: datetime, end_date: datetime, group_name: str = None) -> str:
+    """Generate monthly transaction report in format similar to weekly report from per-day IncomeTotal records"""
     from datetime import date
 
     # Group transactions by date
     daily_data = {}
     transaction_times = []
     
-    for income in incomes:
-        income_date = income.income_date.date()
+    for total in daily_totals:
+        income_date = total.day
         if income_date not in daily_data:
             daily_data[income_date] = {"KHR": 0, "USD": 0, "count": 0}
         
-        currency = income.currency
-        daily_data[income_date][currency] += income.amount
-        daily_data[income_date]["count"] += 1
-        transaction_times.append(income.income_date)
+        currency = total.currency
+        daily_data[income_date][currency] += total.amount
+        daily_data[income_date]["count"] += total.count
+        transaction_times.extend([total.first_income, total.last_income])
     
     # Calculate totals
     total_khr = sum(day_data["KHR"] for day_data in daily_data.values())
@@ -0,0 +1,94 @@
+"""
+Parsed payment record shared by every ingest path.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Tuple
+
+from .dateutils import DateUtils
+
+# Amounts are kept in hundredths of the currency unit (cents / 0.01 riel)
+MINOR_UNITS = 100
+
+
+def to_minor_units(amount: str | float | Decimal) -> int:
+    """Convert "1,250.50" (or a number) to minor units: 125050"""
+    if isinstance(amount, str):
+        amount = amount.replace(',', '')
+    value = Decimal(str(amount)) * MINOR_UNITS
+    return int(value.to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(amount_minor: int) -> int | float:
+    """Minor units back to currency units; an int when there is no fractional part"""
+    whole, fraction = divmod(amount_minor, MINOR_UNITS)
+    return whole if not fraction else amount_minor / MINOR_UNITS
+
+
+def stored_time(trx_time: datetime, reference: datetime | None) -> datetime:
+    """
+    Parsed transaction time as stored in income_date (naive local time).
+
+    Messages that print no year are parsed into the current year; a time
+    more than a day after ``reference`` (when the message was sent or
+    stored, naive local time) is moved back a year at a time.
+    """
+    local = trx_time.astimezone(DateUtils.get_timezone()).replace(tzinfo=None) if trx_time.tzinfo else trx_time
+    if reference is not None:
+        while local > reference + timedelta(days=1):
+            local = local.replace(year=local.year - 1)
+    return local
+
+
+class ParsedPayment:
+    """
+    A bank message parsed once by the bot's parser: amount, currency,
+    transaction time and id, payer and (for summaries) revenue breakdown.
+    """
+
+    __slots__ = (
+        "currency",
+        "amount_minor",
+        "trx_time",
+        "trx_id",
+        "paid_by",
+        "paid_by_name",
+        "breakdown",
+        "parser",
+    )
+
+    def __init__(
+        self,
+        currency: str,
+        amount_minor: int,
+        trx_time: Optional[datetime] = None,
+        trx_id: Optional[str] = None,
+        paid_by: Optional[str] = None,
+        paid_by_name: Optional[str] = None,
+        breakdown: Optional[dict[str, float]] = None,
+        parser: Optional[str] = None,
+    ):
+        self.currency = currency
+        self.amount_minor = amount_minor
+        self.trx_time = trx_time
+        self.trx_id = trx_id
+        self.paid_by = paid_by
+        self.paid_by_name = paid_by_name
+        self.breakdown = breakdown
+        self.parser = parser
+
+    @property
+    def amount(self) -> int | float:
+        """Amount in currency units; an int when there is no fractional part"""
+        return from_minor_units(self.amount_minor)
+
+    def as_tuple(self) -> Tuple[str, int | float, Optional[datetime], Optional[str], Optional[str]]:
+        """The (currency, amount, transaction_time, paid_by, paid_by_name) tuple of the old parser API"""
+        return self.currency, self.amount, self.trx_time, self.paid_by, self.paid_by_name
+
+    def __repr__(self) -> str:
+        return (
+            f"ParsedPayment(currency={self.currency!r}, amount={self.amount}, trx_time={self.trx_time}, "
+            f"trx_id={self.trx_id!r}, paid_by={self.paid_by!r}, parser={self.parser!r})"
+        )
@@ -0,0 +1,189 @@
+"""
+Declarative bank parser definitions.
+
+Each ParserSpec describes how one bank's messages are read: the amount
+pattern and which groups hold the amount and currency, the timestamp
+format(s), optional trx id and payer patterns, and the bot usernames that
+send them. bot_parsers compiles every spec into one matcher function at
+import time, and the bot-to-parser routing and the allow-lists of the
+Telethon listener, the verification scheduler and the business bot's
+forward handler are all derived from PARSER_SPECS.
+
+Adding a bank is one ParserSpec entry (plus its amount regex in
+message_patterns). Messages are routed by username with a dict lookup, so a
+new bank adds no work to other banks' messages.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from helper.message_parser import extract_s7days_breakdown
+from helper.message_patterns import (
+    ACLEDA_RECEIVED, ABA_SYMBOL_START, PLB_CREDITED, CANADIA_PAID,
+    HLB_IS_PAID, VATTANAC_IS_PAID, CPBANK_RECEIVED, SATHAPANA_AMOUNT,
+    CHIPMONG_IS_PAID, PRASAC_PAYMENT_AMOUNT, AMK_BOLD_AMOUNT, PRINCE_AMOUNT_BOLD,
+    CCU_IS_PAID_BY, S7POS_FINAL_AMOUNT, S7DAYS_USD_VALUES,
+    PAID_BY_PATTERN, PAID_BY_NAME_PATTERN,
+)
+
+# Where a bank bot's messages are accepted
+LISTENER = "listener"          # Telethon listener (and the offline backfill)
+VERIFICATION = "verification"  # MessageVerificationScheduler's re-scan of missed messages
+FORWARD = "forward"            # Messages forwarded to the business bot
+ALL_CHANNELS: frozenset[str] = frozenset({LISTENER, VERIFICATION, FORWARD})
+
+# Currency token captured by an amount pattern (upper-cased) -> symbol
+CURRENCY_SYMBOLS: dict[str, str] = {
+    'USD': '$',
+    'KHR': '៛',
+    'ដុល្លារ': '$',
+    'រៀល': '៛',
+    '$': '$',
+    '៛': '៛',
+}
+
+
+@dataclass(frozen=True)
+class ParserSpec:
+    """How to read one bank's payment messages"""
+
+    # Parser name, e.g. "parse_aba"; recorded on every ParsedPayment
+    name: str
+    # Bot usernames routed to this parser and accepted on ``channels``
+    bots: tuple[str, ...]
+    # Bank-specific amount pattern; None sends every message to parse_universal
+    amount: Optional[re.Pattern] = None
+    amount_group: int = 1
+    # Group holding the currency token (see CURRENCY_SYMBOLS), or None when
+    # every message is in ``currency``
+    currency_group: Optional[int] = 2
+    currency: Optional[str] = None
+    # Add up every amount match (daily summaries) instead of taking the first
+    sum_amounts: bool = False
+    # TIME_PATTERNS keys of the timestamp format(s) the bank prints
+    time_formats: tuple[str, ...] = ()
+    # Tried before the generic TRX_ID_PATTERNS cascade; group 1 is the id
+    trx_id: Optional[re.Pattern] = None
+    # Last account digits and payer name; None skips the field
+    payer: Optional[re.Pattern] = PAID_BY_PATTERN
+    payer_name: Optional[re.Pattern] = PAID_BY_NAME_PATTERN
+    # Per-source revenue breakdown of summary messages
+    breakdown: Optional[Callable[[str], dict]] = None
+    # Use parse_universal when the amount pattern does not match
+    fallback: bool = True
+    channels: frozenset[str] = ALL_CHANNELS
+    # Extra usernames routed to this parser but not accepted on any channel
+    aliases: tuple[str, ...] = ()
+
+
+PARSER_SPECS: tuple[ParserSpec, ...] = (
+    # Khmer banks
+    ParserSpec(
+        "parse_acleda", ("ACLEDABankBot",),
+        # "Received X.XX USD" or "បានទទួល X.XX ដុល្លារ"
+        amount=ACLEDA_RECEIVED,
+        time_formats=("datetime_month_name_nospace",),  # 11-Oct-2025 10:12AM
+    ),
+    ParserSpec(
+        "parse_aba", ("PayWayByABA_bot",),
+        # "៛X,XXX paid" or "$X.XX paid" (symbol at start of line)
+        amount=ABA_SYMBOL_START, amount_group=2, currency_group=1,
+        time_formats=("datetime_comma",),  # Oct 11, 10:21 AM
+    ),
+    ParserSpec(
+        "parse_plb", ("PLBITBot",),
+        # "X,XXX KHR was credited"
+        amount=PLB_CREDITED,
+        time_formats=("datetime_iso",),  # 2025-10-11 10:21:33
+    ),
+    ParserSpec(
+        "parse_canadia", ("CanadiaMerchant_bot",),
+        # "X.XX USD was paid"
+        amount=CANADIA_PAID,
+        time_formats=("datetime_month_name",),  # 11 OCT 2025 at 10:08:53
+    ),
+    ParserSpec(
+        "parse_hlb", ("HLBCAM_Bot",),
+        # "KHR X,XXX.XX is paid"
+        amount=HLB_IS_PAID, amount_group=2, currency_group=1,
+        time_formats=("datetime_at",),  # 11-Oct-2025 @10:23:23
+    ),
+    ParserSpec(
+        "parse_vattanac", ("vattanac_bank_merchant_prod_bot",),
+        # "USD X.XX is paid by"
+        amount=VATTANAC_IS_PAID, amount_group=2, currency_group=1,
+        time_formats=("datetime_dmy_slash_12h",),  # 04/10/2025 09:32 PM
+    ),
+    ParserSpec(
+        "parse_cpbank", ("CPBankBot",),
+        # "received KHR X,XXX" or "amount USD X.XX"
+        amount=CPBANK_RECEIVED, amount_group=2, currency_group=1,
+        time_formats=("datetime_dmy_dash_12h", "datetime_dmy_dash_12h_nosec"),  # 11-10-2025 10:52:51 AM
+    ),
+    ParserSpec(
+        "parse_sathapana", ("SathapanaBank_bot",),
+        # "The amount X.XX USD"
+        amount=SATHAPANA_AMOUNT,
+        time_formats=("datetime_iso_dots_12h",),  # 2025-10-04 08.58.45 AM
+    ),
+    ParserSpec(
+        "parse_chipmong", ("chipmongbankpaymentbot",),
+        # "KHR X,XXX is paid"
+        amount=CHIPMONG_IS_PAID, amount_group=2, currency_group=1,
+        time_formats=("datetime_comma",),  # Oct 11, 2025 11:28 AM
+    ),
+    ParserSpec(
+        "parse_prasac", ("prasac_merchant_payment_bot",),
+        # "Payment Amount X.XX USD"
+        amount=PRASAC_PAYMENT_AMOUNT,
+        time_formats=("datetime_month_name_short",),  # 11-Oct-25 09:43.44 AM
+    ),
+    ParserSpec(
+        "parse_amk", ("AMKPlc_bot",),
+        # "**KHR X,XXX**"
+        amount=AMK_BOLD_AMOUNT, amount_group=2, currency_group=1,
+        time_formats=("datetime_dmy_dash_12h_nosec",),  # 15-09-2025 04:17 PM
+    ),
+    ParserSpec(
+        "parse_prince", ("prince_pay_bot",),
+        # "Amount: **USD X.XX**"
+        amount=PRINCE_AMOUNT_BOLD, amount_group=2, currency_group=1,
+        time_formats=("datetime_slash_12h",),  # 2025/09/26, 10:07 pm
+    ),
+    ParserSpec(
+        "parse_ccu", ("CCUBank_bot",),
+        # "X.XX USD is paid by" or "X,XXX KHR is paid by"
+        amount=CCU_IS_PAID_BY,
+        time_formats=("datetime_full_month_12h",),  # 31-October-2025, 08:35PM
+        aliases=("ccu_bank_bot",),  # kept for parser tests
+    ),
+
+    # Special format bots
+    ParserSpec(
+        "parse_s7pos", ("s7pos_bot",),
+        # "សរុបចុងក្រោយ: X.XX $"
+        amount=S7POS_FINAL_AMOUNT, currency_group=None, currency='$',
+        time_formats=("datetime_iso",),
+        fallback=False,
+    ),
+    ParserSpec(
+        "parse_s7days", ("S7days777",),
+        # Daily summary: total of every "=X.XX$" line
+        amount=S7DAYS_USD_VALUES, currency_group=None, currency='$', sum_amounts=True,
+        time_formats=("time_dots",),
+        breakdown=extract_s7days_breakdown,
+        fallback=False,
+        channels=frozenset(),
+    ),
+    ParserSpec(
+        # No specific pattern yet, every message goes to parse_universal
+        "parse_payment_bk", ("payment_bk_bot",),
+        channels=frozenset({LISTENER}),
+    ),
+)
+
+
+def bots_for_channel(channel: str) -> frozenset[str]:
+    """Bot usernames accepted on ``channel``"""
+    return frozenset(bot for spec in PARSER_SPECS if channel in spec.channels for bot in spec.bots)
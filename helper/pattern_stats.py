@@ -0,0 +1,230 @@
+"""
+Hit statistics and adaptive ordering for the fallback pattern cascades.
+
+parse_universal's amount and time cascades and extract_trx_id try their
+patterns in order until one matches. Every regex attempt is counted per
+pattern (``tries``/``hits``), rendered on the metrics endpoint and saved in
+the ordering snapshot.
+
+Patterns are grouped into tiers; tiers always run in their declared order
+and only the patterns within a tier may be reordered. A tier of several
+patterns is only safe when no message can match two of them with different
+values. That holds for none of the current cascades: amounts, trx id labels
+and timestamps can all occur several times in one message ("paid on Oct 11,
+10:21 AM. Settled 12/10/2025 11:05 PM"), so every pattern is its own tier
+and keeps its priority order. With ``PARSER_ADAPTIVE_ORDER=1`` each tier is
+periodically re-sorted by hits (ties keep the declared order) and the order
+is saved to ``PARSER_ORDER_SNAPSHOT``, which is loaded again on the next
+start; with single-pattern tiers the parse results never depend on it.
+
+Counters are updated without a lock from the event loop and DB worker
+threads; a lost increment only nudges the ordering.
+
+Inspect a saved snapshot with:
+    python -m helper.pattern_stats [snapshot path]
+"""
+
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytz
+
+from helper.logger_utils import force_log
+from helper.message_patterns import TRX_ID_PATTERNS, UNIVERSAL_AMOUNT_PATTERNS
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_PATH = "parser_order_snapshot.json"
+
+
+class PatternCascade:
+    """Named patterns tried in order until one matches, with hit counters"""
+
+    def __init__(self, name: str, tiers: tuple[tuple[str, ...], ...]):
+        self.name = name
+        self.tiers = tiers
+        self.canonical = tuple(pattern for tier in tiers for pattern in tier)
+        self.tries = dict.fromkeys(self.canonical, 0)
+        self.hits = dict.fromkeys(self.canonical, 0)
+        # Read by the parsers on every call; replaced, never mutated
+        self.order = self.canonical
+
+    def reorder(self) -> tuple[str, ...]:
+        """Sort each tier by hits, most first; ties keep the declared order"""
+        order = []
+        for tier in self.tiers:
+            order.extend(sorted(tier, key=lambda pattern: -self.hits[pattern]))
+        self.order = tuple(order)
+        return self.order
+
+    def apply_order(self, order: list[str] | tuple[str, ...]) -> bool:
+        """Use ``order`` if it only moves patterns within their tier"""
+        order = tuple(order)
+        position = 0
+        for tier in self.tiers:
+            if set(order[position:position + len(tier)]) != set(tier):
+                return False
+            position += len(tier)
+        if position != len(order):
+            return False
+        self.order = order
+        return True
+
+    def reset(self) -> None:
+        self.tries = dict.fromkeys(self.canonical, 0)
+        self.hits = dict.fromkeys(self.canonical, 0)
+        self.order = self.canonical
+
+    def snapshot(self) -> dict:
+        return {"order": list(self.order), "tries": dict(self.tries), "hits": dict(self.hits)}
+
+    def restore(self, data: dict) -> bool:
+        """Load counters and order from a snapshot entry; False if the order no longer fits"""
+        for counts, saved in ((self.tries, data.get("tries", {})), (self.hits, data.get("hits", {}))):
+            for pattern, count in saved.items():
+                if pattern in counts:
+                    counts[pattern] = int(count)
+        return self.apply_order(data.get("order", self.canonical))
+
+
+# Each amount pattern has its own tier: one message can match several of
+# them with different amounts, so their priority order is kept
+UNIVERSAL_AMOUNT_CASCADE = PatternCascade(
+    "universal_amount",
+    tuple((candidate.name,) for candidate in UNIVERSAL_AMOUNT_PATTERNS),
+)
+
+# A message can carry two timestamps in different formats (a payment time
+# and a settlement time), and the first format in this order decides which
+# one is stored, so the time patterns are only counted, never reordered.
+# The looser date + 24h and time-only formats also match some of the 12h
+# ones and must run after them.
+UNIVERSAL_TIME_CASCADE = PatternCascade(
+    "universal_time",
+    tuple(
+        (name,)
+        for name in (
+            'datetime_iso_dots_12h',
+            'datetime_dmy_dash_12h',
+            'datetime_dmy_dash_12h_nosec',
+            'datetime_dmy_slash_12h',
+            'datetime_month_name_nospace',
+            'datetime_at',
+            'datetime_month_name',
+            'datetime_month_name_short',
+            'datetime_comma',
+            'datetime_full_month_12h',
+            'datetime_slash_12h',
+            'datetime_iso',
+            'datetime_slash',
+            'time_dots',
+        )
+    ),
+)
+
+# A message can carry several id labels ("Ref.ID: 555 Trx. ID: 42"), so the
+# trx id patterns are only counted, never reordered
+TRX_ID_CASCADE = PatternCascade(
+    "trx_id",
+    tuple((candidate.name,) for candidate in TRX_ID_PATTERNS),
+)
+
+CASCADES: dict[str, PatternCascade] = {
+    cascade.name: cascade
+    for cascade in (UNIVERSAL_AMOUNT_CASCADE, UNIVERSAL_TIME_CASCADE, TRX_ID_CASCADE)
+}
+
+
+def adaptive_order_enabled() -> bool:
+    return os.getenv("PARSER_ADAPTIVE_ORDER", "0") == "1"
+
+
+def snapshot_path() -> str:
+    return os.getenv("PARSER_ORDER_SNAPSHOT") or DEFAULT_SNAPSHOT_PATH
+
+
+def save_snapshot(path: str) -> None:
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": datetime.now(pytz.UTC).isoformat(),
+        "cascades": {name: cascade.snapshot() for name, cascade in CASCADES.items()},
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str) -> bool:
+    """Restore counters and orders saved by save_snapshot; False if there is none"""
+    if not os.path.exists(path):
+        return False
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != SNAPSHOT_VERSION:
+        force_log(f"Ignoring pattern order snapshot {path} of version {data.get('version')}", "PatternStats", "WARN")
+        return False
+    for name, entry in data.get("cascades", {}).items():
+        cascade = CASCADES.get(name)
+        if cascade and not cascade.restore(entry):
+            force_log(f"Saved order for {name} no longer matches its tiers; using the declared order",
+                      "PatternStats", "WARN")
+    return True
+
+
+def render_metrics() -> list[str]:
+    """Per-pattern counters in the Prometheus text format"""
+    lines = []
+    for metric, attribute, help_text in (
+        ("parser_pattern_tries_total", "tries", "Fallback pattern regex attempts"),
+        ("parser_pattern_hits_total", "hits", "Fallback pattern matches"),
+    ):
+        lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"])
+        for cascade in CASCADES.values():
+            for pattern, count in getattr(cascade, attribute).items():
+                lines.append(f'{metric}{{cascade="{cascade.name}",pattern="{pattern}"}} {count}')
+    return lines
+
+
+async def run_adaptive_ordering(interval: float | None = None, path: str | None = None) -> None:
+    """
+    Load the saved order, then re-sort the cascades by hits and save the
+    snapshot every ``PARSER_REORDER_SECONDS`` until cancelled.
+    """
+    interval = interval if interval is not None else float(os.getenv("PARSER_REORDER_SECONDS", "3600"))
+    path = path or snapshot_path()
+    try:
+        if load_snapshot(path):
+            force_log(f"Loaded pattern order snapshot {path}", "PatternStats")
+    except (OSError, ValueError) as e:
+        force_log(f"Could not load pattern order snapshot {path}: {e}", "PatternStats", "WARN")
+
+    while True:
+        await asyncio.sleep(interval)
+        for cascade in CASCADES.values():
+            previous = cascade.order
+            if cascade.reorder() != previous:
+                force_log(f"Reordered {cascade.name} patterns: {', '.join(cascade.order)}", "PatternStats")
+        try:
+            save_snapshot(path)
+        except OSError as e:
+            force_log(f"Could not save pattern order snapshot {path}: {e}", "PatternStats", "WARN")
+
+
+def print_snapshot(path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    print(f"Snapshot saved at {data.get('saved_at')}")
+    for name, entry in data.get("cascades", {}).items():
+        print(f"\n{name}")
+        print(f"  {'pattern':<32} {'tries':>10} {'hits':>10} {'hit rate':>9}")
+        for pattern in entry["order"]:
+            tries, hits = entry["tries"].get(pattern, 0), entry["hits"].get(pattern, 0)
+            rate = f"{hits / tries:.0%}" if tries else "-"
+            print(f"  {pattern:<32} {tries:>10} {hits:>10} {rate:>9}")
+
+
+if __name__ == "__main__":
+    print_snapshot(sys.argv[1] if len(sys.argv) > 1 else snapshot_path())
@@ -1,16 +1,17 @@
 from common.enums import CurrencyEnum
 
 
-def total_summary_report(incomes, summary_title: str) -> str:
+def total_summary_report(currency_totals, summary_title: str) -> str:
+    """Summary of per-currency IncomeTotal records (see IncomeAggregateService)"""
     totals = {currency.name: 0 for currency in CurrencyEnum}
     transaction_counts = {"KHR": 0, "USD": 0}
 
-    for income in incomes:
-        if income.currency in totals:
-            transaction_counts[income.currency] += 1
-            totals[income.currency] += income.amount
+    for total in currency_totals:
+        if total.currency in totals:
+            transaction_counts[total.currency] += total.count
+            totals[total.currency] += total.amount
         else:
-            totals[income.currency] = income.amount
+            totals[total.currency] = total.amount
 
     message = f"{summary_title}:\n\n"
     for currency in CurrencyEnum:
@@ -0,0 +1,282 @@
+"""
+Offline backfill of bank bot messages.
+
+Re-ingests message dumps collected while a Telethon account was down. The
+input is JSON Lines, one message per line:
+
+    {"chat_id": -1001234567890, "message_id": 4521, "sender_username": "PayWayByABA_bot",
+     "date": "2025-11-09T03:02:11+00:00", "text": "$28.00 paid by ..."}
+
+Messages go through the same parsing and registration checks as the live
+listener (IncomeMessageProcessor) and are written chunk by chunk with
+write_income_batch: one existence check and one multi-row insert per chunk.
+After every committed chunk the line number is saved to a checkpoint file,
+so a rerun resumes where the previous one stopped. Threshold warnings are
+not sent for backfilled incomes.
+
+Each chunk is parsed with parse_many; --workers N splits every chunk
+across N parser processes, which helps when re-parsing large dumps after
+a parser fix.
+
+Usage:
+    python main_backfill.py dump.jsonl [--chunk-size 500] [--checkpoint path] [--dry-run] [--workers N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+from typing import Iterator
+
+import pytz
+
+from config import load_environment
+
+load_environment()
+
+import helper  # noqa: E402,F401  (initialises helper before models)
+from common.enums import CurrencyEnum  # noqa: E402
+from config import get_db_session  # noqa: E402
+from helper import DateUtils  # noqa: E402
+from helper.bot_parsers_registry import LISTENER_ALLOWED_BOTS  # noqa: E402
+from helper.message_parser_optimized import parse_many  # noqa: E402
+from helper.parsed_payment import stored_time  # noqa: E402
+from models import Chat, Shift  # noqa: E402
+from services.income_batch_writer import PendingIncome, write_income_batch  # noqa: E402
+from services.income_message_processor import registration_cutoff  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("backfill")
+
+
+class BackfillStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.invalid = 0
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"read={self.read} inserted={self.inserted} duplicates={self.duplicates} "
+            f"skipped={self.skipped} invalid={self.invalid} ({self.rate:.0f} msgs/sec)"
+        )
+
+
+def load_checkpoint(path: str, input_path: str) -> int:
+    """Number of input lines already committed by a previous run"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("input") != os.path.abspath(input_path):
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint.get('input')}, not {input_path}")
+    return int(checkpoint["line"])
+
+
+def save_checkpoint(path: str, input_path: str, line: int) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"input": os.path.abspath(input_path), "line": line, "saved_at": datetime.now(pytz.UTC).isoformat()},
+            f,
+        )
+    os.replace(tmp_path, path)
+
+
+def read_chunks(input_path: str, start_line: int, chunk_size: int) -> Iterator[tuple[int, list[str]]]:
+    """Yield (line number after the chunk, raw lines) starting after ``start_line``"""
+    with open(input_path, encoding="utf-8") as f:
+        lines = islice(f, start_line, None)
+        line = start_line
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                return
+            line += len(chunk)
+            yield line, chunk
+
+
+def parse_record(raw: str) -> tuple[int, int, str, datetime, str] | None:
+    record = json.loads(raw)
+    message_time = datetime.fromisoformat(record["date"])
+    if message_time.tzinfo is None:
+        message_time = pytz.UTC.localize(message_time)
+    return (
+        int(record["chat_id"]),
+        int(record["message_id"]),
+        record.get("sender_username") or "",
+        message_time.astimezone(pytz.UTC),
+        record.get("text") or "",
+    )
+
+
+def load_chats(db, chat_ids: set[int]) -> dict[int, tuple[datetime, bool]]:
+    """chat_id -> (created_at, enable_shift) for registered chats in the chunk"""
+    rows = db.query(Chat.chat_id, Chat.created_at, Chat.enable_shift).filter(Chat.chat_id.in_(chat_ids))
+    return {int(chat_id): (created_at, bool(enable_shift)) for chat_id, created_at, enable_shift in rows}
+
+
+def load_shifts(db, chat_ids: set[int], start: datetime, end: datetime) -> dict[int, list[tuple[datetime, datetime | None, int]]]:
+    """Shifts overlapping [start, end] (local naive times) per chat, oldest first"""
+    shifts: dict[int, list[tuple[datetime, datetime | None, int]]] = {}
+    if not chat_ids:
+        return shifts
+    rows = (
+        db.query(Shift.chat_id, Shift.start_time, Shift.end_time, Shift.id)
+        .filter(
+            Shift.chat_id.in_(chat_ids),
+            Shift.start_time <= end,
+            (Shift.end_time.is_(None)) | (Shift.end_time >= start),
+        )
+        .order_by(Shift.start_time)
+    )
+    for chat_id, shift_start, shift_end, shift_id in rows:
+        shifts.setdefault(int(chat_id), []).append((shift_start, shift_end, shift_id))
+    return shifts
+
+
+def shift_for(shifts: list[tuple[datetime, datetime | None, int]], local_time: datetime) -> int | None:
+    """The shift that was open at ``local_time``"""
+    for shift_start, shift_end, shift_id in reversed(shifts):
+        if shift_start <= local_time and (shift_end is None or local_time < shift_end):
+            return shift_id
+    return None
+
+
+def process_chunk(db, lines: list[str], stats: BackfillStats, dry_run: bool,
+                  executor: Executor | None = None, workers: int = 1) -> None:
+    records = []
+    for raw in lines:
+        stats.read += 1
+        if not raw.strip():
+            continue
+        try:
+            records.append(parse_record(raw))
+        except (ValueError, KeyError, TypeError) as e:
+            stats.invalid += 1
+            logger.warning(f"Invalid backfill line skipped: {e}")
+
+    chats = load_chats(db, {record[0] for record in records})
+
+    eligible = []
+    for record in records:
+        chat_id, _, username, message_time, text = record
+        chat = chats.get(chat_id)
+        if (
+            chat is None
+            or username not in LISTENER_ALLOWED_BOTS
+            or not text
+            or message_time < registration_cutoff(chat[0])
+        ):
+            stats.skipped += 1
+            continue
+        eligible.append(record)
+
+    # The pool parses every chunk, split into one task per worker
+    payments = parse_many(
+        ((record[4], record[2]) for record in eligible), executor, min_messages=1,
+        task_size=-(-len(eligible) // workers),
+    )
+
+    candidates = []
+    for (chat_id, message_id, username, message_time, text), payment in zip(eligible, payments):
+        if payment is None or not payment.amount_minor:
+            stats.skipped += 1
+            continue
+        local_time = message_time.astimezone(DateUtils.get_timezone()).replace(tzinfo=None)
+        candidates.append((chat_id, message_id, username, local_time, text, payment))
+
+    if not candidates:
+        return
+
+    shift_chats = {c[0] for c in candidates if chats[c[0]][1]}
+    local_times = [c[3] for c in candidates]
+    shifts = load_shifts(db, shift_chats, min(local_times), max(local_times))
+
+    items = []
+    for chat_id, message_id, username, local_time, text, payment in candidates:
+        items.append(
+            PendingIncome(
+                chat_id=chat_id,
+                amount=payment.amount,
+                amount_minor=payment.amount_minor,
+                currency=CurrencyEnum.from_symbol(payment.currency) or payment.currency,
+                original_amount=payment.amount,
+                message_id=message_id,
+                message=text,
+                trx_id=payment.trx_id,
+                # Historical messages fall back to their send time, not "now";
+                # year-less times are placed in the year the message was sent
+                income_date=stored_time(payment.trx_time, local_time) if payment.trx_time else local_time,
+                shift_id=shift_for(shifts.get(chat_id, []), local_time) if chat_id in shift_chats else None,
+                sent_by=username,
+                paid_by=payment.paid_by,
+                paid_by_name=payment.paid_by_name,
+            )
+        )
+
+    if dry_run:
+        stats.inserted += len(items)
+        return
+
+    # Shifts were matched to the message time; closed ones are expected here
+    results = write_income_batch(db, items, reassign_closed_shifts=False)
+    inserted = sum(1 for income_id in results if income_id is not None)
+    stats.inserted += inserted
+    stats.duplicates += len(results) - inserted
+
+
+def run(input_path: str, chunk_size: int, checkpoint_path: str, dry_run: bool, workers: int = 1) -> BackfillStats:
+    start_line = 0 if dry_run else load_checkpoint(checkpoint_path, input_path)
+    if start_line:
+        logger.info(f"Resuming {input_path} after line {start_line}")
+
+    stats = BackfillStats()
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+        for line, lines in read_chunks(input_path, start_line, chunk_size):
+            with get_db_session() as db:
+                process_chunk(db, lines, stats, dry_run, executor, workers)
+            if not dry_run:
+                save_checkpoint(checkpoint_path, input_path, line)
+            logger.info(f"Line {line}: {stats}")
+
+    logger.info(f"Backfill finished: {stats}")
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill bank bot messages from a JSONL dump")
+    parser.add_argument("input", help="JSONL file with chat_id, message_id, sender_username, date, text")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Messages per transaction (default 500)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <input>.checkpoint)")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and report without writing")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parser processes per chunk (default 1: parse in-process)")
+    args = parser.parse_args(argv)
+
+    run(args.input, args.chunk_size, args.checkpoint or f"{args.input}.checkpoint", args.dry_run, args.workers)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nBackfill interrupted; rerun the same command to resume from the checkpoint")
+        sys.exit(1)
@@ -0,0 +1,116 @@
+"""
+Recompute income_rollups from income_balance.
+
+The income writers keep the rollups current; this command recomputes them
+for a date range after incomes were changed outside those writers (manual
+SQL fixes, restores) or to check them. Each chat's range is rebuilt in
+windows of --days-per-transaction days, one short transaction per window
+(delete the window's rollups, then one INSERT ... SELECT ... GROUP BY).
+
+A window is exact when no income is written into it while it is rebuilt, so
+prefer ranges that end before today; rerunning the same command is safe.
+
+Usage:
+    python main_rebuild_rollups.py [--chat-id ID] [--start 2025-10-01] [--end 2025-10-31]
+                                   [--days-per-transaction 31]
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+
+from config import load_environment
+
+load_environment()
+
+import helper  # noqa: E402,F401  (initialises helper before models)
+from config import get_db_session  # noqa: E402
+from models import IncomeBalance, IncomeRollup  # noqa: E402
+from services.income_rollups import rebuild_rollups  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("rebuild_rollups")
+
+
+def _as_date(value) -> Optional[date]:
+    # SQLite returns DATE() as text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def chat_day_ranges(db, chat_id: Optional[int]) -> dict[int, tuple[date, date]]:
+    """First and last day with incomes or rollups of each chat (or of ``chat_id``)"""
+    ranges: dict[int, tuple[date, date]] = {}
+    for chat_column, day_column, model in (
+        (IncomeBalance.chat_id, func.date(IncomeBalance.income_date), IncomeBalance),
+        (IncomeRollup.chat_id, IncomeRollup.local_date, IncomeRollup),
+    ):
+        query = db.query(chat_column, func.min(day_column), func.max(day_column)).group_by(chat_column)
+        if chat_id is not None:
+            query = query.filter(chat_column == chat_id)
+        for chat, first_day, last_day in query:
+            first_day, last_day = _as_date(first_day), _as_date(last_day)
+            if chat in ranges:
+                first_day = min(first_day, ranges[chat][0])
+                last_day = max(last_day, ranges[chat][1])
+            ranges[chat] = (first_day, last_day)
+    return ranges
+
+
+def run(
+    chat_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    days_per_transaction: int = 31,
+) -> int:
+    """Rebuild the rollups of ``start`` to ``end`` (inclusive); returns the windows rebuilt"""
+    with get_db_session() as db:
+        ranges = chat_day_ranges(db, chat_id)
+
+    windows = 0
+    for chat, (first_day, last_day) in sorted(ranges.items()):
+        first_day = max(first_day, start) if start else first_day
+        last_day = min(last_day, end) if end else last_day
+        window_start = first_day
+        while window_start <= last_day:
+            window_end = min(window_start + timedelta(days=days_per_transaction - 1), last_day)
+            with get_db_session() as db:
+                rebuild_rollups(db, chat, window_start, window_end)
+                db.commit()
+            windows += 1
+            window_start = window_end + timedelta(days=1)
+        if first_day <= last_day:
+            logger.info(f"Rebuilt rollups of chat {chat} from {first_day} to {last_day}")
+
+    logger.info(f"Rollup rebuild finished: {len(ranges)} chats, {windows} windows")
+    return windows
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Recompute income_rollups from income_balance")
+    parser.add_argument("--chat-id", type=int, help="Only this chat (default: every chat)")
+    parser.add_argument("--start", type=_parse_date, help="First day, YYYY-MM-DD (default: the chat's first income)")
+    parser.add_argument("--end", type=_parse_date, help="Last day, YYYY-MM-DD (default: the chat's last income)")
+    parser.add_argument("--days-per-transaction", type=int, default=31,
+                        help="Days rebuilt per transaction (default 31)")
+    args = parser.parse_args(argv)
+
+    run(args.chat_id, args.start, args.end, args.days_per_transaction)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nRebuild interrupted; rerun the same command to rebuild the remaining days")
+        sys.exit(1)
@@ -0,0 +1,267 @@
+"""
+Re-parse stored incomes with the current parsers and fix rows that differ.
+
+After a parser fix, rows already in income_balance keep the amount, time or
+payer the old parser produced. This job walks income_balance in primary-key
+order, one short transaction per chunk (``WHERE id > last_id ORDER BY id
+LIMIT n``), re-parses each chunk's messages with parse_many and writes the
+rows whose parsed fields changed as one bulk UPDATE by primary key. No
+transaction or cursor stays open between chunks, so the listener keeps
+inserting while it runs.
+
+Only rows sent by a bot with a dedicated parser are checked; rows the
+current parser cannot read are counted and left alone. A parsed field only
+replaces a stored one when the parser found a value, and revenue_sources
+breakdowns are not rewritten. The income_rollups of every day a changed row
+moves from or to are recomputed in the chunk's transaction.
+
+Every differing row is appended to the report as one JSON line:
+
+    {"id": 812, "chat_id": -100123, "message_id": 4521, "sent_by": "PayWayByABA_bot",
+     "changes": {"amount": [28.0, 280.0], "original_amount": [28.0, 280.0]}}
+
+Without --apply nothing is written (a dry run). With --apply the last
+committed id is saved to a checkpoint file after every chunk, so a rerun
+resumes where the previous one stopped.
+
+Usage:
+    python main_reconcile.py [--apply] [--sender PayWayByABA_bot] [--chat-id ID]
+                             [--chunk-size 1000] [--start-id 0] [--checkpoint path]
+                             [--report reconcile_report.jsonl] [--workers N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Optional, TextIO
+
+import pytz
+from sqlalchemy import update
+
+from config import load_environment
+
+load_environment()
+
+import helper  # noqa: E402,F401  (initialises helper before models)
+from common.enums import CurrencyEnum  # noqa: E402
+from config import get_db_session  # noqa: E402
+from helper.bot_parsers_registry import BOT_PARSERS  # noqa: E402
+from helper.message_parser_optimized import parse_many  # noqa: E402
+from helper.parsed_payment import ParsedPayment, stored_time, to_minor_units  # noqa: E402
+from models import IncomeBalance  # noqa: E402
+from services.income_rollups import rebuild_days  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("reconcile")
+
+# Changed fields that move an income to another rollup or change its sum
+ROLLUP_FIELDS = {"amount", "currency", "income_date", "paid_by"}
+
+DEFAULT_CHECKPOINT = "reconcile.checkpoint"
+DEFAULT_REPORT = "reconcile_report.jsonl"
+
+# Columns read per row; the message text is the only wide one
+_COLUMNS = (
+    IncomeBalance.id,
+    IncomeBalance.chat_id,
+    IncomeBalance.message_id,
+    IncomeBalance.sent_by,
+    IncomeBalance.message,
+    IncomeBalance.amount,
+    IncomeBalance.amount_minor,
+    IncomeBalance.original_amount,
+    IncomeBalance.currency,
+    IncomeBalance.income_date,
+    IncomeBalance.trx_id,
+    IncomeBalance.paid_by,
+    IncomeBalance.paid_by_name,
+    IncomeBalance.created_at,
+)
+
+
+class ReconcileStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.scanned = 0
+        self.changed = 0
+        self.unparsed = 0
+        self.last_id = 0
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.scanned / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"last_id={self.last_id} scanned={self.scanned} changed={self.changed} "
+            f"unparsed={self.unparsed} ({self.rate:.0f} rows/sec)"
+        )
+
+
+def load_checkpoint(path: str) -> int:
+    """Last income id committed by a previous --apply run"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return int(json.load(f)["last_id"])
+
+
+def save_checkpoint(path: str, last_id: int) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"last_id": last_id, "saved_at": datetime.now(pytz.UTC).isoformat()}, f)
+    os.replace(tmp_path, path)
+
+
+def diff_row(row, payment: ParsedPayment) -> dict[str, list]:
+    """Stored vs parsed values of the fields the parser found that differ"""
+    changes = {}
+    if row.amount_minor != payment.amount_minor:
+        changes["amount"] = [row.amount, payment.amount]
+    if to_minor_units(row.original_amount) != payment.amount_minor:
+        changes["original_amount"] = [row.original_amount, payment.amount]
+
+    currency = CurrencyEnum.from_symbol(payment.currency) or payment.currency
+    if row.currency != currency:
+        changes["currency"] = [row.currency, currency]
+
+    if payment.trx_time is not None:
+        income_date = stored_time(payment.trx_time, row.created_at)
+        if row.income_date != income_date:
+            changes["income_date"] = [row.income_date, income_date]
+
+    for field in ("trx_id", "paid_by", "paid_by_name"):
+        value = getattr(payment, field)
+        if value is not None and getattr(row, field) != value:
+            changes[field] = [getattr(row, field), value]
+    return changes
+
+
+def fetch_chunk(db, after_id: int, chunk_size: int, sender: Optional[str], chat_id: Optional[int]) -> list:
+    query = db.query(*_COLUMNS).filter(IncomeBalance.id > after_id)
+    if sender:
+        query = query.filter(IncomeBalance.sent_by == sender)
+    else:
+        query = query.filter(IncomeBalance.sent_by.in_(list(BOT_PARSERS)))
+    if chat_id is not None:
+        query = query.filter(IncomeBalance.chat_id == chat_id)
+    return query.order_by(IncomeBalance.id).limit(chunk_size).all()
+
+
+def process_chunk(db, rows: list, stats: ReconcileStats, report: TextIO, apply: bool,
+                  executor: Executor | None = None, workers: int = 1) -> None:
+    # The pool parses every chunk, split into one task per worker
+    payments = parse_many(
+        ((row.message, row.sent_by) for row in rows), executor, min_messages=1, task_size=-(-len(rows) // workers)
+    )
+
+    updates = []
+    # (chat_id, day) of every changed row, before and after, whose rollups are recomputed
+    rollup_days = set()
+    for row, payment in zip(rows, payments):
+        stats.scanned += 1
+        if payment is None or not payment.amount_minor:
+            stats.unparsed += 1
+            continue
+        changes = diff_row(row, payment)
+        if not changes:
+            continue
+        stats.changed += 1
+        update_row = {"id": row.id, **{field: new for field, (_, new) in changes.items()}}
+        if "amount" in changes:
+            update_row["amount_minor"] = payment.amount_minor
+        updates.append(update_row)
+        if changes.keys() & ROLLUP_FIELDS:
+            rollup_days.add((row.chat_id, row.income_date.date()))
+            if "income_date" in changes:
+                rollup_days.add((row.chat_id, changes["income_date"][1].date()))
+        report.write(json.dumps(
+            {
+                "id": row.id,
+                "chat_id": row.chat_id,
+                "message_id": row.message_id,
+                "sent_by": row.sent_by,
+                "changes": changes,
+            },
+            default=str,
+            ensure_ascii=False,
+        ) + "\n")
+
+    if apply and updates:
+        # Bulk UPDATE by primary key: one statement per set of changed columns
+        db.execute(update(IncomeBalance), updates)
+        rebuild_days(db, rollup_days)
+        db.commit()
+
+
+def run(
+    chunk_size: int,
+    apply: bool,
+    report_path: str,
+    checkpoint_path: str,
+    start_id: int = 0,
+    sender: Optional[str] = None,
+    chat_id: Optional[int] = None,
+    workers: int = 1,
+) -> ReconcileStats:
+    last_id = max(start_id, load_checkpoint(checkpoint_path) if apply else 0)
+    if last_id:
+        logger.info(f"Starting after income id {last_id}")
+
+    stats = ReconcileStats()
+    stats.last_id = last_id
+    with (
+        open(report_path, "a", encoding="utf-8") as report,
+        ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor,
+    ):
+        while True:
+            with get_db_session() as db:
+                rows = fetch_chunk(db, stats.last_id, chunk_size, sender, chat_id)
+                if not rows:
+                    break
+                process_chunk(db, rows, stats, report, apply, executor, workers)
+            stats.last_id = rows[-1].id
+            report.flush()
+            if apply:
+                save_checkpoint(checkpoint_path, stats.last_id)
+            logger.info(str(stats))
+
+    logger.info(f"Reconcile finished{'' if apply else ' (dry run, nothing written)'}: {stats}")
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-parse stored incomes and fix rows the current parsers read differently")
+    parser.add_argument("--apply", action="store_true", help="Write the changes (default: report only)")
+    parser.add_argument("--sender", help="Only rows sent by this bot username")
+    parser.add_argument("--chat-id", type=int, help="Only rows of this chat")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction (default 1000)")
+    parser.add_argument("--start-id", type=int, default=0, help="Start after this income id")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                        help=f"Checkpoint file for --apply runs (default {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--report", default=DEFAULT_REPORT,
+                        help=f"JSONL diff report, appended to (default {DEFAULT_REPORT})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parser processes per chunk (default 1: parse in-process)")
+    args = parser.parse_args(argv)
+
+    run(args.chunk_size, args.apply, args.report, args.checkpoint, args.start_id,
+        args.sender, args.chat_id, args.workers)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nReconcile interrupted; rerun the same command to resume from the checkpoint")
+        sys.exit(1)
@@ -5,6 +5,11 @@ from typing import Set
 
 from config import load_environment
 from helper.credential_loader import CredentialLoader
+from helper.metrics import metrics, run_metrics_log_summary, start_metrics_server
+from helper.pattern_stats import adaptive_order_enabled, render_metrics as render_pattern_metrics, run_adaptive_ordering
+from services.chat_cache import get_chat_cache
+from services.ingest_dispatcher import get_ingest_dispatcher
+from services.recent_transaction_index import get_recent_transaction_index
 from services.telethon_client_service import TelethonClientService
 
 load_environment()
@@ -52,6 +57,39 @@ async def shutdown(loop: asyncio.AbstractEventLoop) -> None:
     loop.stop()
 
 
+async def warm_recent_transaction_index() -> None:
+    try:
+        await get_recent_transaction_index().warm()
+    except Exception as e:
+        logger.error(f"Failed to warm recent transaction index: {e}")
+
+
+async def start_ingest_metrics() -> None:
+    """Expose ingest metrics on METRICS_PORT and summarise them in the logs"""
+    metrics.gauge("ingest_queue_depth", lambda: get_ingest_dispatcher().depth, "Queued ingest jobs")
+    metrics.gauge("chat_cache_hits", lambda: get_chat_cache().hits, "Chat cache hits")
+    metrics.gauge("chat_cache_misses", lambda: get_chat_cache().misses, "Chat cache misses")
+    metrics.gauge("dedup_index_hits", lambda: get_recent_transaction_index().hits, "Duplicate index hits")
+    metrics.gauge("dedup_index_misses", lambda: get_recent_transaction_index().misses,
+                  "Duplicate index authoritative misses")
+    metrics.gauge("dedup_index_unknown", lambda: get_recent_transaction_index().unknown,
+                  "Duplicate index lookups that fell back to the database")
+    metrics.collector(render_pattern_metrics)
+    try:
+        await start_metrics_server()
+    except OSError as e:
+        logger.error(f"Could not start metrics endpoint: {e}")
+    task = asyncio.create_task(run_metrics_log_summary())
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+
+    if adaptive_order_enabled():
+        # Re-sorts the universal parser's time formats by observed hits
+        order_task = asyncio.create_task(run_adaptive_ordering())
+        tasks.add(order_task)
+        order_task.add_done_callback(tasks.discard)
+
+
 async def main(loader: CredentialLoader) -> None:
     """
     Main function for telethon client only
@@ -109,6 +147,14 @@ async def main(loader: CredentialLoader) -> None:
         if not phone_configs:
             raise ValueError("No phone number configurations found")
 
+        await start_ingest_metrics()
+
+        # Warm the duplicate index in the background; lookups fall back to
+        # the database until it is ready
+        warm_task = asyncio.create_task(warm_recent_transaction_index())
+        tasks.add(warm_task)
+        warm_task.add_done_callback(tasks.discard)
+
         # Start telethon clients for all configured phone numbers
         service_tasks = []
         
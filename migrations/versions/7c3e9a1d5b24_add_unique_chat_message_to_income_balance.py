@@ -0,0 +1,44 @@
+"""add unique chat_id message_id to income_balance
+
+Revision ID: 7c3e9a1d5b24
+Revises: 69276201ccf9
+Create Date: 2026-10-16 09:12:44.318205+07:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9a1d5b24'
+down_revision: Union[str, Sequence[str], None] = '69276201ccf9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every Telethon process relies on this key for idempotent income inserts,
+    # so refuse to continue while duplicates are still present
+    duplicates = op.get_bind().execute(sa.text(
+        'SELECT chat_id, message_id, COUNT(*) FROM income_balance '
+        'GROUP BY chat_id, message_id HAVING COUNT(*) > 1 LIMIT 20'
+    )).fetchall()
+    if duplicates:
+        sample = ', '.join(f'({row[0]}, {row[1]}) x{row[2]}' for row in duplicates)
+        raise RuntimeError(
+            'income_balance has duplicate (chat_id, message_id) rows; '
+            f'remove them before upgrading. First duplicates: {sample}'
+        )
+
+    op.create_unique_constraint(
+        'uq_income_chat_message',
+        'income_balance',
+        ['chat_id', 'message_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_income_chat_message', 'income_balance', type_='unique')
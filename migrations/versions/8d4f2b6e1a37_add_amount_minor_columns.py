@@ -0,0 +1,48 @@
+"""add exact amount_minor columns to income_balance and revenue_sources
+
+Revision ID: 8d4f2b6e1a37
+Revises: 7c3e9a1d5b24
+Create Date: 2026-10-16 14:05:21.604117+07:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2b6e1a37'
+down_revision: Union[str, Sequence[str], None] = '7c3e9a1d5b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows updated per backfill statement, so no single UPDATE locks the table for long
+BACKFILL_CHUNK = 50000
+
+
+def _backfill(table: str) -> None:
+    """amount_minor = amount in hundredths, one id range at a time"""
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text(f'SELECT MAX(id) FROM {table}')).scalar() or 0
+    for start in range(0, max_id + 1, BACKFILL_CHUNK):
+        bind.execute(
+            sa.text(
+                f'UPDATE {table} SET amount_minor = ROUND(amount * 100) '
+                'WHERE id >= :start AND id < :stop'
+            ),
+            {'start': start, 'stop': start + BACKFILL_CHUNK},
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('income_balance', 'revenue_sources'):
+        op.add_column(table, sa.Column('amount_minor', sa.BigInteger(), nullable=True))
+        _backfill(table)
+        op.alter_column(table, 'amount_minor', existing_type=sa.BigInteger(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('revenue_sources', 'amount_minor')
+    op.drop_column('income_balance', 'amount_minor')
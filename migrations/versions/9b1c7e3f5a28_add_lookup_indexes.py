@@ -0,0 +1,43 @@
+"""add composite indexes for income and shift lookups
+
+Revision ID: 9b1c7e3f5a28
+Revises: 8d4f2b6e1a37
+Create Date: 2026-10-16 15:32:08.271946+07:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1c7e3f5a28'
+down_revision: Union[str, Sequence[str], None] = '8d4f2b6e1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # get_income_by_trx_id: trx_id = ? AND chat_id = ?
+    op.create_index('idx_income_chat_trx', 'income_balance', ['chat_id', 'trx_id'])
+    # Report date ranges: chat_id = ? AND income_date >= ? AND income_date < ?
+    # (idx_income_chat_date is on DATE(income_date) and cannot serve ranges)
+    op.create_index('idx_income_chat_income_date', 'income_balance', ['chat_id', 'income_date'])
+    # get_income_by_shift_id / get_shift_income_summary
+    op.create_index('idx_income_shift_chat', 'income_balance', ['shift_id', 'chat_id'])
+    # get_current_shift: chat_id = ? AND is_closed = 0 ORDER BY start_time DESC
+    op.create_index('idx_shifts_chat_open_start', 'shifts', ['chat_id', 'is_closed', 'start_time'])
+    # get_shifts_by_date / get_shifts_by_date_range
+    op.create_index('idx_shifts_chat_date', 'shifts', ['chat_id', 'shift_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_shifts_chat_date', 'shifts')
+    op.drop_index('idx_shifts_chat_open_start', 'shifts')
+    # MySQL drops the foreign key's own shift_id index once idx_income_shift_chat
+    # can serve the key, so give the key an index back before dropping it
+    op.create_index('idx_income_shift_id', 'income_balance', ['shift_id'])
+    op.drop_index('idx_income_shift_chat', 'income_balance')
+    op.drop_index('idx_income_chat_income_date', 'income_balance')
+    op.drop_index('idx_income_chat_trx', 'income_balance')
@@ -0,0 +1,67 @@
+"""add income_rollups table of per-day income sums
+
+Revision ID: a3d8f6c2e914
+Revises: 9b1c7e3f5a28
+Create Date: 2026-10-16 17:48:12.935170+07:00
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d8f6c2e914'
+down_revision: Union[str, Sequence[str], None] = '9b1c7e3f5a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _backfill() -> None:
+    """Roll up the existing incomes one chat at a time, so no statement holds locks for long"""
+    bind = op.get_bind()
+    now = datetime.now()
+    chat_ids = [row[0] for row in bind.execute(sa.text('SELECT DISTINCT chat_id FROM income_balance'))]
+    for chat_id in chat_ids:
+        bind.execute(
+            sa.text(
+                'INSERT INTO income_rollups (chat_id, local_date, shift_id, currency, paid_by, amount_minor, '
+                'income_count, first_income, last_income, created_at, updated_at) '
+                'SELECT chat_id, DATE(income_date), COALESCE(shift_id, 0), currency, COALESCE(paid_by, \'\'), '
+                'SUM(amount_minor), COUNT(*), MIN(income_date), MAX(income_date), :now, :now '
+                'FROM income_balance WHERE chat_id = :chat_id '
+                'GROUP BY chat_id, DATE(income_date), COALESCE(shift_id, 0), currency, COALESCE(paid_by, \'\')'
+            ),
+            {'chat_id': chat_id, 'now': now},
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'income_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('local_date', sa.Date(), nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=False),
+        sa.Column('currency', sa.String(length=16), nullable=False),
+        sa.Column('paid_by', sa.String(length=10), nullable=False),
+        sa.Column('amount_minor', sa.BigInteger(), nullable=False),
+        sa.Column('income_count', sa.Integer(), nullable=False),
+        sa.Column('first_income', sa.DateTime(), nullable=False),
+        sa.Column('last_income', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chat_id', 'local_date', 'shift_id', 'currency', 'paid_by',
+                            name='uq_income_rollup_key'),
+    )
+    op.create_index('idx_income_rollup_shift', 'income_rollups', ['shift_id'])
+    _backfill()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_income_rollup_shift', table_name='income_rollups')
+    op.drop_table('income_rollups')
@@ -5,6 +5,7 @@ from models.conversation_tracker_model import BotQuestion
 from models.custom_report_model import CustomReport
 from models.group_package_model import GroupPackage
 from models.income_balance_model import IncomeBalance
+from models.income_rollup_model import IncomeRollup
 from models.revenue_source_model import RevenueSource
 from models.sender_category_model import SenderCategory
 from models.sender_config_model import SenderConfig
@@ -23,6 +24,7 @@ __all__ = [
     "BotQuestion",
     "GroupPackage",
     "IncomeBalance",
+    "IncomeRollup",
     "RevenueSource",
     "CustomReport",
     "SenderCategory",
@@ -13,18 +13,39 @@ from sqlalchemy import (
     BigInteger,
     Text,
     ForeignKey,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from helper import DateUtils
+from helper.parsed_payment import to_minor_units
 from models.base_model import BaseModel
 
 
+def amount_minor_default(context) -> int:
+    """Fill ``amount_minor`` from the ``amount`` being inserted when it is not given"""
+    return to_minor_units(context.get_current_parameters()["amount"])
+
+
 class IncomeBalance(BaseModel):
     __tablename__ = "income_balance"
 
+    __table_args__ = (
+        # Also serves the (chat_id, message_id[, trx_id]) duplicate check
+        UniqueConstraint('chat_id', 'message_id', name='uq_income_chat_message'),
+        Index('idx_income_date', 'income_date'),
+        Index('idx_income_chat_trx', 'chat_id', 'trx_id'),
+        Index('idx_income_chat_income_date', 'chat_id', 'income_date'),
+        Index('idx_income_shift_chat', 'shift_id', 'chat_id'),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
+    # Exact amount in hundredths of the currency unit; sum this for totals
+    amount_minor: Mapped[int] = mapped_column(
+        BigInteger, default=amount_minor_default, nullable=False
+    )
     chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     currency: Mapped[str] = mapped_column(String(16), nullable=False)
     original_amount: Mapped[float] = mapped_column(Float, nullable=False)
@@ -0,0 +1,52 @@
+from datetime import date, datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base_model import BaseModel
+
+
+class IncomeRollup(BaseModel):
+    """
+    Sum and count of a chat's incomes per local day, shift, currency and
+    payer. Kept in step with income_balance by the income writers
+    (services.income_rollups) and rebuilt by main_rebuild_rollups.py.
+    """
+
+    __tablename__ = "income_rollups"
+
+    __table_args__ = (
+        # Upsert key; also serves chat_id = ? AND local_date >= ? AND local_date < ?
+        UniqueConstraint(
+            'chat_id', 'local_date', 'shift_id', 'currency', 'paid_by',
+            name='uq_income_rollup_key',
+        ),
+        Index('idx_income_rollup_shift', 'shift_id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # DATE(income_date); income_date is stored in local time
+    local_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # 0 and '' stand for no shift and no payer, so the unique key covers them
+    shift_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    currency: Mapped[str] = mapped_column(String(16), nullable=False)
+    paid_by: Mapped[str] = mapped_column(String(10), nullable=False, default="")
+    amount_minor: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    income_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    first_income: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_income: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<IncomeRollup(chat_id={self.chat_id}, local_date={self.local_date}, shift_id={self.shift_id}, "
+            f"currency={self.currency}, amount_minor={self.amount_minor}, income_count={self.income_count})>"
+        )
@@ -4,6 +4,7 @@ if typing.TYPE_CHECKING:
     from models.income_balance_model import IncomeBalance
 
 from sqlalchemy import (
+    BigInteger,
     Float,
     String,
     Integer,
@@ -12,6 +13,7 @@ from sqlalchemy import (
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.base_model import BaseModel
+from models.income_balance_model import amount_minor_default
 
 
 class RevenueSource(BaseModel):
@@ -20,10 +22,14 @@ class RevenueSource(BaseModel):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     income_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("income_balance.id"), nullable=False
+        Integer, ForeignKey("income_balance.id"), nullable=False, index=True
     )
     source_name: Mapped[str] = mapped_column(String(50), nullable=False)  # Cash, Bank Card, Ctrip, Agoda, etc.
     amount: Mapped[float] = mapped_column(Float, nullable=False)
+    # Exact amount in hundredths of the currency unit; sum this for totals
+    amount_minor: Mapped[int] = mapped_column(
+        BigInteger, default=amount_minor_default, nullable=False
+    )
     currency: Mapped[str] = mapped_column(String(16), nullable=False, default="USD")
     shift: Mapped[str | None] = mapped_column(String(10), nullable=True)  # Internal shift identifier (e.g., "C", "D")
 
@@ -5,6 +5,7 @@ from sqlalchemy import (
     DateTime,
     Date,
     BigInteger,
+    Index,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,6 +16,12 @@ from models.income_balance_model import IncomeBalance
 class Shift(BaseModel):
     __tablename__ = "shifts"
 
+    __table_args__ = (
+        # Open-shift lookup: chat_id = ? AND is_closed = 0 ORDER BY start_time DESC
+        Index('idx_shifts_chat_open_start', 'chat_id', 'is_closed', 'start_time'),
+        Index('idx_shifts_chat_date', 'chat_id', 'shift_date'),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     shift_date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -181,7 +181,9 @@ class AutoCloseScheduler:
                 incomes = await income_service.get_income_by_date_and_chat_id(
                     chat_id=chat_id,
                     start_date=start_of_day,
-                    end_date=end_of_day
+                    end_date=end_of_day,
+                    slim=True,
+                    with_sources=False,
                 )
 
                 if incomes:
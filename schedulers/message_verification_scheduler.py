@@ -9,12 +9,9 @@ from telethon.errors import FloodWaitError, RPCError
 from telethon.tl.types import Message
 
 from common.enums import ServicePackage
-from helper import (
-    extract_trx_id,
-    extract_s7pos_amount_and_currency,
-)
+from helper.bot_parsers_registry import VERIFICATION_ALLOWED_BOTS
 from helper.logger_utils import force_log
-from helper.message_parser_optimized import extract_amount_currency_and_time
+from helper.message_parser_optimized import parse_payment
 from services import ChatService, IncomeService, ShiftService, GroupPackageService
 
 
@@ -90,8 +87,14 @@ class MessageVerificationScheduler:
 
                     verification_count += len(messages)
 
+                    # One package lookup per chat rather than per message
+                    is_business = False
+                    if messages:
+                        package = await self.group_package_service.get_package_by_chat_id(chat_id)
+                        is_business = bool(package and package.package == ServicePackage.BUSINESS)
+
                     for message in messages:
-                        await self._verify_and_store_message(chat, message)
+                        await self._verify_and_store_message(chat, message, is_business)
                         new_messages_found += 1
 
                     # Rate limiting: Add delay between chats to prevent Telegram API rate limits
@@ -152,24 +155,7 @@ class MessageVerificationScheduler:
                         username = getattr(sender, "username", "")
 
                         # Only process messages from allowed payment bots
-                        allowed_bots = {
-                            "ACLEDABankBot",
-                            "PayWayByABA_bot",
-                            "PLBITBot",
-                            "CanadiaMerchant_bot",
-                            "HLBCAM_Bot",
-                            "vattanac_bank_merchant_prod_bot",
-                            "CPBankBot",
-                            "SathapanaBank_bot",
-                            "chipmongbankpaymentbot",
-                            "prasac_merchant_payment_bot",
-                            "AMKPlc_bot",
-                            "prince_pay_bot",
-                            "s7pos_bot",
-                            "CCUBank_bot"
-                        }
-                        
-                        if username not in allowed_bots:
+                        if username not in VERIFICATION_ALLOWED_BOTS:
                             force_log(f"Message from bot '{username}' not in allowed list, ignoring in scheduler")
                             continue
                             
@@ -212,7 +198,7 @@ class MessageVerificationScheduler:
 
         return messages
 
-    async def _verify_and_store_message(self, chat, message: Message):
+    async def _verify_and_store_message(self, chat, message: Message, is_business: bool = False):
         """Verify if message exists in database, if not then store it"""
         try:
             chat_id = message.chat_id or chat.chat_id
@@ -245,7 +231,7 @@ class MessageVerificationScheduler:
 
             # Check if this message already exists in database (using both chat_id and message_id)
             exists = await self.income_service.get_income_by_chat_and_message_id(
-                chat_id, message_id
+                chat_id, message_id, message_time=message_time
             )
             if exists:
                 force_log(
@@ -253,78 +239,48 @@ class MessageVerificationScheduler:
                 )
                 return
 
-            # Extract currency and amount from message
+            # Parse amount, currency, time, trx_id and payer in one pass
             sender = await message.get_sender()
-            username = getattr(sender, "username", "") if sender else ""
+            username = getattr(sender, "username", "") or ""
 
-            parsed_income_date = None
-            paid_by = None
-            if username == "s7pos_bot":
-                currency, amount = extract_s7pos_amount_and_currency(message_text)
-            else:
-                currency, amount, parsed_income_date, paid_by = extract_amount_currency_and_time(message_text, username)
-            if not (currency and amount):
+            payment = parse_payment(message_text, username)
+            if payment is None or not payment.amount_minor:
                 force_log(
                     f"No valid currency/amount found in message {message_id}, skipping"
                 )
                 return
 
-            # Extract transaction ID
-            trx_id = extract_trx_id(message_text)
-
             force_log(
-                f"Processing new message {message_id}: currency={currency}, amount={amount}, trx_id={trx_id}"
+                f"Processing new message {message_id}: currency={payment.currency}, "
+                f"amount={payment.amount}, trx_id={payment.trx_id}"
             )
 
-            # Check for duplicates using comprehensive check
-            # Not check for now, suppose chat_id + message_id is unique
-            # is_duplicate = await self.income_service.check_duplicate_transaction(
-            #     chat_id, trx_id, message_id
-            # )
-            # if is_duplicate:
-            #     force_log(f"Duplicate transaction found for message {message_id}, skipping")
-            #     return
-
-            # Get sender username
-            sender = await message.get_sender()
-            username = getattr(sender, "username", "") or ""
-            
             # Check if chat has BUSINESS package to get current shift ID
             shift_id_for_income = 0  # Default: no shift or auto-create
             enable_shift_for_income = chat.enable_shift
             
-            package = await self.group_package_service.get_package_by_chat_id(chat_id)
-            if package and package.package == ServicePackage.BUSINESS:
-                # For business packages, get the current shift ID
-                current_shift = await self.shift_service.get_current_shift(chat_id)
-                if current_shift:
-                    shift_id_for_income = current_shift.id
-                    enable_shift_for_income = True
-                    force_log(f"Chat {chat_id} has BUSINESS package, using current shift ID: {shift_id_for_income}")
-                else:
-                    # No current shift exists, create one
-                    new_shift = await self.shift_service.create_shift(chat_id)
-                    shift_id_for_income = new_shift.id
-                    enable_shift_for_income = True
-                    force_log(f"Chat {chat_id} has BUSINESS package, created new shift ID: {shift_id_for_income}")
+            if is_business:
+                # For business packages, use the open shift (registry lookup, created if missing)
+                shift_id_for_income = await self.income_service.ensure_active_shift(chat_id)
+                enable_shift_for_income = True
+                force_log(f"Chat {chat_id} has BUSINESS package, using shift ID: {shift_id_for_income}")
             
             # Store the message as income
             force_log(f"Storing income for message {message_id} with shift_id={shift_id_for_income}, enable_shift={enable_shift_for_income}")
             result = await self.income_service.insert_income(
                 chat_id,
-                amount,
-                currency,
-                amount,  # original_amount
+                payment.amount,
+                payment.currency,
+                payment.amount,  # original_amount
                 message_id,
                 message_text,
-                trx_id,
-                shift_id_for_income,  # actual shift ID
-                enable_shift_for_income,  # enable_shift
-                username,  # sent_by
-                paid_by,  # paid_by
-                None,  # revenue_breakdown
-                None,  # shifts_breakdown
-                parsed_income_date,  # income_date
+                payment.trx_id,
+                shift_id=shift_id_for_income,
+                enable_shift=enable_shift_for_income,
+                sent_by=username,
+                paid_by=payment.paid_by,
+                paid_by_name=payment.paid_by_name,
+                income_date=payment.trx_time,
             )
 
             force_log(
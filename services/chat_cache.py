@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Awaitable, Callable, Optional
+
+from helper.logger_utils import force_log
+from models import Chat
+
+
+class CachedChat:
+    """Read-only snapshot of a ``chat_group`` row"""
+
+    __slots__ = (
+        "id",
+        "chat_id",
+        "group_name",
+        "is_active",
+        "enable_shift",
+        "registered_by",
+        "usd_threshold",
+        "khr_threshold",
+        "user_id",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self, chat: Chat):
+        self.id: int = chat.id
+        self.chat_id: int = chat.chat_id
+        self.group_name: str = chat.group_name
+        self.is_active: bool | None = chat.is_active
+        self.enable_shift: bool | None = chat.enable_shift
+        self.registered_by: str | None = chat.registered_by
+        self.usd_threshold: Decimal | None = chat.usd_threshold
+        self.khr_threshold: Decimal | None = chat.khr_threshold
+        self.user_id: int | None = chat.user_id
+        self.created_at: datetime = chat.created_at
+        self.updated_at: datetime = chat.updated_at
+
+    def __repr__(self) -> str:
+        return f"<CachedChat chat_id={self.chat_id} group_name={self.group_name!r}>"
+
+
+class ChatCache:
+    """
+    Process-wide cache of registered chats keyed by Telegram chat_id.
+
+    Entries expire after ``ttl`` seconds so changes made by other processes
+    (admin bot, schedulers) are picked up; writes in this process invalidate
+    immediately. Unregistered chat_ids are cached for ``negative_ttl`` so
+    messages from unknown groups do not query the database each time.
+    """
+
+    def __init__(self, ttl: float | None = None, negative_ttl: float | None = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("CHAT_CACHE_TTL_SECONDS", "60"))
+        self.negative_ttl = (
+            negative_ttl
+            if negative_ttl is not None
+            else float(os.getenv("CHAT_CACHE_NEGATIVE_TTL_SECONDS", "10"))
+        )
+        # chat_id -> (snapshot or None, expires_at)
+        self._entries: dict[int, tuple[CachedChat | None, float]] = {}
+        # Bumped on invalidation so a load that raced with a write is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self, chat_id: int, loader: Callable[[], Awaitable[Chat | None]]
+    ) -> CachedChat | None:
+        """Return the cached chat, calling ``loader`` on a miss or expiry"""
+        chat_id = int(chat_id)
+        entry = self._entries.get(chat_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        generation = self._generation
+        chat = await loader()
+        snapshot = CachedChat(chat) if chat is not None else None
+
+        if generation == self._generation:
+            ttl = self.ttl if snapshot is not None else self.negative_ttl
+            self._entries[chat_id] = (snapshot, time.monotonic() + ttl)
+        return snapshot
+
+    def invalidate(self, *chat_ids: int) -> None:
+        """Drop the given chats so the next lookup reads the database"""
+        self._generation += 1
+        for chat_id in chat_ids:
+            self._entries.pop(int(chat_id), None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        force_log(
+            f"Chat cache: {stats['entries']} entries, {stats['hits']} hits, "
+            f"{stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)",
+            "ChatCache",
+        )
+
+
+_chat_cache: Optional[ChatCache] = None
+
+
+def get_chat_cache() -> ChatCache:
+    """Get the process-wide chat cache"""
+    global _chat_cache
+    if _chat_cache is None:
+        _chat_cache = ChatCache()
+    return _chat_cache
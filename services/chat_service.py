@@ -1,12 +1,22 @@
-from config import get_db_session
+from sqlalchemy.orm import joinedload
+
+from config import get_db_session, run_in_db_session
 from helper.logger_utils import force_log
 from models import Chat
-from models import User, IncomeBalance
+from models import User, IncomeBalance, IncomeRollup
+from .chat_cache import CachedChat, get_chat_cache
+from .registered_chat_filter import notify_chat_changed
 from .group_package_service import GroupPackageService
 from .income_balance_service import IncomeService
 from .shift_service import ShiftService
 
 
+def _chat_changed(*chat_ids: int) -> None:
+    """Drop cached copies of chats changed in this process"""
+    get_chat_cache().invalidate(*chat_ids)
+    notify_chat_changed(*chat_ids)
+
+
 class ChatService:
     def __init__(self):
         self.income_service = IncomeService()
@@ -25,6 +35,7 @@ class ChatService:
                 )
                 session.add(new_chat)
                 session.commit()
+                _chat_changed(chat_id)
                 return True, f"Chat ID {chat_id} registered successfully."
             except Exception as e:
                 session.rollback()
@@ -55,6 +66,7 @@ class ChatService:
                     {"enable_shift": enable_shift}
                 )
                 session.commit()
+                _chat_changed(chat_id)
                 return True
             except Exception as e:
                 session.rollback()
@@ -71,6 +83,7 @@ class ChatService:
                     {"is_active": status}
                 )
                 session.commit()
+                _chat_changed(chat_id)
                 return True
             except Exception as e:
                 session.rollback()
@@ -87,6 +100,7 @@ class ChatService:
                     {"user_id": user_id}
                 )
                 session.commit()
+                _chat_changed(chat_id)
                 return True
             except Exception as e:
                 session.rollback()
@@ -96,42 +110,43 @@ class ChatService:
                 session.close()
 
     @staticmethod
-    async def get_chat_by_chat_id(chat_id: int) -> Chat | None:
-        with get_db_session() as session:
-            try:
-                chat = (
-                    session.query(Chat)
-                    .filter_by(chat_id=chat_id)
-                    .first()
-                )
-                return chat
-            except Exception as e:
-                force_log(f"Error fetching chat by chat ID: {e}", "ChatService", "ERROR")
-                return None
-            finally:
-                session.close()
+    async def get_chat_by_chat_id(chat_id: int) -> CachedChat | None:
+        """Get a registered chat, served from the process-wide chat cache"""
+        try:
+            return await get_chat_cache().get(
+                chat_id,
+                lambda: run_in_db_session(
+                    lambda session: session.query(Chat).filter_by(chat_id=chat_id).first()
+                ),
+            )
+        except Exception as e:
+            force_log(f"Error fetching chat by chat ID: {e}", "ChatService", "ERROR")
+            return None
+
+    @staticmethod
+    async def get_chat_with_user(chat_id: int) -> Chat | None:
+        """Read a chat and its user from the database, bypassing the chat cache"""
+        try:
+            return await run_in_db_session(
+                lambda session: session.query(Chat)
+                .options(joinedload(Chat.user))
+                .filter_by(chat_id=chat_id)
+                .first()
+            )
+        except Exception as e:
+            force_log(f"Error fetching chat with user by chat ID: {e}", "ChatService", "ERROR")
+            return None
 
     @staticmethod
     async def get_chat_thresholds(chat_id: int) -> dict | None:
         """Get USD and KHR thresholds for a chat"""
-        with get_db_session() as session:
-            try:
-                chat = (
-                    session.query(Chat.usd_threshold, Chat.khr_threshold)
-                    .filter_by(chat_id=chat_id)
-                    .first()
-                )
-                if chat:
-                    return {
-                        "usd_threshold": float(chat.usd_threshold) if chat.usd_threshold is not None else None,
-                        "khr_threshold": float(chat.khr_threshold) if chat.khr_threshold is not None else None
-                    }
-                return None
-            except Exception as e:
-                force_log(f"Error fetching chat thresholds: {e}", "ChatService", "ERROR")
-                return None
-            finally:
-                session.close()
+        chat = await ChatService.get_chat_by_chat_id(chat_id)
+        if chat:
+            return {
+                "usd_threshold": float(chat.usd_threshold) if chat.usd_threshold is not None else None,
+                "khr_threshold": float(chat.khr_threshold) if chat.khr_threshold is not None else None
+            }
+        return None
 
 
     @staticmethod
@@ -145,7 +160,7 @@ class ChatService:
                     # Search by exact chat_id match first
                     exact_match = (
                         session.query(Chat)
-                        # .options(joinedload(Chat.user))
+                        .options(joinedload(Chat.user))
                         .filter_by(chat_id=chat_id_search)
                         .first()
                     )
@@ -158,7 +173,7 @@ class ChatService:
                 # Search by group_name (partial match, case insensitive)
                 results = (
                     session.query(Chat)
-                    # .options(joinedload(Chat.user))
+                    .options(joinedload(Chat.user))
                     .filter(Chat.group_name.ilike(f"%{search_term}%"))
                     .limit(limit)
                     .all()
@@ -247,17 +262,7 @@ class ChatService:
         Check if a chat with the given chat_id exists.
         Much more efficient than fetching all chat IDs and checking if it's in the list.
         """
-        with get_db_session() as session:
-            try:
-                exists = (
-                    session.query(Chat).filter_by(chat_id=chat_id).first() is not None
-                )
-                return bool(exists)
-            except Exception as e:
-                force_log(f"Error checking if chat exists: {e}", "ChatService", "ERROR")
-                return False
-            finally:
-                session.close()
+        return await ChatService.get_chat_by_chat_id(chat_id) is not None
 
     async def is_shift_enabled(self, chat_id: int) -> bool:
         try:
@@ -288,6 +293,7 @@ class ChatService:
                 )
                 
                 session.commit()
+                _chat_changed(chat_id)
                 if result > 0:
                     force_log(f"Successfully updated {threshold_type} threshold to {value} for chat {chat_id}", "ChatService")
                     return True
@@ -318,7 +324,11 @@ class ChatService:
                     .update({"chat_id": new_chat_id})
                 )
 
+                # income_rollups has no foreign key to cascade the new chat_id
+                session.query(IncomeRollup).filter_by(chat_id=old_chat_id).update({"chat_id": new_chat_id})
+
                 session.commit()
+                _chat_changed(old_chat_id, new_chat_id)
                 if chat_result > 0 or income_result > 0:
                     force_log(
                         f"Successfully migrated chat_id from {old_chat_id} to {new_chat_id}", "ChatService"
@@ -249,21 +249,21 @@ class CustomReportService:
             )
 
             try:
-                # Execute query with timeout
-                result = db.execute(
-                    text(query).execution_options(timeout=30)
-                )
-                rows = result.fetchall()
-
-                # Aggregate results by currency
-                aggregated = self._aggregate_results(rows)
+                # Aggregate by currency in the database when the query has amount and
+                # currency columns; otherwise fetch its rows and aggregate them here
+                aggregated = self._aggregate_in_database(db, query)
+                if aggregated is None:
+                    result = db.execute(
+                        text(query).execution_options(timeout=30)
+                    )
+                    aggregated = self._aggregate_results(result.fetchall())
 
                 # Update last_run_at
                 report.last_run_at = DateUtils.now()
                 db.commit()
 
                 force_log(
-                    f"Successfully executed report {report.report_name}: {len(rows)} rows",
+                    f"Successfully executed report {report.report_name}: {aggregated['total_count']} rows",
                     "CustomReportService",
                 )
 
@@ -321,6 +321,38 @@ class CustomReportService:
 
         return True
 
+    def _aggregate_in_database(self, db, query: str) -> dict[str, Any] | None:
+        """
+        Sum the report query's rows per currency with GROUP BY, so only one row
+        per currency is transferred. None when the query cannot be wrapped
+        (e.g. it has no amount or currency column).
+        """
+        wrapped = (
+            "SELECT report_rows.currency, SUM(report_rows.amount) AS amount, COUNT(*) AS count "
+            f"FROM ({query.strip().rstrip(';')}) AS report_rows GROUP BY report_rows.currency"
+        )
+        try:
+            with db.begin_nested():
+                rows = db.execute(text(wrapped).execution_options(timeout=30)).fetchall()
+        except SQLAlchemyError as e:
+            force_log(
+                f"Custom report query cannot be aggregated in the database, aggregating rows instead: {e}",
+                "CustomReportService",
+                "DEBUG",
+            )
+            return None
+
+        currencies = {}
+        total_count = 0
+        for currency, amount, count in rows:
+            currency = currency or "USD"
+            if currency not in currencies:
+                currencies[currency] = {"amount": 0, "count": 0}
+            currencies[currency]["amount"] += amount or 0
+            currencies[currency]["count"] += count
+            total_count += count
+        return {"currencies": currencies, "total_count": total_count}
+
     def _aggregate_results(self, rows: list) -> dict[str, Any]:
         """
         Aggregate query results by currency
@@ -21,7 +21,7 @@ class ChatSearchHandler:
             if not chat:
                 return ConversationHandler.END
 
-            identifier: str = chat.user.identifier if chat.user else ""  # type: ignore
+            identifier: str = chat.user.identifier if chat.user else ""
             force_log(f"Identifier: {identifier}", "ChatSearchHandler", "DEBUG")
             user = await self.user_service.get_user_by_identifier(identifier)
             if not user:
@@ -57,7 +57,7 @@ class ChatSearchHandler:
                 chat = matching_chats[0]
                 context.user_data["chat_id_input"] = str(chat.chat_id)  # type: ignore
                 context.user_data["group_name"] = chat.group_name
-                context.user_data["found_user"] = chat.user  # type: ignore
+                context.user_data["found_user"] = chat.user
                 if chat.user:
                     # Import PackageHandler to show user confirmation
                     from .package_handler import PackageHandler
@@ -352,13 +352,13 @@ class ChatSearchHandler:
             return ConversationHandler.END
 
         try:
-            chat_id: int = update.message.text.strip()  # type: ignore
+            chat_id = int(update.message.text.strip())
             chat = await self._get_chat_with_validation(update, chat_id)
             if not chat:
                 return ConversationHandler.END
 
             # Check if chat has a user
-            if not chat.user:  # type: ignore
+            if not chat.user:
                 await update.message.reply_text(
                     "Chat does not have an associated user."
                 )
@@ -400,7 +400,8 @@ class ChatSearchHandler:
         update: Update,
         chat_id: int,
     ) -> Chat | None:
-        chat = await self.chat_service.get_chat_by_chat_id(chat_id)
+        # Admin flows read the user, which cached chat snapshots do not carry
+        chat = await self.chat_service.get_chat_with_user(chat_id)
         if not chat:
             await update.message.reply_text("Chat is not found.")  # type: ignore
             return None
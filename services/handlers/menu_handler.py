@@ -9,7 +9,8 @@ from helper import DateUtils, daily_transaction_report, weekly_transaction_repor
     shift_report, business_weekly_transaction_report, business_monthly_transaction_report, \
     custom_business_weekly_report, custom_business_monthly_report, format_custom_report_result
 from helper.logger_utils import force_log
-from services import ChatService, IncomeService, ShiftService, GroupPackageService, CustomReportService
+from services import ChatService, ShiftService, GroupPackageService, CustomReportService
+from services.income_aggregate_service import IncomeAggregateService
 
 
 class MenuHandler:
@@ -66,13 +67,11 @@ class MenuHandler:
             current_date = DateUtils.now()
             
             # Use the same method as _handle_date_summary
-            income_service = IncomeService()
-            incomes = await income_service.get_income_by_specific_date_and_chat_id(
-                chat_id=chat_id,
-                target_date=current_date
-            )
+            # Per-currency totals from the database instead of every income row
+
+            totals = await IncomeAggregateService().get_totals(chat_id, *DateUtils.day_bounds(current_date))
 
-            if not incomes:
+            if not totals:
                 message = (
                     f"គ្មានប្រតិបត្តិការសម្រាប់ថ្ងៃទី {current_date.strftime('%d %b %Y')} ទេ។"
                 )
@@ -89,7 +88,7 @@ class MenuHandler:
                 
                 # Use daily report format for current date
                 group_name = chat.group_name or f"Group {chat.chat_id}"
-                message = await daily_transaction_report(incomes, current_date, telegram_username, group_name, chat_id)
+                message = await daily_transaction_report(totals, current_date, telegram_username, group_name, chat_id)
 
             await query.edit_message_text(message, parse_mode='HTML')
             return True
@@ -240,13 +239,12 @@ class MenuHandler:
             date_str = callback_data.replace("summary_of_", "")
             selected_date = datetime.strptime(date_str, "%Y-%m-%d")
 
-            income_service = IncomeService()
-            incomes = await income_service.get_income_by_specific_date_and_chat_id(
-                chat_id=chat_id,
-                target_date=selected_date
-            )
+            # Per-currency totals from the database instead of every income row
+
+
+            totals = await IncomeAggregateService().get_totals(chat_id, *DateUtils.day_bounds(selected_date))
 
-            if not incomes:
+            if not totals:
                 message = (
                     f"គ្មានប្រតិបត្តិការសម្រាប់ថ្ងៃទី {selected_date.strftime('%d %b %Y')} ទេ។"
                 )
@@ -268,7 +266,7 @@ class MenuHandler:
                 # Use new daily report format
                 start_date = selected_date
                 end_date = selected_date + timedelta(days=1)
-                message = await daily_transaction_report(incomes, selected_date, telegram_username, group_name, chat_id)
+                message = await daily_transaction_report(totals, selected_date, telegram_username, group_name, chat_id)
 
             await query.edit_message_text(message, parse_mode='HTML')
             return True
@@ -627,19 +625,16 @@ class MenuHandler:
                     message = await business_weekly_transaction_report(chat_id, start_date, end_date, group_name)
             else:
                 # Use regular reporting for other groups
-                income_service = IncomeService()
-                incomes = await income_service.get_income_by_date_and_chat_id(
-                    chat_id=chat_id,
-                    start_date=start_date,
-                    end_date=end_date,
-                )
+                # Per-day, per-currency totals from the database instead of every income row
+
+                daily_totals = await IncomeAggregateService().get_totals(chat_id, start_date, end_date, group_by=("day",))
 
-                if not incomes:
+                if not daily_totals:
                     period_text = f"សប្តាហ៍ {week_number} ({start_day}-{end_day} {start_date.strftime('%B %Y')})"
                     message = f"គ្មានប្រតិបត្តិការសម្រាប់ {period_text} ទេ។"
                 else:
                     # Use weekly report format with group name
-                    message = weekly_transaction_report(incomes, start_date, end_date, group_name)
+                    message = weekly_transaction_report(daily_totals, start_date, end_date, group_name)
 
             await query.edit_message_text(message, parse_mode='HTML')
             return True
@@ -685,19 +680,16 @@ class MenuHandler:
                     message = await business_monthly_transaction_report(chat_id, start_date, end_date, group_name)
             else:
                 # Use regular reporting for other groups
-                income_service = IncomeService()
-                incomes = await income_service.get_income_by_date_and_chat_id(
-                    chat_id=chat_id,
-                    start_date=start_date,
-                    end_date=end_date,
-                )
+                # Per-day, per-currency totals from the database instead of every income row
 
-                if not incomes:
+                daily_totals = await IncomeAggregateService().get_totals(chat_id, start_date, end_date, group_by=("day",))
+
+                if not daily_totals:
                     period_text = start_date.strftime("%B %Y")
                     message = f"គ្មានប្រតិបត្តិការសម្រាប់ {period_text} ទេ។"
                 else:
                     # Use monthly report format with group name
-                    message = monthly_transaction_report(incomes, start_date, end_date, group_name)
+                    message = monthly_transaction_report(daily_totals, start_date, end_date, group_name)
 
             await query.edit_message_text(message, parse_mode='HTML')
             return True
@@ -710,8 +702,6 @@ class MenuHandler:
     async def _generate_report(self, chat_id: int, report_type: str, requesting_user=None) -> str:
         """Generate report text by calling appropriate service methods"""
 
-        income_service = IncomeService()
-
         # Get current time using DateUtils for consistency
         now = DateUtils.now()
 
@@ -741,15 +731,11 @@ class MenuHandler:
         else:
             return "Invalid report type"
 
-        # Get income data using the same method as normal bot
-        incomes = await income_service.get_income_by_date_and_chat_id(
-            chat_id=chat_id,
-            start_date=start_date,
-            end_date=end_date,
-        )
+        # Per-day, per-currency totals from the database instead of every income row
+        daily_totals = await IncomeAggregateService().get_totals(chat_id, start_date, end_date, group_by=("day",))
 
         # If no data found, return no data message
-        if not incomes:
+        if not daily_totals:
             return f"គ្មានប្រតិបត្តិការសម្រាប់ {title} ទេ។"
 
         # Get chat object for group name (needed for all report types that use group_name)
@@ -767,19 +753,19 @@ class MenuHandler:
                     telegram_username = requesting_user.first_name
                 # If user is anonymous, username will remain "Admin"
             
-            return await daily_transaction_report(incomes, now, telegram_username, group_name, chat_id)
+            return await daily_transaction_report(daily_totals, now, telegram_username, group_name, chat_id)
         elif report_type == "weekly":
             # Use the new weekly format with group name
-            return weekly_transaction_report(incomes, start_date, end_date, group_name)
+            return weekly_transaction_report(daily_totals, start_date, end_date, group_name)
         elif report_type == "monthly":
             # Use the new monthly format with group name
-            return monthly_transaction_report(incomes, start_date, end_date, group_name)
+            return monthly_transaction_report(daily_totals, start_date, end_date, group_name)
         
         # For other reports, use the old format
         from helper import total_summary_report
         period_text = title
         formatted_title = f"សរុបប្រតិបត្តិការ {period_text}"
-        return total_summary_report(incomes, formatted_title)
+        return total_summary_report(daily_totals, formatted_title)
 
     async def _handle_custom_reports_menu(self, chat_id: int, query):
         """Handle custom reports menu - show list of active reports"""
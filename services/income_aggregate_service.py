@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Sequence
+
+from sqlalchemy import func
+
+from config import get_db_session
+from helper import DateUtils
+from helper.date_ranges import between
+from helper.parsed_payment import from_minor_units, to_minor_units
+from models import IncomeBalance, IncomeRollup, RevenueSource
+
+# Extra GROUP BY keys besides currency
+GROUP_COLUMNS = {
+    "shift_id": IncomeBalance.shift_id,
+    "day": func.date(IncomeBalance.income_date),
+    "paid_by": IncomeBalance.paid_by,
+}
+ROLLUP_GROUP_COLUMNS = {
+    "shift_id": IncomeRollup.shift_id,
+    "day": IncomeRollup.local_date,
+    "paid_by": IncomeRollup.paid_by,
+}
+
+
+class IncomeTotal:
+    """Sum, count and first/last income time of one currency (per group)"""
+
+    __slots__ = (
+        "currency",
+        "amount_minor",
+        "count",
+        "first_income",
+        "last_income",
+        "shift_id",
+        "day",
+        "paid_by",
+    )
+
+    def __init__(
+        self,
+        currency: str,
+        amount_minor: int = 0,
+        count: int = 0,
+        first_income: datetime | None = None,
+        last_income: datetime | None = None,
+        shift_id: int | None = None,
+        day: date | None = None,
+        paid_by: str | None = None,
+    ):
+        self.currency = currency
+        self.amount_minor = amount_minor
+        self.count = count
+        self.first_income = first_income
+        self.last_income = last_income
+        self.shift_id = shift_id
+        self.day = day
+        self.paid_by = paid_by
+
+    @property
+    def amount(self) -> int | float:
+        return from_minor_units(self.amount_minor)
+
+    def add(self, other: "IncomeTotal") -> None:
+        """Fold another total of the same currency into this one"""
+        self.amount_minor += other.amount_minor
+        self.count += other.count
+        if other.first_income is not None and (self.first_income is None or other.first_income < self.first_income):
+            self.first_income = other.first_income
+        if other.last_income is not None and (self.last_income is None or other.last_income > self.last_income):
+            self.last_income = other.last_income
+
+    def __repr__(self) -> str:
+        return f"IncomeTotal(currency={self.currency!r}, amount={self.amount}, count={self.count})"
+
+
+def _as_date(value) -> date | None:
+    # SQLite returns DATE() as text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _as_datetime(value: datetime | date) -> datetime:
+    """Naive local datetime, as income_date is stored"""
+    if not isinstance(value, datetime):
+        return datetime.combine(value, time.min)
+    if value.tzinfo is not None:
+        return value.astimezone(DateUtils.get_timezone()).replace(tzinfo=None)
+    return value
+
+
+def _query_totals(db, measures: tuple, group_columns: dict, criteria: Sequence, group_by: Sequence[str]) -> list[IncomeTotal]:
+    """IncomeTotals of ``measures`` (currency, sum, count, min, max) grouped by currency and ``group_by``"""
+    currency, *aggregates = measures
+    keys = [group_columns[name] for name in group_by]
+    rows = db.query(currency, *keys, *aggregates).filter(*criteria).group_by(currency, *keys).all()
+
+    totals = []
+    for row in rows:
+        currency_value, *values = row
+        amount_minor, count, first_income, last_income = values[len(keys):]
+        total = IncomeTotal(currency_value, int(amount_minor or 0), int(count or 0), first_income, last_income)
+        for name, value in zip(group_by, values):
+            if name == "day":
+                value = _as_date(value)
+            # Rollups store no shift and no payer as 0 and ''
+            setattr(total, name, value or None)
+        totals.append(total)
+    return totals
+
+
+def query_income_totals(db, criteria: Sequence, group_by: Sequence[str] = ()) -> list[IncomeTotal]:
+    """
+    SUM(amount_minor), COUNT(*), MIN/MAX(income_date) of the incomes matching
+    ``criteria``, grouped by currency and the GROUP_COLUMNS in ``group_by``.
+    """
+    measures = (
+        IncomeBalance.currency,
+        func.sum(IncomeBalance.amount_minor),
+        func.count(),
+        func.min(IncomeBalance.income_date),
+        func.max(IncomeBalance.income_date),
+    )
+    return _query_totals(db, measures, GROUP_COLUMNS, criteria, group_by)
+
+
+def query_rollup_totals(db, criteria: Sequence, group_by: Sequence[str] = ()) -> list[IncomeTotal]:
+    """query_income_totals of the IncomeRollup rows matching ``criteria``"""
+    measures = (
+        IncomeRollup.currency,
+        func.sum(IncomeRollup.amount_minor),
+        func.sum(IncomeRollup.income_count),
+        func.min(IncomeRollup.first_income),
+        func.max(IncomeRollup.last_income),
+    )
+    return _query_totals(db, measures, ROLLUP_GROUP_COLUMNS, criteria, group_by)
+
+
+def merge_totals(totals: Iterable[IncomeTotal], group_by: Sequence[str] = ()) -> list[IncomeTotal]:
+    """Fold totals of the same currency and group into one"""
+    merged: dict[tuple, IncomeTotal] = {}
+    for total in totals:
+        key = (total.currency, *(getattr(total, name) for name in group_by))
+        if key in merged:
+            merged[key].add(total)
+        else:
+            merged[key] = total
+    return list(merged.values())
+
+
+def rollup_reads_enabled() -> bool:
+    return os.getenv("INCOME_ROLLUP_READS", "1") == "1"
+
+
+def closed_day_split(
+    start: datetime | None, end: datetime | None, today: date
+) -> tuple[tuple[date | None, date] | None, list[tuple[datetime, datetime | None]]]:
+    """
+    Split ``[start, end)`` (None: unbounded) into the whole days before
+    ``today`` it covers, as ``(first_day or None, stop_day)``, and the
+    remaining time ranges that have to be read from income rows.
+    """
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    stop_day = today if end is None else min(today, end.date())
+
+    if first_day is not None and first_day >= stop_day:
+        return None, [(start, end)]
+
+    raw_ranges = []
+    if first_day is not None and start < datetime.combine(first_day, time.min):
+        raw_ranges.append((start, datetime.combine(first_day, time.min)))
+    stop = datetime.combine(stop_day, time.min)
+    if end is None or end > stop:
+        raw_ranges.append((stop, end))
+    return (first_day, stop_day), raw_ranges
+
+
+def summarize_incomes(incomes: Iterable, group_by: Sequence[str] = ()) -> list[IncomeTotal]:
+    """The totals query_income_totals would return, for income rows already loaded"""
+    groups: dict[tuple, IncomeTotal] = {}
+    for income in incomes:
+        values = {
+            "shift_id": income.shift_id,
+            "day": income.income_date.date(),
+            "paid_by": income.paid_by,
+        }
+        key = (income.currency, *(values[name] for name in group_by))
+        amount_minor = getattr(income, "amount_minor", None)
+        if amount_minor is None:
+            amount_minor = to_minor_units(income.amount)
+        total = IncomeTotal(income.currency, amount_minor, 1, income.income_date, income.income_date)
+        if key in groups:
+            groups[key].add(total)
+        else:
+            for name in group_by:
+                setattr(total, name, values[name])
+            groups[key] = total
+    return list(groups.values())
+
+
+def totals_by_currency(totals: Iterable[IncomeTotal]) -> dict[str, IncomeTotal]:
+    """Fold grouped totals into one total per currency"""
+    merged: dict[str, IncomeTotal] = {}
+    for total in totals:
+        if total.currency not in merged:
+            merged[total.currency] = IncomeTotal(total.currency)
+        merged[total.currency].add(total)
+    return merged
+
+
+class IncomeAggregateService:
+    """
+    Currency totals computed by the database instead of from loaded rows.
+    Set INCOME_ROLLUP_READS=0 to aggregate income_balance only, e.g. before
+    the rollups have been rebuilt.
+    """
+
+    async def get_totals(
+        self,
+        chat_id: int | None = None,
+        start: datetime | date | None = None,
+        end: datetime | date | None = None,
+        shift_ids: Sequence[int] | None = None,
+        group_by: Sequence[str] = (),
+    ) -> list[IncomeTotal]:
+        """
+        Totals of a chat's incomes in ``[start, end)`` and/or of the given
+        shifts. Whole days before today are read from income_rollups, the
+        rest (today, partial days) from income_balance.
+        """
+        if shift_ids is not None and not shift_ids:
+            return []
+        if start is not None and end is not None:
+            start, end = _as_datetime(start), _as_datetime(end)
+        else:
+            start = end = None
+
+        income_criteria = []
+        rollup_criteria = []
+        if chat_id is not None:
+            income_criteria.append(IncomeBalance.chat_id == chat_id)
+            rollup_criteria.append(IncomeRollup.chat_id == chat_id)
+        if shift_ids is not None:
+            income_criteria.append(IncomeBalance.shift_id.in_(list(shift_ids)))
+            rollup_criteria.append(IncomeRollup.shift_id.in_(list(shift_ids)))
+
+        with get_db_session() as db:
+            if not rollup_reads_enabled():
+                if start is not None:
+                    income_criteria.append(between(IncomeBalance.income_date, start, end))
+                return query_income_totals(db, income_criteria, group_by)
+
+            closed_days, raw_ranges = closed_day_split(start, end, DateUtils.today())
+            totals = []
+            if closed_days is not None:
+                first_day, stop_day = closed_days
+                if first_day is not None:
+                    rollup_criteria.append(IncomeRollup.local_date >= first_day)
+                rollup_criteria.append(IncomeRollup.local_date < stop_day)
+                totals.extend(query_rollup_totals(db, rollup_criteria, group_by))
+            for range_start, range_end in raw_ranges:
+                if range_end is None:
+                    range_criteria = IncomeBalance.income_date >= range_start
+                else:
+                    range_criteria = between(IncomeBalance.income_date, range_start, range_end)
+                totals.extend(query_income_totals(db, [*income_criteria, range_criteria], group_by))
+        return merge_totals(totals, group_by)
+
+    async def get_shift_totals(self, shift_ids: Sequence[int]) -> dict[int, list[IncomeTotal]]:
+        """Per-currency totals of each shift"""
+        by_shift: dict[int, list[IncomeTotal]] = {}
+        for total in await self.get_totals(shift_ids=shift_ids, group_by=("shift_id",)):
+            by_shift.setdefault(total.shift_id, []).append(total)
+        return by_shift
+
+    async def get_revenue_source_totals(self, shift_ids: Sequence[int]) -> tuple[dict[str, float], set[str]]:
+        """Revenue source totals of the given shifts' incomes, and the period labels they carry"""
+        if not shift_ids:
+            return {}, set()
+        with get_db_session() as db:
+            rows = (
+                db.query(RevenueSource.source_name, RevenueSource.shift, func.sum(RevenueSource.amount_minor))
+                .join(IncomeBalance, RevenueSource.income_id == IncomeBalance.id)
+                .filter(IncomeBalance.shift_id.in_(list(shift_ids)))
+                .group_by(RevenueSource.source_name, RevenueSource.shift)
+                .all()
+            )
+
+        source_minor: dict[str, int] = {}
+        period_labels = set()
+        for source_name, period_label, amount_minor in rows:
+            if period_label:
+                period_labels.add(period_label)
+            source_minor[source_name] = source_minor.get(source_name, 0) + int(amount_minor or 0)
+        return {name: from_minor_units(minor) for name, minor in source_minor.items()}, period_labels
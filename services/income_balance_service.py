@@ -1,15 +1,22 @@
 import asyncio
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 
 from common.enums import CurrencyEnum
-from config import get_db_session
+from config import get_db_session, run_in_db_session
 from helper import DateUtils
+from helper.date_ranges import in_days, in_month, in_week, on_day
 from helper.logger_utils import force_log
+from helper.metrics import metrics
+from helper.parsed_payment import from_minor_units
 from models import IncomeBalance, RevenueSource
+from .income_aggregate_service import query_income_totals
+from .income_records import IncomeRecord, load_income_records
+from .income_rollups import add_to_rollups
+from .recent_transaction_index import get_recent_transaction_index
 from .shift_service import ShiftService
 
 
@@ -26,17 +33,10 @@ class IncomeService:
     async def ensure_active_shift(self, chat_id: int) -> int:
         force_log(f"_ensure_active_shift called for chat_id: {chat_id}", "IncomeService", "DEBUG")
         try:
-
-            current_shift = await self.shift_service.get_current_shift(chat_id)
-            if current_shift:
-                force_log(f"Found existing shift {current_shift.id} for chat {chat_id}", "IncomeService", "DEBUG")
-                return current_shift.id
-            else:
-                # No active shift found, create a new one
-                force_log(f"No active shift found, creating new one for chat {chat_id}", "IncomeService", "DEBUG")
-                new_shift = await self.shift_service.create_shift(chat_id)
-                force_log(f"Created new shift {new_shift.id} for chat {chat_id}", "IncomeService")
-                return new_shift.id
+            # Registry lookup in the common case; creation is serialised per chat
+            shift_id = await self.shift_service.ensure_open_shift_id(chat_id)
+            force_log(f"Using shift {shift_id} for chat {chat_id}", "IncomeService", "DEBUG")
+            return shift_id
 
         except Exception as e:
             force_log(f"ERROR in _ensure_active_shift: {e}", "IncomeService", "ERROR")
@@ -126,7 +126,7 @@ class IncomeService:
             current_date = income_date if income_date is not None else DateUtils.now()
 
             # Ensure shift exists - auto-create if needed
-            if shift_id is 0:
+            if shift_id == 0:
                 if enable_shift:
                     force_log(
                         f"No shift_id provided, ensuring active shift for chat {chat_id}",
@@ -141,7 +141,7 @@ class IncomeService:
                     )
                     shift_id = 0
 
-            with get_db_session() as db:
+            def _save(db) -> tuple[IncomeBalance, bool]:
                 try:
                     force_log(f"Creating IncomeBalance record with shift_id={shift_id}", "IncomeService", "DEBUG")
                     new_income = IncomeBalance(
@@ -160,7 +160,35 @@ class IncomeService:
                     )
 
                     db.add(new_income)
-                    db.commit()
+                    try:
+                        db.flush()
+                        add_to_rollups(db, [{
+                            "chat_id": chat_id,
+                            "income_date": current_date,
+                            "shift_id": new_income.shift_id,
+                            "currency": currency_code,
+                            "paid_by": paid_by,
+                            "amount": amount,
+                        }])
+                        db.commit()
+                    except IntegrityError:
+                        # Stored concurrently by another process (uq_income_chat_message)
+                        db.rollback()
+                        existing = (
+                            db.query(IncomeBalance)
+                            .filter(
+                                IncomeBalance.chat_id == chat_id,
+                                IncomeBalance.message_id == message_id,
+                            )
+                            .first()
+                        )
+                        if existing is None:
+                            raise
+                        force_log(
+                            f"Income for chat {chat_id} message {message_id} already stored as id={existing.id}",
+                            "IncomeService", "WARN"
+                        )
+                        return existing, False
                     db.refresh(new_income)
                     force_log(
                         f"Successfully saved IncomeBalance record with id={new_income.id}",
@@ -186,6 +214,7 @@ class IncomeService:
                                 )
                                 db.add(revenue_source)
                         db.commit()
+                        db.refresh(new_income)
                         force_log(
                             f"Stored revenue sources with shifts for income {new_income.id}",
                             "IncomeService"
@@ -205,47 +234,60 @@ class IncomeService:
                             )
                             db.add(revenue_source)
                         db.commit()
+                        db.refresh(new_income)
                         force_log(
                             f"Stored {len(revenue_breakdown)} revenue sources for income {new_income.id}",
                             "IncomeService"
                         )
 
-                    # Check thresholds after saving income (fire and forget)
-                    # Skip in passive mode to avoid sending messages
-                    force_log(
-                        f"Threshold check: threshold_warning_service={self.threshold_warning_service is not None}, is_passive_mode={self.is_passive_mode}",
-                        "IncomeService",
-                        "INFO"
-                    )
-                    if self.threshold_warning_service and not self.is_passive_mode:
-                        force_log("Triggering threshold check task", "IncomeService", "INFO")
-                        asyncio.create_task(self._check_thresholds_async(
-                            chat_id=chat_id,
-                            shift_id=shift_id,
-                            new_income_amount=amount,
-                            new_income_currency=currency_code
-                        ))
-                    else:
-                        force_log("Skipping threshold check (passive mode or no warning service)", "IncomeService", "INFO")
-
-                    return new_income
+                    return new_income, True
 
                 except Exception as e:
                     force_log(f"ERROR in database operation: {e}", "IncomeService", "ERROR")
                     db.rollback()
                     raise e
+
+            # Run the writes off the event loop so listeners keep receiving updates
+            new_income, created = await run_in_db_session(_save)
+            get_recent_transaction_index().record(chat_id, message_id, trx_id)
+
+            # Check thresholds after saving income (fire and forget)
+            if created:
+                self.schedule_threshold_check(chat_id, shift_id, amount, currency_code)
+
+            return new_income
         except Exception as e:
             force_log(f"ERROR in insert_income: {e}", "IncomeService", "ERROR")
             raise e
 
+    def schedule_threshold_check(self, chat_id: int, shift_id: int, amount: float, currency_code: str):
+        """Fire and forget the threshold check for a freshly saved income.
+        Skipped in passive mode to avoid sending messages."""
+        force_log(
+            f"Threshold check: threshold_warning_service={self.threshold_warning_service is not None}, is_passive_mode={self.is_passive_mode}",
+            "IncomeService",
+            "INFO"
+        )
+        if self.threshold_warning_service and not self.is_passive_mode:
+            force_log("Triggering threshold check task", "IncomeService", "INFO")
+            asyncio.create_task(self._check_thresholds_async(
+                chat_id=chat_id,
+                shift_id=shift_id,
+                new_income_amount=amount,
+                new_income_currency=currency_code
+            ))
+        else:
+            force_log("Skipping threshold check (passive mode or no warning service)", "IncomeService", "INFO")
+
     async def _check_thresholds_async(self, chat_id: int, shift_id: int, new_income_amount: float, new_income_currency: str):
         """Non-blocking threshold check helper method"""
         try:
-            await self.threshold_warning_service.check_and_send_warnings(
-                chat_id=chat_id,
-                new_income_amount=new_income_amount,
-                new_income_currency=new_income_currency
-            )
+            with metrics.timer("ingest_threshold_check_seconds"):
+                await self.threshold_warning_service.check_and_send_warnings(
+                    chat_id=chat_id,
+                    new_income_amount=new_income_amount,
+                    new_income_currency=new_income_currency
+                )
         except Exception as threshold_error:
             # Don't fail the income saving if threshold check fails
             force_log(f"Error in threshold check (non-blocking): {threshold_error}", "IncomeService", "ERROR")
@@ -261,27 +303,38 @@ class IncomeService:
             )
 
     async def get_income_by_chat_and_message_id(
-        self, chat_id: int, message_id: int
+        self, chat_id: int, message_id: int, message_time: datetime | None = None
     ) -> bool:
+        """
+        Check whether (chat_id, message_id) is stored. Answered from the recent
+        transaction index when it is certain; ``message_time`` lets it answer
+        misses for messages newer than its coverage window.
+        """
         force_log(
             f"Searching for existing income with chat_id: {chat_id} and message_id: {message_id}",
             "IncomeService", "DEBUG"
         )
-        with get_db_session() as db:
-            result = (
-                db.query(IncomeBalance)
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.message_id == message_id,
-                )
-                .first()
-            )
-            found = result is not None
-            force_log(
-                f"Chat ID {chat_id} + Message ID {message_id} duplicate check: {'FOUND' if found else 'NOT FOUND'}",
-                "IncomeService", "DEBUG"
+        index = get_recent_transaction_index()
+        cached = index.lookup(chat_id, message_id, message_time=message_time)
+        if cached is not None:
+            return cached
+
+        found = await run_in_db_session(
+            lambda db: db.query(IncomeBalance.id)
+            .filter(
+                IncomeBalance.chat_id == chat_id,
+                IncomeBalance.message_id == message_id,
             )
-            return found
+            .first()
+            is not None
+        )
+        if found:
+            index.record(chat_id, message_id)
+        force_log(
+            f"Chat ID {chat_id} + Message ID {message_id} duplicate check: {'FOUND' if found else 'NOT FOUND'}",
+            "IncomeService", "DEBUG"
+        )
+        return found
 
     async def get_income_by_trx_id(self, trx_id: str | None, chat_id: int) -> bool:
         if trx_id is None:
@@ -291,6 +344,8 @@ class IncomeService:
             f"Searching for existing income with trx_id: {trx_id} and chat_id: {chat_id}",
             "IncomeService", "DEBUG"
         )
+        if get_recent_transaction_index().has_trx_id(chat_id, trx_id):
+            return True
         with get_db_session() as db:
             result = (
                 db.query(IncomeBalance)
@@ -307,108 +362,118 @@ class IncomeService:
             return found
 
     async def check_duplicate_transaction(
-        self, chat_id: int, trx_id: str | None, message_id: int
+        self,
+        chat_id: int,
+        trx_id: str | None,
+        message_id: int,
+        message_time: datetime | None = None,
     ) -> bool:
         """
         Check for duplicate transaction using combination of chat_id, trx_id, and message_id
         - If trx_id exists: check (chat_id, trx_id, message_id)
         - If trx_id is null: check (chat_id, message_id)
+        The recent transaction index answers first; the DB is only queried
+        when it cannot be certain (see RecentTransactionIndex).
         Returns True if duplicate found, False if unique
         """
         force_log(
             f"Checking duplicate with chat_id: {chat_id}, trx_id: {trx_id}, message_id: {message_id}",
             "IncomeService", "DEBUG"
         )
+        index = get_recent_transaction_index()
+        cached = index.lookup(chat_id, message_id, trx_id, message_time)
+        if cached is not None:
+            force_log(
+                f"Duplicate check for chat_id={chat_id}, message_id={message_id} answered from index: {cached}",
+                "IncomeService", "DEBUG"
+            )
+            return cached
 
-        with get_db_session() as db:
+        def _find_duplicate(db) -> bool:
+            query = db.query(IncomeBalance.id).filter(
+                IncomeBalance.chat_id == chat_id,
+                IncomeBalance.message_id == message_id,
+            )
             if trx_id:
                 # Check combination of chat_id, trx_id, and message_id
-                duplicate = (
-                    db.query(IncomeBalance)
-                    .filter(
-                        IncomeBalance.chat_id == chat_id,
-                        IncomeBalance.trx_id == trx_id,
-                        IncomeBalance.message_id == message_id,
-                    )
-                    .first()
-                )
+                query = query.filter(IncomeBalance.trx_id == trx_id)
+            return query.first() is not None
 
-                if duplicate:
-                    force_log(
-                        f"Duplicate found by combination: chat_id={chat_id}, trx_id={trx_id}, message_id={message_id}",
-                        "IncomeService", "DEBUG"
-                    )
-                    return True
+        if await run_in_db_session(_find_duplicate):
+            index.record(chat_id, message_id, trx_id)
+            if trx_id:
+                force_log(
+                    f"Duplicate found by combination: chat_id={chat_id}, trx_id={trx_id}, message_id={message_id}",
+                    "IncomeService", "DEBUG"
+                )
             else:
-                # If trx_id is null, check combination of chat_id and message_id
-                duplicate = (
-                    db.query(IncomeBalance)
-                    .filter(
-                        IncomeBalance.chat_id == chat_id,
-                        IncomeBalance.message_id == message_id,
-                    )
-                    .first()
+                force_log(
+                    f"Duplicate found by combination: chat_id={chat_id}, message_id={message_id} (trx_id is null)",
+                    "IncomeService", "DEBUG"
                 )
+            return True
 
-                if duplicate:
-                    force_log(
-                        f"Duplicate found by combination: chat_id={chat_id}, message_id={message_id} (trx_id is null)",
-                        "IncomeService", "DEBUG"
-                    )
-                    return True
-
-            force_log(
-                f"No duplicate found for chat_id={chat_id}, trx_id={trx_id}, message_id={message_id}",
-                "IncomeService", "DEBUG"
-            )
-            return False
+        force_log(
+            f"No duplicate found for chat_id={chat_id}, trx_id={trx_id}, message_id={message_id}",
+            "IncomeService", "DEBUG"
+        )
+        return False
 
     async def get_last_yesterday_message(self, date) -> IncomeBalance | None:
         with get_db_session() as db:
             return (
                 db.query(IncomeBalance)
-                .filter(func.date(IncomeBalance.income_date) == date.date())
+                .filter(on_day(IncomeBalance.income_date, date))
                 .order_by(IncomeBalance.id.desc())
                 .first()
             )
 
-    async def get_income_by_date_and_chat_id(
-        self, chat_id: int, start_date: datetime, end_date: datetime
-    ) -> list[IncomeBalance]:
+    @staticmethod
+    def _load_incomes(criteria: list, slim: bool, with_sources: bool) -> list[IncomeBalance] | list[IncomeRecord]:
+        """
+        Incomes matching ``criteria``: IncomeBalance objects, or with ``slim``
+        IncomeRecords without the message text, whose revenue sources are
+        only read when ``with_sources`` is set.
+        """
         with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .options(joinedload(IncomeBalance.revenue_sources))
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= start_date,
-                    IncomeBalance.income_date < end_date,
-                )
-                .all()
-            )
+            if slim:
+                return load_income_records(db, criteria, with_sources)
+            query = db.query(IncomeBalance)
+            if with_sources:
+                query = query.options(joinedload(IncomeBalance.revenue_sources))
+            return query.filter(*criteria).all()
+
+    async def get_income_by_date_and_chat_id(
+        self, chat_id: int, start_date: datetime, end_date: datetime,
+        slim: bool = False, with_sources: bool = True,
+    ) -> list[IncomeBalance] | list[IncomeRecord]:
+        return self._load_incomes(
+            [
+                IncomeBalance.chat_id == chat_id,
+                IncomeBalance.income_date >= start_date,
+                IncomeBalance.income_date < end_date,
+            ],
+            slim,
+            with_sources,
+        )
 
     async def get_income_by_specific_date_and_chat_id(
-        self, chat_id: int, target_date: datetime
-    ) -> list[IncomeBalance]:
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .options(joinedload(IncomeBalance.revenue_sources))
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    func.date(IncomeBalance.income_date) == target_date.date(),
-                )
-                .all()
-            )
+        self, chat_id: int, target_date: datetime,
+        slim: bool = False, with_sources: bool = True,
+    ) -> list[IncomeBalance] | list[IncomeRecord]:
+        return self._load_incomes(
+            [
+                IncomeBalance.chat_id == chat_id,
+                on_day(IncomeBalance.income_date, target_date),
+            ],
+            slim,
+            with_sources,
+        )
 
-    async def get_income_by_shift_id(self, shift_id: int) -> list[IncomeBalance]:
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .options(joinedload(IncomeBalance.revenue_sources))
-                .filter(IncomeBalance.shift_id == shift_id)
-                .all()
-            )
+    async def get_income_by_shift_id(
+        self, shift_id: int, slim: bool = False, with_sources: bool = True
+    ) -> list[IncomeBalance] | list[IncomeRecord]:
+        return self._load_incomes([IncomeBalance.shift_id == shift_id], slim, with_sources)
 
     async def get_income_summary_by_date_range(
         self, chat_id: int, start_date: str, end_date: str
@@ -419,132 +484,73 @@ class IncomeService:
         """
         # Convert string dates to datetime objects
         start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-        # Add one day to end_date to include the entire end day
-        end_datetime = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+        end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
 
-        # Get all income records in the date range
+        # Totals per currency from the database, end day included
         with get_db_session() as db:
-            incomes = (
-                db.query(IncomeBalance)
-                .filter(
+            totals = query_income_totals(
+                db,
+                [
                     IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= start_datetime,
-                    IncomeBalance.income_date < end_datetime,
-                )
-                .all()
+                    in_days(IncomeBalance.income_date, start_datetime, end_datetime),
+                ],
             )
 
-        # Prepare the summary structure
-        summary = {"total_amount": 0.0, "count": len(incomes), "by_currency": {}}
-
-        # Calculate totals
-        for income in incomes:
-            currency = income.currency
-            amount = income.amount
-
-            # Initialize currency entry if it doesn't exist
-            if currency not in summary["by_currency"]:
-                summary["by_currency"][currency] = {"total": 0.0, "count": 0}
-
-            # Add to totals
-            summary["by_currency"][currency]["total"] += amount
-            summary["by_currency"][currency]["count"] += 1
-            summary["total_amount"] += amount
+        summary = {
+            "total_amount": from_minor_units(sum(total.amount_minor for total in totals)) if totals else 0.0,
+            "count": sum(total.count for total in totals),
+            "by_currency": {
+                total.currency: {"total": total.amount, "count": total.count} for total in totals
+            },
+        }
 
         return summary
 
-    async def get_today_income(self, chat_id: int) -> list[IncomeBalance]:
+    async def get_today_income(self, chat_id: int, slim: bool = False) -> list[IncomeBalance] | list[IncomeRecord]:
         """Get all income records for today"""
         today = DateUtils.today()
-        tomorrow = today + timedelta(days=1)
-
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= today,
-                    IncomeBalance.income_date < tomorrow,
-                )
-                .all()
-            )
+        return self._load_incomes(
+            [IncomeBalance.chat_id == chat_id, on_day(IncomeBalance.income_date, today)], slim, False
+        )
 
-    async def get_weekly_income(self, chat_id: int) -> list[IncomeBalance]:
+    async def get_weekly_income(self, chat_id: int, slim: bool = False) -> list[IncomeBalance] | list[IncomeRecord]:
         """Get all income records for this week"""
         today = DateUtils.today()
-        week_start = today - timedelta(days=today.weekday())
-
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= week_start,
-                )
-                .all()
-            )
+        return self._load_incomes(
+            [IncomeBalance.chat_id == chat_id, in_week(IncomeBalance.income_date, today)], slim, False
+        )
 
-    async def get_monthly_income(self, chat_id: int) -> list[IncomeBalance]:
+    async def get_monthly_income(self, chat_id: int, slim: bool = False) -> list[IncomeBalance] | list[IncomeRecord]:
         """Get all income records for this month"""
         today = DateUtils.today()
-        month_start = today.replace(day=1)
-
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= month_start,
-                )
-                .all()
-            )
+        return self._load_incomes(
+            [IncomeBalance.chat_id == chat_id, in_month(IncomeBalance.income_date, today)], slim, False
+        )
 
     # Custom methods for revenue breakdown feature (used by custom bot)
-    async def get_today_income_with_sources(self, chat_id: int) -> list[IncomeBalance]:
+    async def get_today_income_with_sources(
+        self, chat_id: int, slim: bool = False
+    ) -> list[IncomeBalance] | list[IncomeRecord]:
         """Get all income records for today with revenue sources loaded"""
         today = DateUtils.today()
-        tomorrow = today + timedelta(days=1)
-
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .options(joinedload(IncomeBalance.revenue_sources))
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= today,
-                    IncomeBalance.income_date < tomorrow,
-                )
-                .all()
-            )
+        return self._load_incomes(
+            [IncomeBalance.chat_id == chat_id, on_day(IncomeBalance.income_date, today)], slim, True
+        )
 
-    async def get_weekly_income_with_sources(self, chat_id: int) -> list[IncomeBalance]:
+    async def get_weekly_income_with_sources(
+        self, chat_id: int, slim: bool = False
+    ) -> list[IncomeBalance] | list[IncomeRecord]:
         """Get all income records for this week with revenue sources loaded"""
         today = DateUtils.today()
-        week_start = today - timedelta(days=today.weekday())
-
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .options(joinedload(IncomeBalance.revenue_sources))
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= week_start,
-                )
-                .all()
-            )
+        return self._load_incomes(
+            [IncomeBalance.chat_id == chat_id, in_week(IncomeBalance.income_date, today)], slim, True
+        )
 
-    async def get_monthly_income_with_sources(self, chat_id: int) -> list[IncomeBalance]:
+    async def get_monthly_income_with_sources(
+        self, chat_id: int, slim: bool = False
+    ) -> list[IncomeBalance] | list[IncomeRecord]:
         """Get all income records for this month with revenue sources loaded"""
         today = DateUtils.today()
-        month_start = today.replace(day=1)
-
-        with get_db_session() as db:
-            return (
-                db.query(IncomeBalance)
-                .options(joinedload(IncomeBalance.revenue_sources))
-                .filter(
-                    IncomeBalance.chat_id == chat_id,
-                    IncomeBalance.income_date >= month_start,
-                )
-                .all()
-            )
+        return self._load_incomes(
+            [IncomeBalance.chat_id == chat_id, in_month(IncomeBalance.income_date, today)], slim, True
+        )
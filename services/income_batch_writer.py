@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import mysql, sqlite
+
+from config import run_in_db_session
+from helper.logger_utils import force_log
+from helper.metrics import metrics
+from helper.parsed_payment import to_minor_units
+from models import IncomeBalance, RevenueSource, Shift
+from .income_rollups import add_to_rollups
+from .recent_transaction_index import get_recent_transaction_index
+from .shift_service import create_shift_in_session, get_open_shift_registry
+
+
+@dataclass
+class PendingIncome:
+    """A parsed income waiting to be written by the next batch flush"""
+
+    chat_id: int
+    amount: float
+    currency: str
+    original_amount: float
+    message_id: int
+    message: str
+    trx_id: str | None
+    income_date: datetime
+    shift_id: int | None = None
+    sent_by: str | None = None
+    paid_by: str | None = None
+    paid_by_name: str | None = None
+    # Exact amount in minor units; derived from ``amount`` when not given
+    amount_minor: int | None = None
+    # Each entry: {"source_name": str, "amount": float, "shift": str | None}
+    revenue_sources: list[dict] = field(default_factory=list)
+
+    @property
+    def key(self) -> tuple[int, int]:
+        return self.chat_id, self.message_id
+
+    def to_row(self) -> dict:
+        return {
+            "chat_id": self.chat_id,
+            "amount": self.amount,
+            "amount_minor": self.amount_minor if self.amount_minor is not None else to_minor_units(self.amount),
+            "currency": self.currency,
+            "original_amount": self.original_amount,
+            "income_date": self.income_date,
+            "message_id": self.message_id,
+            "message": self.message,
+            "trx_id": self.trx_id,
+            "shift_id": self.shift_id or None,
+            "sent_by": self.sent_by,
+            "paid_by": self.paid_by,
+            "paid_by_name": self.paid_by_name,
+        }
+
+
+def _insert_skipping_duplicates(db, rows: list[dict]):
+    """Multi-row income INSERT that skips (chat_id, message_id) duplicates only"""
+    table = IncomeBalance.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        # Unlike INSERT IGNORE, other errors (NOT NULL, data too long) still raise
+        statement = mysql.insert(table).values(rows)
+        return statement.on_duplicate_key_update(id=table.c.id)
+    if dialect == "sqlite":
+        return sqlite.insert(table).values(rows).on_conflict_do_nothing(
+            index_elements=["chat_id", "message_id"]
+        )
+    return insert(table).values(rows)
+
+
+def _reassign_closed_shifts(db, items: list[PendingIncome]) -> None:
+    """
+    Point incomes whose shift has been closed (e.g. by the auto-close
+    scheduler in another process) at their chat's current open shift,
+    opening one when the chat has none, as ShiftService.ensure_open_shift_id
+    would. A new shift is committed before the incomes are inserted.
+    """
+    shift_ids = {item.shift_id for item in items if item.shift_id}
+    if not shift_ids:
+        return
+
+    open_ids = {
+        shift_id
+        for (shift_id,) in db.query(Shift.id).filter(
+            Shift.id.in_(shift_ids), Shift.is_closed == False
+        )
+    }
+    stale = [item for item in items if item.shift_id and item.shift_id not in open_ids]
+    if not stale:
+        return
+
+    current: dict[int, int] = {}
+    for shift_id, chat_id in (
+        db.query(Shift.id, Shift.chat_id)
+        .filter(Shift.chat_id.in_({item.chat_id for item in stale}), Shift.is_closed == False)
+        .order_by(Shift.start_time)
+    ):
+        current[chat_id] = shift_id  # latest open shift wins
+
+    for item in stale:
+        if item.chat_id not in current:
+            shift = create_shift_in_session(db, item.chat_id, reuse_open=True)
+            current[item.chat_id] = shift.id
+            force_log(
+                f"Shift {item.shift_id} for chat {item.chat_id} is closed, opened shift {shift.id}",
+                "IncomeBatchWriter",
+            )
+        item.shift_id = current[item.chat_id]
+
+
+def write_income_batch(
+    db, items: list[PendingIncome], reassign_closed_shifts: bool = True
+) -> list[int | None]:
+    """
+    Write a batch of incomes in a single transaction.
+
+    Uses one existence check, one multi-row INSERT for income_balance and one
+    for revenue_sources. Returns the new id for each item, aligned with
+    ``items``; None means the (chat_id, message_id) row already existed or
+    appeared earlier in the same batch.
+
+    The new incomes are added to income_rollups in the same transaction. If
+    a row was written by another process between the existence check and the
+    insert (``uq_income_chat_message``), the keys are checked again with a
+    locking read and the INSERT is repeated skipping duplicates, so the row
+    is kept once; only the rows missing from that second check are added to
+    the rollups and get revenue sources, as the other process wrote its own.
+    Their items get None like any other duplicate.
+
+    Incomes pointing at a closed shift are moved to the chat's open shift
+    unless ``reassign_closed_shifts`` is False (historical backfills).
+    """
+    if not items:
+        return []
+
+    keys = list(dict.fromkeys(item.key for item in items))
+    key_columns = tuple_(IncomeBalance.chat_id, IncomeBalance.message_id)
+
+    existing = {
+        (chat_id, message_id)
+        for chat_id, message_id in db.query(
+            IncomeBalance.chat_id, IncomeBalance.message_id
+        ).filter(key_columns.in_(keys))
+    }
+
+    to_insert: dict[tuple[int, int], PendingIncome] = {}
+    for item in items:
+        if item.key not in existing and item.key not in to_insert:
+            to_insert[item.key] = item
+
+    try:
+        if not to_insert:
+            return [None] * len(items)
+
+        if reassign_closed_shifts:
+            _reassign_closed_shifts(db, list(to_insert.values()))
+
+        rows = [item.to_row() for item in to_insert.values()]
+        # Keys another process stored between the existence check and the insert
+        stored: set[tuple[int, int]] = set()
+        try:
+            with db.begin_nested():
+                db.execute(insert(IncomeBalance.__table__).values(rows))
+        except IntegrityError:
+            # Another process stored some of these messages since the existence
+            # check. The locking read sees its committed rows and keeps it from
+            # adding these keys until commit, so the rest are inserted here.
+            stored = {
+                (chat_id, message_id)
+                for chat_id, message_id in db.query(IncomeBalance.chat_id, IncomeBalance.message_id)
+                .filter(key_columns.in_(list(to_insert)))
+                .with_for_update()
+            }
+            db.execute(_insert_skipping_duplicates(db, rows))
+            add_to_rollups(db, [row for row in rows if (row["chat_id"], row["message_id"]) not in stored])
+        else:
+            add_to_rollups(db, rows)
+
+        new_ids: dict[tuple[int, int], int] = {}
+        for income_id, chat_id, message_id in (
+            db.query(IncomeBalance.id, IncomeBalance.chat_id, IncomeBalance.message_id)
+            .filter(key_columns.in_(list(to_insert)))
+            .order_by(IncomeBalance.id)
+        ):
+            new_ids[(chat_id, message_id)] = income_id
+
+        source_rows = [
+            {
+                "income_id": new_ids[key],
+                "source_name": source["source_name"],
+                "amount": source["amount"],
+                "amount_minor": to_minor_units(source["amount"]),
+                "currency": item.currency,
+                "shift": source.get("shift"),
+            }
+            for key, item in to_insert.items()
+            if key not in stored
+            for source in item.revenue_sources
+        ]
+        if source_rows:
+            with metrics.timer("ingest_revenue_source_insert_seconds"):
+                db.execute(insert(RevenueSource.__table__).values(source_rows))
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    results: list[int | None] = []
+    claimed: set[tuple[int, int]] = set()
+    for item in items:
+        if (
+            item.key in to_insert
+            and to_insert[item.key] is item
+            and item.key not in stored
+            and item.key not in claimed
+        ):
+            claimed.add(item.key)
+            results.append(new_ids[item.key])
+        else:
+            results.append(None)
+    return results
+
+
+class IncomeBatchWriter:
+    """
+    Collects incomes from every listener in the process and writes them in
+    micro-batches. A batch is flushed as soon as it holds ``max_rows`` items
+    or ``max_delay_ms`` after its first item arrived, whichever comes first.
+    Each caller awaits a future that resolves to its own income id.
+    """
+
+    def __init__(self, max_rows: int | None = None, max_delay_ms: int | None = None):
+        self.max_rows = max_rows or int(os.getenv("INCOME_BATCH_MAX_ROWS", "50"))
+        self.max_delay = (
+            max_delay_ms
+            if max_delay_ms is not None
+            else int(os.getenv("INCOME_BATCH_MAX_DELAY_MS", "20"))
+        ) / 1000
+        self._pending: list[tuple[PendingIncome, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    def submit(self, item: PendingIncome) -> asyncio.Future:
+        """Queue an income and return a future resolving to its id (None if duplicate)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_rows:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._start_flush)
+
+        return future
+
+    async def insert(self, item: PendingIncome) -> int | None:
+        """Queue an income and wait until its batch has been committed"""
+        return await self.submit(item)
+
+    async def flush(self) -> None:
+        """Write everything queued so far and wait for in-flight batches"""
+        self._start_flush()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._write(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _write(self, batch: list[tuple[PendingIncome, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        queued_shift_ids = [item.shift_id for item in items]
+        try:
+            with metrics.timer("ingest_batch_write_seconds"):
+                results = await run_in_db_session(lambda db: write_income_batch(db, items))
+            metrics.counter("ingest_batches_total", "Income batches flushed").inc()
+            metrics.counter("ingest_batched_incomes_total", "Incomes written in batches").inc(len(items))
+            force_log(
+                f"Flushed income batch: {len(items)} queued, "
+                f"{sum(1 for r in results if r is not None)} inserted",
+                "IncomeBatchWriter",
+                "DEBUG",
+            )
+        except Exception as batch_error:
+            if len(batch) == 1:
+                self._fail(batch, batch_error)
+                return
+            # Retry one by one so a single bad row does not fail its neighbours
+            force_log(
+                f"Batch of {len(batch)} failed ({batch_error}), retrying rows individually",
+                "IncomeBatchWriter",
+                "WARN",
+            )
+            for entry in batch:
+                await self._write([entry])
+            return
+
+        # Inserted or already stored, every key now exists in income_balance
+        index = get_recent_transaction_index()
+        for item in items:
+            index.record(item.chat_id, item.message_id, item.trx_id)
+
+        # Shifts reassigned by the writer replace stale registry entries
+        open_shifts = get_open_shift_registry()
+        for item, queued_shift_id in zip(items, queued_shift_ids):
+            if item.shift_id != queued_shift_id:
+                open_shifts.set(item.chat_id, item.shift_id)
+
+        for (_, future), income_id in zip(batch, results):
+            if not future.done():
+                future.set_result(income_id)
+
+    @staticmethod
+    def _fail(batch: list[tuple[PendingIncome, asyncio.Future]], error: Exception) -> None:
+        force_log(f"Error writing income batch: {error}", "IncomeBatchWriter", "ERROR")
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
+_income_batch_writer: Optional[IncomeBatchWriter] = None
+
+
+def get_income_batch_writer() -> IncomeBatchWriter:
+    """Get the process-wide income batch writer shared by all listeners"""
+    global _income_batch_writer
+    if _income_batch_writer is None:
+        _income_batch_writer = IncomeBatchWriter()
+    return _income_batch_writer
@@ -1,18 +1,46 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 import pytz
 
-from helper import (
-    DateUtils,
-    extract_s7pos_amount_and_currency,
-    extract_trx_id,
-)
+from common.enums import CurrencyEnum
+from helper import DateUtils
 from helper.logger_utils import force_log
-from helper.message_parser_optimized import extract_amount_currency_and_time
+from helper.message_parser_optimized import parse_payment
+from helper.metrics import metrics
+from helper.parsed_payment import ParsedPayment
 from services import ChatService, IncomeService
+from services.income_batch_writer import (
+    IncomeBatchWriter,
+    PendingIncome,
+    get_income_batch_writer,
+)
+
+
+def parse_income_message(
+        message_text: str,
+        origin_username: str,
+        trx_id: Optional[str] = None,
+) -> Optional[ParsedPayment]:
+    """Parse a bank notification once with the bot's parser; None if it has no amount"""
+    with metrics.timer("ingest_parse_seconds"):
+        payment = parse_payment(message_text, origin_username)
+
+    if payment is None or not payment.amount_minor:
+        return None
+    if trx_id:
+        payment.trx_id = trx_id
+    return payment
+
+
+def registration_cutoff(chat_created: datetime, buffer: timedelta = timedelta(minutes=1)) -> datetime:
+    """Messages sent before this UTC time predate the chat's registration"""
+    if chat_created.tzinfo is None:
+        chat_created = DateUtils.localize_datetime(chat_created)
+    return chat_created.astimezone(pytz.UTC) - buffer
 
 
 class IncomeMessageProcessor:
@@ -22,9 +50,11 @@ class IncomeMessageProcessor:
             self,
             income_service: Optional[IncomeService] = None,
             chat_service: Optional[ChatService] = None,
+            income_writer: Optional[IncomeBatchWriter] = None,
     ) -> None:
         self.income_service = income_service or IncomeService()
         self.chat_service = chat_service or ChatService()
+        self.income_writer = income_writer or get_income_batch_writer()
 
     async def store_message(
             self,
@@ -35,8 +65,11 @@ class IncomeMessageProcessor:
             origin_username: str,
             message_time: datetime,
             trx_id: Optional[str] = None,
-    ):
-        """Parse and persist a bank notification message."""
+    ) -> Optional[int]:
+        """Parse and persist a bank notification message.
+
+        Returns the new income id, or None when the message was skipped.
+        """
 
         force_log(
             f"Processor received message {message_id} from chat {chat_id} by '{origin_username}'",
@@ -59,12 +92,7 @@ class IncomeMessageProcessor:
         else:
             msg_time = msg_time.astimezone(pytz.UTC)
 
-        chat_created = chat.created_at
-        if chat_created.tzinfo is None:
-            chat_created = DateUtils.localize_datetime(chat_created)
-        chat_created_utc = chat_created.astimezone(pytz.UTC)
-
-        buffer_time = chat_created_utc - timedelta(minutes=1)
+        buffer_time = registration_cutoff(chat.created_at)
         if msg_time < buffer_time:
             force_log(
                 f"Message timestamp {msg_time} before registration buffer {buffer_time}, skipping",
@@ -72,62 +100,75 @@ class IncomeMessageProcessor:
             )
             return None
 
-        shifts_breakdown = None
-        parsed_income_date = DateUtils.now()
-        paid_by = None
-        paid_by_name = None
-
-        # Determine amount & currency based on origin bot
-        if origin_username == "s7pos_bot":
-            currency, amount = extract_s7pos_amount_and_currency(message_text)
-        else:
-            currency, amount, parsed_income_date, paid_by, paid_by_name = extract_amount_currency_and_time(message_text, origin_username)
-
-        if not (currency and amount):
+        payment = parse_income_message(message_text, origin_username, trx_id)
+        if payment is None:
             force_log(
                 f"No valid currency/amount found in message {message_id}, skipping",
                 "IncomeMessageProcessor",
             )
             return None
 
-        trx_id = trx_id or extract_trx_id(message_text)
-
-        is_duplicate = await self.income_service.check_duplicate_transaction(
-            chat_id, trx_id, message_id
-        )
+        with metrics.timer("ingest_duplicate_check_seconds"):
+            is_duplicate = await self.income_service.check_duplicate_transaction(
+                chat_id, payment.trx_id, message_id, message_time=msg_time
+            )
         if is_duplicate:
+            metrics.counter("ingest_duplicates_total", "Messages skipped as duplicates").inc()
             force_log(
-                f"Duplicate detected for chat_id={chat_id}, trx_id={trx_id}, message_id={message_id}",
+                f"Duplicate detected for chat_id={chat_id}, trx_id={payment.trx_id}, message_id={message_id}",
                 "IncomeMessageProcessor",
             )
             return None
 
         force_log(
-            f"Persisting income for chat {chat_id}: amount={amount}, currency={currency}",
+            f"Persisting income for chat {chat_id}: amount={payment.amount}, currency={payment.currency}",
             "IncomeMessageProcessor",
         )
 
-        result = await self.income_service.insert_income(
-            chat_id,
-            amount,
-            currency,
-            amount,
-            message_id,
-            message_text,
-            trx_id,
-            0,
-            chat.enable_shift,
-            origin_username,
-            paid_by,
-            paid_by_name,
-            None,
-            shifts_breakdown,
-            parsed_income_date,
+        shift_id = None
+        if chat.enable_shift:
+            shift_id = await self.income_service.ensure_active_shift(chat_id)
+
+        currency_code = CurrencyEnum.from_symbol(payment.currency) or payment.currency
+        insert_started = time.perf_counter()
+        income_id = await self.income_writer.insert(
+            PendingIncome(
+                chat_id=chat_id,
+                amount=payment.amount,
+                amount_minor=payment.amount_minor,
+                currency=currency_code,
+                original_amount=payment.amount,
+                message_id=message_id,
+                message=message_text,
+                trx_id=payment.trx_id,
+                income_date=payment.trx_time or DateUtils.now(),
+                shift_id=shift_id,
+                sent_by=origin_username,
+                paid_by=payment.paid_by,
+                paid_by_name=payment.paid_by_name,
+            )
         )
+        metrics.observe("ingest_insert_seconds", time.perf_counter() - insert_started)
+        if income_id is None:
+            metrics.counter("ingest_duplicates_total", "Messages skipped as duplicates").inc()
+            force_log(
+                f"Message {message_id} in chat {chat_id} was already stored, skipping",
+                "IncomeMessageProcessor",
+            )
+            return None
+
+        # Bank bot post -> committed row
+        metrics.observe(
+            "ingest_end_to_end_lag_seconds",
+            (datetime.now(pytz.UTC) - msg_time).total_seconds(),
+        )
+        metrics.counter("ingest_messages_stored_total", "Incomes stored by the listener").inc()
+
+        self.income_service.schedule_threshold_check(chat_id, shift_id or 0, payment.amount, currency_code)
 
         force_log(
-            f"Stored income id={result.id} for message {message_id}",
+            f"Stored income id={income_id} for message {message_id}",
             "IncomeMessageProcessor",
         )
 
-        return result
+        return income_id
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from models import IncomeBalance, RevenueSource
+
+# Columns read into an IncomeRecord; the message text is left out
+RECORD_COLUMNS = (
+    IncomeBalance.id,
+    IncomeBalance.chat_id,
+    IncomeBalance.amount,
+    IncomeBalance.amount_minor,
+    IncomeBalance.currency,
+    IncomeBalance.income_date,
+    IncomeBalance.shift_id,
+    IncomeBalance.trx_id,
+    IncomeBalance.sent_by,
+    IncomeBalance.paid_by,
+    IncomeBalance.paid_by_name,
+    IncomeBalance.note,
+)
+
+SOURCE_COLUMNS = (
+    RevenueSource.income_id,
+    RevenueSource.source_name,
+    RevenueSource.amount,
+    RevenueSource.amount_minor,
+    RevenueSource.currency,
+    RevenueSource.shift,
+)
+
+
+class RevenueSourceRecord:
+    """Read-only revenue source of an IncomeRecord"""
+
+    __slots__ = ("source_name", "amount", "amount_minor", "currency", "shift")
+
+    def __init__(self, source_name: str, amount: float, amount_minor: int, currency: str, shift: str | None):
+        self.source_name = source_name
+        self.amount = amount
+        self.amount_minor = amount_minor
+        self.currency = currency
+        self.shift = shift
+
+
+class IncomeRecord:
+    """
+    Read-only income row without the message text or ORM state. Has the
+    attributes of IncomeBalance that reports read; revenue_sources is empty
+    unless it was loaded.
+    """
+
+    __slots__ = tuple(column.key for column in RECORD_COLUMNS) + ("revenue_sources",)
+
+    def __init__(self, row: Sequence):
+        (
+            self.id,
+            self.chat_id,
+            self.amount,
+            self.amount_minor,
+            self.currency,
+            self.income_date,
+            self.shift_id,
+            self.trx_id,
+            self.sent_by,
+            self.paid_by,
+            self.paid_by_name,
+            self.note,
+        ) = row
+        self.revenue_sources: list[RevenueSourceRecord] = []
+
+    def __repr__(self) -> str:
+        return f"IncomeRecord(id={self.id}, amount={self.amount}, currency={self.currency!r})"
+
+
+def load_income_records(db, criteria: Sequence, with_sources: bool = False) -> list[IncomeRecord]:
+    """
+    IncomeRecords of the incomes matching ``criteria``. With ``with_sources``
+    their revenue sources are read by a second query on the same criteria,
+    which returns nothing for chats without breakdowns, instead of joining
+    them onto every income row.
+    """
+    records = [IncomeRecord(row) for row in db.query(*RECORD_COLUMNS).filter(*criteria)]
+    if with_sources and records:
+        by_id = {record.id: record for record in records}
+        sources = (
+            db.query(*SOURCE_COLUMNS)
+            .join(IncomeBalance, RevenueSource.income_id == IncomeBalance.id)
+            .filter(*criteria)
+            .order_by(RevenueSource.id)
+        )
+        for income_id, *values in sources:
+            record = by_id.get(income_id)
+            if record is not None:
+                record.revenue_sources.append(RevenueSourceRecord(*values))
+    return records
+
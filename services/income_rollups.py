@@ -0,0 +1,181 @@
+"""
+Maintenance of the income_rollups table.
+
+income_rollups holds SUM(amount_minor), COUNT(*) and the first/last income
+time of each chat's incomes per (local day, shift, currency, payer). The
+income writers add every new income to its rollup row in the transaction
+that inserts it (add_to_rollups), so a committed income is always counted
+exactly once. Jobs that rewrite stored incomes (main_reconcile.py) and
+main_rebuild_rollups.py recompute whole days from income_balance
+(rebuild_rollups), which is exact for days no writer is adding to at the
+same time.
+
+Reports read the rollups for days before today and aggregate today's rows
+directly (IncomeAggregateService.get_totals).
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import DateTime, delete, func, insert, literal, select
+from sqlalchemy.dialects import mysql, sqlite
+
+from helper import DateUtils
+from helper.date_ranges import between
+from helper.parsed_payment import to_minor_units
+from models import IncomeBalance, IncomeRollup
+
+# Unique key of a rollup row (uq_income_rollup_key)
+ROLLUP_KEY = ("chat_id", "local_date", "shift_id", "currency", "paid_by")
+
+
+def rollup_rows(incomes: Iterable[dict]) -> list[dict]:
+    """
+    Rollup rows of income rows (dicts with chat_id, income_date, shift_id,
+    currency, paid_by and amount_minor or amount), one per rollup key.
+    Aware income dates are taken as naive local time, as income_balance
+    stores them.
+    """
+    tz = DateUtils.get_timezone()
+    rows: dict[tuple, dict] = {}
+    for income in incomes:
+        income_date = income["income_date"]
+        if income_date.tzinfo is not None:
+            income_date = income_date.astimezone(tz).replace(tzinfo=None)
+        key = (
+            income["chat_id"],
+            income_date.date(),
+            income.get("shift_id") or 0,
+            income["currency"],
+            income.get("paid_by") or "",
+        )
+        amount_minor = income.get("amount_minor")
+        if amount_minor is None:
+            amount_minor = to_minor_units(income["amount"])
+
+        row = rows.get(key)
+        if row is None:
+            rows[key] = {
+                **dict(zip(ROLLUP_KEY, key)),
+                "amount_minor": amount_minor,
+                "income_count": 1,
+                "first_income": income_date,
+                "last_income": income_date,
+            }
+        else:
+            row["amount_minor"] += amount_minor
+            row["income_count"] += 1
+            row["first_income"] = min(row["first_income"], income_date)
+            row["last_income"] = max(row["last_income"], income_date)
+    return list(rows.values())
+
+
+def _upsert(db, rows: list[dict]):
+    """Multi-row INSERT that adds to the rollup rows that already exist;
+    None when the dialect has no upsert"""
+    table = IncomeRollup.__table__
+    now = DateUtils.now().replace(tzinfo=None)
+    rows = [{**row, "created_at": now, "updated_at": now} for row in rows]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(table).values(rows)
+        new = statement.inserted
+        return statement.on_duplicate_key_update(
+            amount_minor=table.c.amount_minor + new.amount_minor,
+            income_count=table.c.income_count + new.income_count,
+            first_income=func.least(table.c.first_income, new.first_income),
+            last_income=func.greatest(table.c.last_income, new.last_income),
+            updated_at=new.updated_at,
+        )
+    if dialect == "sqlite":
+        statement = sqlite.insert(table).values(rows)
+        new = statement.excluded
+        return statement.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY),
+            set_={
+                "amount_minor": table.c.amount_minor + new.amount_minor,
+                "income_count": table.c.income_count + new.income_count,
+                # Two-argument min()/max() are scalar functions in SQLite
+                "first_income": func.min(table.c.first_income, new.first_income),
+                "last_income": func.max(table.c.last_income, new.last_income),
+                "updated_at": new.updated_at,
+            },
+        )
+    return None
+
+
+def add_to_rollups(db, incomes: Iterable[dict]) -> None:
+    """
+    Count new income rows in their rollups; commits with the caller's
+    transaction. The incomes must already be inserted in that transaction:
+    on databases without an upsert the affected days are recomputed.
+    """
+    rows = rollup_rows(incomes)
+    if not rows:
+        return
+    statement = _upsert(db, rows)
+    if statement is None:
+        rebuild_days(db, {(row["chat_id"], row["local_date"]) for row in rows})
+    else:
+        db.execute(statement)
+
+
+def rebuild_rollups(db, chat_id: int, first_day: date, last_day: date) -> None:
+    """
+    Recompute a chat's rollups of ``first_day`` to ``last_day`` (inclusive)
+    from income_balance. Does not commit.
+    """
+    db.execute(
+        delete(IncomeRollup).where(
+            IncomeRollup.chat_id == chat_id,
+            IncomeRollup.local_date >= first_day,
+            IncomeRollup.local_date <= last_day,
+        )
+    )
+
+    now = DateUtils.now().replace(tzinfo=None)
+    keys = (
+        IncomeBalance.chat_id,
+        func.date(IncomeBalance.income_date),
+        func.coalesce(IncomeBalance.shift_id, 0),
+        IncomeBalance.currency,
+        func.coalesce(IncomeBalance.paid_by, ""),
+    )
+    grouped = (
+        select(
+            *keys,
+            func.sum(IncomeBalance.amount_minor),
+            func.count(),
+            func.min(IncomeBalance.income_date),
+            func.max(IncomeBalance.income_date),
+            literal(now, DateTime),
+            literal(now, DateTime),
+        )
+        .where(
+            IncomeBalance.chat_id == chat_id,
+            between(IncomeBalance.income_date, DateUtils.day_bounds(first_day)[0], DateUtils.day_bounds(last_day)[1]),
+        )
+        .group_by(*keys)
+    )
+    db.execute(
+        insert(IncomeRollup).from_select(
+            [
+                *ROLLUP_KEY,
+                "amount_minor",
+                "income_count",
+                "first_income",
+                "last_income",
+                "created_at",
+                "updated_at",
+            ],
+            grouped,
+        )
+    )
+
+
+def rebuild_days(db, chat_days: Iterable[tuple[int, date]]) -> None:
+    """Recompute the rollups of each (chat_id, day); does not commit"""
+    for chat_id, day in sorted(set(chat_days)):
+        rebuild_rollups(db, chat_id, day, day)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+from helper.logger_utils import force_log
+
+IngestJob = tuple[Callable[..., Awaitable[Any]], tuple]
+
+
+class IngestDispatcher:
+    """
+    Bounded worker pool between the Telethon listeners and the income
+    processor.
+
+    Each worker owns a queue of ``queue_size`` jobs; a job goes to worker
+    ``hash(chat_id) % workers`` so messages of one chat are handled in
+    arrival order while different chats run in parallel. When a worker's
+    queue is full ``submit`` waits for room. The Telethon clients are built
+    with ``sequential_updates=True`` and handle one update at a time, so
+    that wait stops the client from dispatching further updates until the
+    worker catches up; with concurrent updates Telethon would start a new
+    handler task per update and the waiting tasks would pile up instead.
+    ``backpressure_waits`` counts the submits that had to wait.
+    """
+
+    def __init__(self, workers: int | None = None, queue_size: int | None = None):
+        self.workers = workers or int(os.getenv("INGEST_WORKERS", "16"))
+        self.queue_size = queue_size or int(os.getenv("INGEST_QUEUE_SIZE", "200"))
+        self.stats_interval = float(os.getenv("INGEST_STATS_LOG_SECONDS", "60"))
+        self._queues: list[asyncio.Queue[IngestJob]] = []
+        self._tasks: list[asyncio.Task] = []
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.backpressure_waits = 0
+        self.max_depth = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._worker(index, queue), name=f"ingest-worker-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+        self._tasks.append(asyncio.create_task(self._report(), name="ingest-stats"))
+        force_log(
+            f"Ingest dispatcher started with {self.workers} workers, queue size {self.queue_size}",
+            "IngestDispatcher",
+        )
+
+    async def submit(self, chat_id: int, handler: Callable[..., Awaitable[Any]], *args) -> None:
+        """Queue ``handler(*args)`` on the chat's worker, waiting (and holding up the caller) while it is full"""
+        self.start()
+        queue = self._queues[hash(chat_id) % self.workers]
+        if queue.full():
+            self.backpressure_waits += 1
+            force_log(
+                f"Ingest queue full for chat {chat_id} ({queue.qsize()} jobs), waiting",
+                "IngestDispatcher",
+                "WARN",
+            )
+        await queue.put((handler, args))
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self.depth)
+
+    async def join(self) -> None:
+        """Wait until every queued job has been handled"""
+        for queue in self._queues:
+            await queue.join()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "depth": self.depth,
+            "depth_per_worker": [queue.qsize() for queue in self._queues],
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        force_log(
+            f"Ingest queue: depth={stats['depth']} (max {stats['max_depth']}), "
+            f"processed={stats['processed']}, failed={stats['failed']}, "
+            f"backpressure_waits={stats['backpressure_waits']}",
+            "IngestDispatcher",
+        )
+
+    async def _report(self) -> None:
+        last_submitted = -1
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            # Stay quiet while idle
+            if self.submitted != last_submitted or self.depth:
+                last_submitted = self.submitted
+                self.log_stats()
+
+    async def _worker(self, index: int, queue: asyncio.Queue[IngestJob]) -> None:
+        while True:
+            handler, args = await queue.get()
+            try:
+                await handler(*args)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                force_log(f"Ingest worker {index} job failed: {e}", "IngestDispatcher", "ERROR")
+            finally:
+                queue.task_done()
+
+
+_ingest_dispatcher: Optional[IngestDispatcher] = None
+
+
+def get_ingest_dispatcher() -> IngestDispatcher:
+    """Get the process-wide ingest dispatcher shared by all Telethon clients"""
+    global _ingest_dispatcher
+    if _ingest_dispatcher is None:
+        _ingest_dispatcher = IngestDispatcher()
+    return _ingest_dispatcher
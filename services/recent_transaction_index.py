@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytz
+
+from config import run_in_db_session
+from helper import DateUtils
+from helper.logger_utils import force_log
+from models import IncomeBalance
+
+# Allowed drift between Telegram message dates and the DB clock behind created_at
+CLOCK_SKEW = timedelta(minutes=5)
+
+
+class RecentTransactionIndex:
+    """
+    Bounded in-process index of recently stored income keys.
+
+    Tracks ``(chat_id, message_id)`` (with its trx_id) and ``(chat_id, trx_id)``
+    for rows stored in the last ``window_days``. Lookups answer:
+
+    - True: the message is already stored (certain, rows are never removed)
+    - False: the message is not stored by this process or before warm-up, and
+      was sent after anything the index has forgotten was stored, so the DB
+      check can be skipped
+    - None: unknown, fall back to the database
+
+    A False answer cannot see rows written by other Telethon processes after
+    warm-up; the ``uq_income_chat_message`` unique key and the duplicate-skipping
+    insert in the batch writer keep those cases from creating duplicate rows.
+    """
+
+    def __init__(self, max_entries: int | None = None, window_days: int | None = None):
+        self.max_entries = max_entries or int(os.getenv("DEDUP_INDEX_MAX_ENTRIES", "200000"))
+        self.window_days = window_days or int(os.getenv("DEDUP_INDEX_WINDOW_DAYS", "3"))
+        # (chat_id, message_id) -> (trx_id, stored_at UTC)
+        self._messages: OrderedDict[tuple[int, int], tuple[str | None, datetime]] = OrderedDict()
+        self._trx_ids: dict[tuple[int, str], int] = {}
+        # Messages newer than this are authoritative misses; None until warmed
+        self._coverage_start: datetime | None = None
+        self.hits = 0
+        self.misses = 0
+        self.unknown = 0
+
+    @property
+    def is_warm(self) -> bool:
+        return self._coverage_start is not None
+
+    async def warm(self) -> int:
+        """Load the keys of every income stored in the last ``window_days``"""
+        since = DateUtils.now() - timedelta(days=self.window_days)
+
+        def _load(db):
+            return (
+                db.query(
+                    IncomeBalance.chat_id,
+                    IncomeBalance.message_id,
+                    IncomeBalance.trx_id,
+                    IncomeBalance.created_at,
+                )
+                .filter(IncomeBalance.created_at >= since.replace(tzinfo=None))
+                .order_by(IncomeBalance.id)
+                .all()
+            )
+
+        rows = await run_in_db_session(_load)
+
+        # Set before loading so evictions during the load move it forward
+        coverage_start = since.astimezone(pytz.UTC)
+        if self._coverage_start is None or coverage_start > self._coverage_start:
+            self._coverage_start = coverage_start
+        created_utc = DateUtils.to_utc_many(row[3] for row in rows)
+        for (chat_id, message_id, trx_id, _), created_at in zip(rows, created_utc):
+            self.record(chat_id, message_id, trx_id, created_at)
+        force_log(
+            f"Recent transaction index warmed with {len(rows)} rows from the last {self.window_days} days",
+            "RecentTransactionIndex",
+        )
+        return len(rows)
+
+    def lookup(
+        self,
+        chat_id: int,
+        message_id: int,
+        trx_id: str | None = None,
+        message_time: datetime | None = None,
+    ) -> bool | None:
+        """Check whether a message is already stored (see class docstring)"""
+        entry = self._messages.get((chat_id, message_id))
+        if entry is not None:
+            self._messages.move_to_end((chat_id, message_id))
+            stored_trx_id = entry[0]
+            # Mirror check_duplicate_transaction: with a trx_id, both must match
+            if trx_id and stored_trx_id != trx_id:
+                if stored_trx_id is None:
+                    # Recorded without its trx_id, let the DB decide
+                    self.unknown += 1
+                    return None
+                self.misses += 1
+                return False
+            self.hits += 1
+            return True
+
+        if (
+            self._coverage_start is not None
+            and message_time is not None
+            and self._to_utc(message_time) > self._coverage_start + CLOCK_SKEW
+        ):
+            self.misses += 1
+            return False
+
+        self.unknown += 1
+        return None
+
+    def has_trx_id(self, chat_id: int, trx_id: str | None) -> bool | None:
+        """True when the trx_id is known for the chat, None when unknown"""
+        if trx_id and (chat_id, trx_id) in self._trx_ids:
+            return True
+        return None
+
+    def record(
+        self,
+        chat_id: int,
+        message_id: int,
+        trx_id: str | None = None,
+        stored_at: datetime | None = None,
+    ) -> None:
+        """Remember a stored income; evicts the least recently used key when full"""
+        key = (chat_id, message_id)
+        self._messages[key] = (trx_id, stored_at or datetime.now(pytz.UTC))
+        self._messages.move_to_end(key)
+        if trx_id:
+            self._trx_ids[(chat_id, trx_id)] = message_id
+
+        while len(self._messages) > self.max_entries:
+            (old_chat_id, _), (old_trx_id, old_stored_at) = self._messages.popitem(last=False)
+            if old_trx_id:
+                self._trx_ids.pop((old_chat_id, old_trx_id), None)
+            # Anything at or before this point may have been forgotten
+            if self._coverage_start is not None and old_stored_at > self._coverage_start:
+                self._coverage_start = old_stored_at
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._messages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "unknown": self.unknown,
+            "coverage_start": self._coverage_start,
+        }
+
+    @staticmethod
+    def _to_utc(value: datetime) -> datetime:
+        if value.tzinfo is None:
+            value = DateUtils.localize_datetime(value)
+        return value.astimezone(pytz.UTC)
+
+
+_recent_transaction_index: Optional[RecentTransactionIndex] = None
+
+
+def get_recent_transaction_index() -> RecentTransactionIndex:
+    """Get the process-wide recent transaction index"""
+    global _recent_transaction_index
+    if _recent_transaction_index is None:
+        _recent_transaction_index = RecentTransactionIndex()
+    return _recent_transaction_index
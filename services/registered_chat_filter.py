@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import weakref
+from datetime import datetime, timedelta
+from typing import Awaitable, Iterable
+
+from config import run_in_db_session
+from helper.logger_utils import force_log
+from models import Chat
+
+# Re-read rows updated slightly before the watermark so a transaction that
+# committed late is not missed
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+_filters: "weakref.WeakSet[RegisteredChatFilter]" = weakref.WeakSet()
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+class RegisteredChatFilter:
+    """
+    In-memory set of registered chat ids, used as a
+    ``events.NewMessage(func=...)`` filter so messages from groups that are
+    not customers are dropped before any work is done.
+
+    Every account ingests any registered chat; which account verifies which
+    chats is left to MessageVerificationScheduler. The set is refreshed
+    incrementally by ``updated_at``, fully every ``full_refresh_every``
+    cycles, and immediately when ChatService changes a chat in this process.
+    A chat id that is not in the set yet (e.g. registered by another process
+    since the last refresh) is checked with ChatService.chat_exists, which
+    caches misses briefly, before its message is dropped. Until the first
+    load succeeds every event is let through.
+    """
+
+    def __init__(self, refresh_seconds: float | None = None, full_refresh_every: int = 20):
+        self.refresh_seconds = (
+            refresh_seconds
+            if refresh_seconds is not None
+            else float(os.getenv("REGISTERED_CHAT_REFRESH_SECONDS", "30"))
+        )
+        self.full_refresh_every = full_refresh_every
+        self.chat_ids: set[int] = set()
+        self.is_loaded = False
+        self.dropped = 0
+        self._watermark: datetime | None = None
+        _filters.add(self)
+
+    def __call__(self, event) -> bool | Awaitable[bool]:
+        # Telethon awaits the result when it is awaitable, so only chats
+        # missing from the set pay for a lookup
+        if not self.is_loaded or event.chat_id in self.chat_ids:
+            return True
+        return self._check_unknown(event.chat_id)
+
+    async def _check_unknown(self, chat_id: int) -> bool:
+        """Let a chat registered since the last refresh through and remember it"""
+        from services.chat_service import ChatService
+
+        if await ChatService.chat_exists(chat_id):
+            self.chat_ids.add(int(chat_id))
+            return True
+        self.dropped += 1
+        return False
+
+    def apply(self, chat_ids: Iterable[int]) -> None:
+        """Add registered chats"""
+        self.chat_ids.update(int(chat_id) for chat_id in chat_ids)
+
+    async def refresh(self, full: bool = False) -> None:
+        """Load chats changed since the last refresh (everything when ``full``)"""
+        since = None if full or self._watermark is None else self._watermark - WATERMARK_OVERLAP
+
+        def _load(db):
+            query = db.query(Chat.chat_id, Chat.updated_at)
+            if since is not None:
+                query = query.filter(Chat.updated_at >= since)
+            return query.all()
+
+        rows = await run_in_db_session(_load)
+        if since is None:
+            self.chat_ids = set()
+        self.apply(chat_id for chat_id, _ in rows)
+        for _, updated_at in rows:
+            if updated_at and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+
+        if not self.is_loaded:
+            force_log(f"Registered chat filter loaded {len(self.chat_ids)} chats", "RegisteredChatFilter")
+        self.is_loaded = True
+
+    async def refresh_chats(self, chat_ids: Iterable[int]) -> None:
+        """Re-read specific chats, e.g. right after they were registered"""
+        chat_ids = list(chat_ids)
+        rows = await run_in_db_session(
+            lambda db: db.query(Chat.chat_id).filter(Chat.chat_id.in_(chat_ids)).all()
+        )
+        found = {int(row[0]) for row in rows}
+        self.apply(found)
+        # Chats that no longer exist (e.g. migrated to a new chat_id)
+        self.chat_ids.difference_update(set(chat_ids) - found)
+
+    async def run(self) -> None:
+        """Refresh periodically until cancelled"""
+        cycle = 0
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            cycle += 1
+            try:
+                await self.refresh(full=cycle % self.full_refresh_every == 0)
+            except Exception as e:
+                force_log(f"Error refreshing registered chats: {e}", "RegisteredChatFilter", "ERROR")
+
+
+def notify_chat_changed(*chat_ids: int) -> None:
+    """Refresh the given chats in every filter of this process (fire and forget)"""
+    if not _filters:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    for chat_filter in list(_filters):
+        if chat_filter.is_loaded:
+            task = loop.create_task(_refresh_chats_safely(chat_filter, chat_ids))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _refresh_chats_safely(chat_filter: RegisteredChatFilter, chat_ids) -> None:
+    try:
+        await chat_filter.refresh_chats(chat_ids)
+    except Exception as e:
+        force_log(f"Error refreshing chats {chat_ids}: {e}", "RegisteredChatFilter", "ERROR")
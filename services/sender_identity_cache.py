@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from helper.bot_parsers_registry import LISTENER_ALLOWED_BOTS
+
+
+class SenderIdentity:
+    """Resolved sender of a message, reduced to what the listener needs"""
+
+    __slots__ = ("username", "is_bot", "allowed", "expires_at")
+
+    def __init__(self, username: str, is_bot: bool, allowed: bool, expires_at: float):
+        self.username = username
+        self.is_bot = is_bot
+        self.allowed = allowed
+        self.expires_at = expires_at
+
+
+class SenderIdentityCache:
+    """
+    Process-wide cache of sender_id -> (username, is_bot) shared by every
+    Telethon client. Telegram user ids are global, so a sender resolved once
+    is known to all listeners; further messages from it are accepted or
+    rejected without ``event.get_sender()``.
+    """
+
+    def __init__(
+        self,
+        allowed_usernames: Iterable[str] = LISTENER_ALLOWED_BOTS,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+    ):
+        self.allowed_usernames = frozenset(allowed_usernames)
+        self.max_entries = max_entries or int(os.getenv("SENDER_CACHE_MAX_ENTRIES", "50000"))
+        # Re-resolve occasionally in case a sender changes username
+        self.ttl = ttl if ttl is not None else float(os.getenv("SENDER_CACHE_TTL_SECONDS", "86400"))
+        self._identities: OrderedDict[int, SenderIdentity] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sender_id: int) -> SenderIdentity | None:
+        identity = self._identities.get(sender_id)
+        if identity is None or identity.expires_at <= time.monotonic():
+            self.misses += 1
+            return None
+        self._identities.move_to_end(sender_id)
+        self.hits += 1
+        return identity
+
+    def remember(self, sender_id: int, sender: Any) -> SenderIdentity:
+        """Cache the entity returned by ``get_sender()``; an unresolved (None)
+        sender is rejected but not cached so it is retried next time"""
+        username = getattr(sender, "username", "") or ""
+        is_bot = bool(getattr(sender, "bot", False))
+        identity = SenderIdentity(
+            username=username,
+            is_bot=is_bot,
+            allowed=username in self.allowed_usernames,
+            expires_at=time.monotonic() + self.ttl,
+        )
+        if sender is None:
+            return identity
+        self._identities[sender_id] = identity
+        self._identities.move_to_end(sender_id)
+        while len(self._identities) > self.max_entries:
+            self._identities.popitem(last=False)
+        return identity
+
+    @property
+    def allowed_sender_ids(self) -> set[int]:
+        """Ids of payment bots seen so far"""
+        return {sender_id for sender_id, identity in self._identities.items() if identity.allowed}
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._identities),
+            "allowed_bots": len(self.allowed_sender_ids),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_sender_identity_cache: Optional[SenderIdentityCache] = None
+
+
+def get_sender_identity_cache() -> SenderIdentityCache:
+    """Get the process-wide sender identity cache"""
+    global _sender_identity_cache
+    if _sender_identity_cache is None:
+        _sender_identity_cache = SenderIdentityCache()
+    return _sender_identity_cache
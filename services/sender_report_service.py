@@ -1,13 +1,13 @@
 from collections import defaultdict
 from datetime import date, datetime
 
-from sqlalchemy import func
-
 from config import get_db_session
 from helper.daily_report_helper import get_khmer_month_name, format_time_12hour
+from helper.date_ranges import on_day
 from helper.dateutils import DateUtils
 from helper.logger_utils import force_log
 from models.income_balance_model import IncomeBalance
+from services.income_records import IncomeRecord, load_income_records
 from services.sender_category_service import SenderCategoryService
 from services.sender_config_service import SenderConfigService
 
@@ -74,23 +74,19 @@ class SenderReportService:
 
     async def _get_daily_transactions(
         self, chat_id: int, report_date: date
-    ) -> list[IncomeBalance]:
+    ) -> list[IncomeRecord]:
         """Get all transactions for a specific date"""
         with get_db_session() as session:
             try:
                 # Query all transactions for the given date
-                transactions = (
-                    session.query(IncomeBalance)
-                    .filter(
+                transactions = load_income_records(
+                    session,
+                    [
                         IncomeBalance.chat_id == chat_id,
-                        func.date(IncomeBalance.income_date) == report_date,
-                    )
-                    .all()
+                        on_day(IncomeBalance.income_date, report_date),
+                    ],
                 )
 
-                # Detach from session
-                session.expunge_all()
-
                 return transactions
 
             except Exception as e:
@@ -105,7 +101,7 @@ class SenderReportService:
                 session.close()
 
     def _group_transactions_by_sender(
-        self, transactions: list[IncomeBalance], configured_account_numbers: set[str]
+        self, transactions: list[IncomeRecord], configured_account_numbers: set[str]
     ) -> dict:
         """
         Group transactions into three categories:
@@ -129,7 +125,7 @@ class SenderReportService:
 
         return grouped
 
-    def _calculate_totals(self, transactions: list[IncomeBalance]) -> dict[str, float]:
+    def _calculate_totals(self, transactions: list[IncomeRecord]) -> dict[str, float]:
         """Calculate currency totals for a list of transactions"""
         totals = defaultdict(float)
 
@@ -394,23 +390,19 @@ class SenderReportService:
 
     async def _get_sender_transactions(
         self, chat_id: int, sender_account_number: str, report_date: date
-    ) -> list[IncomeBalance]:
+    ) -> list[IncomeRecord]:
         """Get all transactions for a specific sender on a specific date"""
         with get_db_session() as session:
             try:
-                transactions = (
-                    session.query(IncomeBalance)
-                    .filter(
+                transactions = load_income_records(
+                    session,
+                    [
                         IncomeBalance.chat_id == chat_id,
                         IncomeBalance.paid_by == sender_account_number,
-                        func.date(IncomeBalance.income_date) == report_date,
-                    )
-                    .all()
+                        on_day(IncomeBalance.income_date, report_date),
+                    ],
                 )
 
-                # Detach from session
-                session.expunge_all()
-
                 return transactions
 
             except Exception as e:
@@ -528,23 +520,19 @@ class SenderReportService:
 
     async def _get_transactions_by_date_range(
         self, chat_id: int, start_date: datetime, end_date: datetime
-    ) -> list[IncomeBalance]:
+    ) -> list[IncomeRecord]:
         """Get all transactions for a date range"""
         with get_db_session() as session:
             try:
-                transactions = (
-                    session.query(IncomeBalance)
-                    .filter(
+                transactions = load_income_records(
+                    session,
+                    [
                         IncomeBalance.chat_id == chat_id,
                         IncomeBalance.income_date >= start_date,
                         IncomeBalance.income_date < end_date,
-                    )
-                    .all()
+                    ],
                 )
 
-                # Detach from session
-                session.expunge_all()
-
                 return transactions
 
             except Exception as e:
@@ -1,55 +1,166 @@
 import asyncio
+import os
+import time
 from datetime import date
+from typing import Optional
 
 from sqlalchemy import func
 
-from config import get_db_session
+from config import get_db_session, run_in_db_session
 from helper import force_log, DateUtils
-from models import Shift
+from helper.date_ranges import in_month, on_day
+from helper.parsed_payment import from_minor_units
+from models import Chat, Shift
+
+
+class OpenShiftRegistry:
+    """
+    Process-wide map of chat_id -> id of its open shift.
+
+    Kept current by ShiftService on create, close and auto-close in this
+    process. Shifts closed by another process (bots, auto-close scheduler) are
+    picked up once the entry's ``ttl`` expires; the income batch writer also
+    re-checks shift ids before inserting.
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("OPEN_SHIFT_TTL_SECONDS", "30"))
+        # chat_id -> (shift_id, expires_at)
+        self._entries: dict[int, tuple[int, float]] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def get(self, chat_id: int) -> int | None:
+        entry = self._entries.get(chat_id)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[chat_id]
+            return None
+        return entry[0]
+
+    def set(self, chat_id: int, shift_id: int) -> None:
+        self._entries[chat_id] = (shift_id, time.monotonic() + self.ttl)
+
+    def discard(self, chat_id: int, shift_id: int | None = None) -> None:
+        """Forget the chat's open shift; with ``shift_id``, only if it still matches"""
+        entry = self._entries.get(chat_id)
+        if entry is not None and (shift_id is None or entry[0] == shift_id):
+            del self._entries[chat_id]
+
+    def lock(self, chat_id: int) -> asyncio.Lock:
+        """Per-chat lock serialising shift creation in this process"""
+        lock = self._locks.get(chat_id)
+        if lock is None:
+            lock = self._locks[chat_id] = asyncio.Lock()
+        return lock
+
+
+_open_shift_registry: Optional[OpenShiftRegistry] = None
+
+
+def get_open_shift_registry() -> OpenShiftRegistry:
+    """Get the process-wide open-shift registry"""
+    global _open_shift_registry
+    if _open_shift_registry is None:
+        _open_shift_registry = OpenShiftRegistry()
+    return _open_shift_registry
+
+
+def create_shift_in_session(db, chat_id: int, reuse_open: bool = False) -> Shift:
+    """Create a shift starting now in ``db`` and commit it. With
+    ``reuse_open``, the chat's open shift is returned instead when one exists."""
+    current_time = DateUtils.now()
+
+    # Lock the chat row so creators in other processes are serialised too
+    db.query(Chat.id).filter(Chat.chat_id == chat_id).with_for_update().first()
+
+    if reuse_open:
+        open_shift = (
+            db.query(Shift)
+            .filter(Shift.chat_id == chat_id, Shift.is_closed == False)
+            .order_by(Shift.start_time.desc())
+            .first()
+        )
+        if open_shift:
+            # The row lock is released when the caller's transaction ends
+            return open_shift
+
+    # Get the highest shift number for this chat for today (not global)
+    last_shift_number = (
+        db.query(func.max(Shift.number))
+        .filter(
+            Shift.chat_id == chat_id,
+            Shift.shift_date == current_time.date(),
+        )
+        .scalar()
+        or 0
+    )
+
+    new_shift = Shift(
+        chat_id=chat_id,
+        shift_date=current_time.date(),
+        number=last_shift_number + 1,
+        start_time=current_time,
+        is_closed=False,
+    )
+
+    db.add(new_shift)
+    db.commit()
+    db.refresh(new_shift)
+    return new_shift
 
 
 class ShiftService:
     def __init__(self):
         # Lock to prevent race conditions when closing shifts
         self._close_shift_locks = {}
+        self.open_shifts = get_open_shift_registry()
+
     async def create_shift(self, chat_id: int) -> Shift:
         """Create a new shift starting now"""
-        current_time = DateUtils.now()
-
-        with get_db_session() as db:
-            # Get the highest shift number for this chat for today (not global)
-            last_shift_number = (
-                db.query(func.max(Shift.number))
-                .filter(
-                    Shift.chat_id == chat_id,
-                    Shift.shift_date == current_time.date(),
-                )
-                .scalar()
-                or 0
-            )
-
-            new_shift = Shift(
-                chat_id=chat_id,
-                shift_date=current_time.date(),
-                number=last_shift_number + 1,
-                start_time=current_time,
-                is_closed=False,
-            )
+        async with self.open_shifts.lock(chat_id):
+            return await self._create_shift(chat_id)
 
-            db.add(new_shift)
-            db.commit()
-            db.refresh(new_shift)
-            return new_shift
+    async def _create_shift(self, chat_id: int, reuse_open: bool = False) -> Shift:
+        """Create a shift; the caller must hold ``open_shifts.lock(chat_id)``.
+        With ``reuse_open``, an open shift created meanwhile (e.g. by another
+        process) is returned instead of opening a second one."""
+        shift = await run_in_db_session(lambda db: create_shift_in_session(db, chat_id, reuse_open))
+        self.open_shifts.set(chat_id, shift.id)
+        return shift
 
     async def get_current_shift(self, chat_id: int) -> Shift | None:
         """Get the current open shift (regardless of date)"""
-        with get_db_session() as db:
-            return (
-                db.query(Shift)
-                .filter(Shift.chat_id == chat_id, Shift.is_closed == False)
-                .order_by(Shift.start_time.desc())
-                .first()
-            )
+        shift = await run_in_db_session(
+            lambda db: db.query(Shift)
+            .filter(Shift.chat_id == chat_id, Shift.is_closed == False)
+            .order_by(Shift.start_time.desc())
+            .first()
+        )
+        if shift:
+            self.open_shifts.set(chat_id, shift.id)
+        else:
+            self.open_shifts.discard(chat_id)
+        return shift
+
+    async def ensure_open_shift_id(self, chat_id: int) -> int:
+        """Id of the chat's open shift, creating one if none is open.
+        Served from the open-shift registry when possible."""
+        shift_id = self.open_shifts.get(chat_id)
+        if shift_id:
+            return shift_id
+
+        async with self.open_shifts.lock(chat_id):
+            # Another message may have opened the shift while we waited
+            shift_id = self.open_shifts.get(chat_id)
+            if shift_id:
+                return shift_id
+
+            shift = await self.get_current_shift(chat_id)
+            if shift is None:
+                shift = await self._create_shift(chat_id, reuse_open=True)
+                force_log(f"Created new shift {shift.id} for chat {chat_id}", "ShiftService")
+            return shift.id
 
     async def get_shift_by_id(self, shift_id: int) -> Shift | None:
         with get_db_session() as db:
@@ -85,6 +196,7 @@ class ShiftService:
                     shift.is_closed = True
                     db.commit()
                     db.refresh(shift)
+                    self.open_shifts.discard(shift.chat_id, shift_id)
                     return shift
                     
                 force_log(f"CLOSE_SHIFT: Successfully closing shift {shift_id} (was open since {shift.start_time})", "ShiftService")
@@ -92,6 +204,7 @@ class ShiftService:
                 shift.is_closed = True
                 db.commit()
                 db.refresh(shift)
+                self.open_shifts.discard(shift.chat_id, shift_id)
                 
                 # Clean up the lock after successful close to prevent memory leaks
                 if shift_id in self._close_shift_locks:
@@ -126,13 +239,11 @@ class ShiftService:
     async def get_shifts_by_start_date(self, chat_id: int, start_date: date) -> list[Shift]:
         """Get shifts that started on a specific date (for admin bot)"""
         with get_db_session() as db:
-            from sqlalchemy import func
-            
             return (
                 db.query(Shift)
                 .filter(
                     Shift.chat_id == chat_id,
-                    func.date(Shift.start_time) == start_date
+                    on_day(Shift.start_time, start_date),
                 )
                 .order_by(Shift.id)
                 .all()
@@ -152,38 +263,30 @@ class ShiftService:
 
     async def get_shift_income_summary(self, shift_id: int, chat_id: int) -> dict:
         """Get income summary for a specific shift and chat"""
-        with get_db_session() as db:
-            from models.income_balance_model import IncomeBalance
-
-            # Get all income records for this shift and chat
-            income_records = (
-                db.query(IncomeBalance)
-                .filter(
-                    IncomeBalance.shift_id == shift_id, IncomeBalance.chat_id == chat_id
-                )
-                .all()
-            )
-
-            if not income_records:
-                return {"total_amount": 0.0, "transaction_count": 0, "currencies": {}}
-
-            total_amount = sum(record.amount for record in income_records)
-            transaction_count = len(income_records)
-
-            # Group by currency
-            currencies = {}
-            for record in income_records:
-                currency = record.currency or "USD"
-                if currency not in currencies:
-                    currencies[currency] = {"amount": 0.0, "count": 0}
-                currencies[currency]["amount"] += record.amount
-                currencies[currency]["count"] += 1
-
-            return {
-                "total_amount": total_amount,
-                "transaction_count": transaction_count,
-                "currencies": currencies,
-            }
+        from services.income_aggregate_service import IncomeAggregateService
+
+        # Summed by the database in exact minor units; float sums drift on large totals.
+        # Days of the shift before today come from the rollups.
+        totals = await IncomeAggregateService().get_totals(chat_id, shift_ids=[shift_id])
+
+        if not totals:
+            return {"total_amount": 0.0, "transaction_count": 0, "currencies": {}}
+
+        currencies = {}
+        for total in totals:
+            currency = total.currency or "USD"
+            if currency not in currencies:
+                currencies[currency] = {"amount_minor": 0, "count": 0}
+            currencies[currency]["amount_minor"] += total.amount_minor
+            currencies[currency]["count"] += total.count
+        for data in currencies.values():
+            data["amount"] = from_minor_units(data.pop("amount_minor"))
+
+        return {
+            "total_amount": from_minor_units(sum(total.amount_minor for total in totals)),
+            "transaction_count": sum(total.count for total in totals),
+            "currencies": currencies,
+        }
 
     async def get_recent_dates_with_shifts(
         self, chat_id: int, days: int = 3
@@ -224,24 +327,11 @@ class ShiftService:
     ) -> list[date]:
         """Get all dates with shifts in a specific month"""
         with get_db_session() as db:
-            from sqlalchemy import func, and_
-            from datetime import datetime
-            
-            # Create start and end of month
-            start_of_month = datetime(year, month, 1)
-            if month == 12:
-                end_of_month = datetime(year + 1, 1, 1)
-            else:
-                end_of_month = datetime(year, month + 1, 1)
-            
             dates = (
                 db.query(func.date(Shift.start_time))
                 .filter(
-                    and_(
-                        Shift.chat_id == chat_id,
-                        Shift.start_time >= start_of_month,
-                        Shift.start_time < end_of_month
-                    )
+                    Shift.chat_id == chat_id,
+                    in_month(Shift.start_time, date(year, month, 1)),
                 )
                 .distinct()
                 .order_by(func.date(Shift.start_time).desc())
@@ -307,8 +397,10 @@ class ShiftService:
 
                 should_close = False
 
-                # Check time-based auto close with multiple times
+                # Check time-based auto close with multiple times, read in the chat's timezone
                 auto_close_times = config.get_auto_close_times_list()
+                chat_tz = DateUtils.timezone_for(config.timezone)
+                chat_today = current_time.astimezone(chat_tz).date()
                 if auto_close_times:
                     for time_str in auto_close_times:
                         try:
@@ -321,10 +413,10 @@ class ShiftService:
                             from datetime import time
 
                             close_time = datetime.combine(
-                                current_time.date(), time(hour, minute)
+                                chat_today, time(hour, minute)
                             )
                             # Make timezone aware
-                            close_time = DateUtils.localize_datetime(close_time)
+                            close_time = DateUtils.localize_datetime(close_time, chat_tz)
 
                             # If current time is past the auto-close time and shift started before it
                             shift_start = DateUtils.localize_datetime(shift.start_time)
@@ -352,8 +444,10 @@ class ShiftService:
                 db.commit()
                 for shift in closed_shifts:
                     db.refresh(shift)
+                    self.open_shifts.discard(shift.chat_id, shift.id)
 
                 # Create new shifts for each closed shift (same as manual close behavior)
+                new_shifts = []
                 for i, closed_shift in enumerate(closed_shifts):
                     try:
                         # Get the highest shift number for this chat for today (same logic as create_shift)
@@ -376,6 +470,7 @@ class ShiftService:
                             is_closed=False,
                         )
                         db.add(new_shift)
+                        new_shifts.append(new_shift)
                         force_log(
                             f"Auto-created new shift #{new_shift.number} for chat {closed_shift.chat_id} after closing shift #{closed_shift.number}",
                             "ShiftService"
@@ -389,6 +484,8 @@ class ShiftService:
 
                 # Commit the new shifts
                 db.commit()
+                for new_shift in new_shifts:
+                    self.open_shifts.set(new_shift.chat_id, new_shift.id)
 
         return closed_shift_info
 
@@ -409,8 +506,10 @@ class ShiftService:
 
         should_close = False
         current_time = DateUtils.now()
+        chat_tz = DateUtils.timezone_for(config.timezone)
+        chat_today = current_time.astimezone(chat_tz).date()
 
-        # Check time-based auto close with multiple times
+        # Check time-based auto close with multiple times, read in the chat's timezone
         auto_close_times = config.get_auto_close_times_list()
         if auto_close_times:
             for time_str in auto_close_times:
@@ -424,9 +523,9 @@ class ShiftService:
                     from datetime import time
 
                     close_time = datetime.combine(
-                        current_time.date(), time(hour, minute)
+                        chat_today, time(hour, minute)
                     )
-                    close_time = DateUtils.localize_datetime(close_time)
+                    close_time = DateUtils.localize_datetime(close_time, chat_tz)
 
                     shift_start = DateUtils.localize_datetime(current_shift.start_time)
                     if current_time >= close_time and shift_start < close_time:
@@ -15,6 +15,7 @@ from telegram.ext import (
 from common.enums import ServicePackage
 from handlers.business_event_handler import BusinessEventHandler
 from helper import force_log, DateUtils
+from helper.bot_parsers_registry import FORWARD_ALLOWED_BOTS
 from services import ChatService, UserService, GroupPackageService
 from services.handlers.business_forward_handler import BusinessForwardHandler
 from services.private_bot_group_binding_service import PrivateBotGroupBindingService
@@ -46,22 +47,7 @@ class AutosumBusinessBot:
         self.group_package_service = GroupPackageService()
         self.forward_handler = BusinessForwardHandler(
             allowed_forwarders={"Pandacybercafe_admin","chanhengsng","HK_688"},
-            allowed_bots={
-                "ACLEDABankBot",
-                "PayWayByABA_bot",
-                "PLBITBot",
-                "CanadiaMerchant_bot",
-                "HLBCAM_Bot",
-                "vattanac_bank_merchant_prod_bot",
-                "CPBankBot",
-                "SathapanaBank_bot",
-                "chipmongbankpaymentbot",
-                "prasac_merchant_payment_bot",
-                "AMKPlc_bot",
-                "prince_pay_bot",
-                "s7pos_bot",
-                "CCUBank_bot"
-            },
+            allowed_bots=FORWARD_ALLOWED_BOTS,
         )
         force_log("AutosumBusinessBot initialized with token", "AutosumBusinessBot")
 
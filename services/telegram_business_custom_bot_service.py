@@ -452,7 +452,7 @@ class AutosumBusinessCustomBot:
         try:
             if query.data == "daily_summary" or query.data == "current_date_summary":
                 # Get today's income with sources
-                incomes = await income_service.get_today_income_with_sources(chat_id)
+                incomes = await income_service.get_today_income_with_sources(chat_id, slim=True)
                 title = "Today's Summary"
 
                 if incomes:
@@ -463,7 +463,7 @@ class AutosumBusinessCustomBot:
 
             elif query.data == "weekly_summary":
                 # Get this week's income with sources
-                incomes = await income_service.get_weekly_income_with_sources(chat_id)
+                incomes = await income_service.get_weekly_income_with_sources(chat_id, slim=True)
                 title = "This Week's Summary"
 
                 if incomes:
@@ -474,7 +474,7 @@ class AutosumBusinessCustomBot:
 
             elif query.data == "monthly_summary":
                 # Get this month's income with sources
-                incomes = await income_service.get_monthly_income_with_sources(chat_id)
+                incomes = await income_service.get_monthly_income_with_sources(chat_id, slim=True)
                 title = "This Month's Summary"
 
                 if incomes:
@@ -6,9 +6,13 @@ from telethon.errors import PersistentTimestampInvalidError
 
 from common.enums import ServicePackage
 from helper.logger_utils import force_log
+from helper.metrics import metrics
 from schedulers import MessageVerificationScheduler
 from services import ChatService, IncomeService, UserService, GroupPackageService
 from services.income_message_processor import IncomeMessageProcessor
+from services.ingest_dispatcher import get_ingest_dispatcher
+from services.registered_chat_filter import RegisteredChatFilter
+from services.sender_identity_cache import get_sender_identity_cache
 from services.threshold_warning_service import ThresholdWarningService
 
 
@@ -21,6 +25,10 @@ class TelethonClientService:
         self.user_service = UserService()
         self.group_package_service = GroupPackageService()
         self.mobile_number: str | None = None
+        self.sender_cache = get_sender_identity_cache()
+        self.chat_filter: RegisteredChatFilter | None = None
+        self.chat_filter_task: asyncio.Task | None = None
+        self.ingest = get_ingest_dispatcher()
         self.message_processor = IncomeMessageProcessor(
             income_service=self.service,
             chat_service=self.chat_service
@@ -71,6 +79,28 @@ class TelethonClientService:
             force_log(f"Error getting username by phone {phone_number}: {e}")
             return None
 
+    async def _store_income_message(self, chat_id, message_id, message_text, username, message_time):
+        """Run by an ingest worker, in arrival order for the chat"""
+        try:
+            await self.message_processor.store_message(
+                chat_id=chat_id,
+                message_id=message_id,
+                message_text=message_text,
+                origin_username=username,
+                message_time=message_time,
+            )
+        except Exception as income_error:
+            force_log(f"ERROR saving income: {income_error}")
+            import traceback
+
+            force_log(f"Traceback: {traceback.format_exc()}")
+
+    @staticmethod
+    def _new_client(mobile, api_id, api_hash) -> TelegramClient:
+        # Handlers run one update at a time, so a full ingest queue holds up
+        # the receive loop instead of parking one more handler task
+        return TelegramClient(mobile, int(api_id), api_hash, sequential_updates=True)
+
     async def start(self, mobile, api_id, api_hash, is_primary: bool = False):
         session_file = f"{mobile}.session"
         
@@ -79,7 +109,7 @@ class TelethonClientService:
 
         # Handle persistent timestamp errors by removing corrupted session
         try:
-            self.client = TelegramClient(mobile, int(api_id), api_hash)
+            self.client = self._new_client(mobile, api_id, api_hash)
             await self.client.connect()
             await self.client.start(phone=mobile)  # type: ignore
             # Initialize threshold warning service and attach to income service
@@ -92,7 +122,7 @@ class TelethonClientService:
                 os.remove(session_file)
 
             # Recreate client with clean session
-            self.client = TelegramClient(mobile, int(api_id), api_hash)
+            self.client = self._new_client(mobile, api_id, api_hash)
             await self.client.connect()
             await self.client.start(phone=mobile)  # type: ignore
             # Initialize threshold warning service and attach to income service
@@ -117,63 +147,61 @@ class TelethonClientService:
         self.scheduler = MessageVerificationScheduler(self.client, scheduler_mobile)  # type: ignore
         force_log("Message verification scheduler initialized for one-time startup check")
 
-        @self.client.on(events.NewMessage)  # type: ignore
+        # Drop messages from unregistered groups before any work;
+        # /register_me below is deliberately left unfiltered
+        self.chat_filter = RegisteredChatFilter()
+        try:
+            await self.chat_filter.refresh(full=True)
+        except Exception as e:
+            force_log(f"Could not load registered chats, listener is unfiltered until next refresh: {e}",
+                      "TelethonClientService", "ERROR")
+        # Kept so it is not garbage-collected mid-run; cancelled on disconnect
+        self.chat_filter_task = asyncio.create_task(self.chat_filter.run())
+
+        @self.client.on(events.NewMessage(func=self.chat_filter))  # type: ignore
         async def _new_message_listener(event):
             force_log(f"=== NEW MESSAGE EVENT TRIGGERED ===")
             force_log(f"Chat ID: {event.chat_id}, Message: '{event.message.text}'")
 
             try:
-                sender = await event.get_sender()
-                # is_bot = getattr(sender, "bot", False)
-                username = getattr(sender, "username", "") or ""
-
-                # Only process messages from the specified bots
-                allowed_bots = {
-                    "ACLEDABankBot",
-                    "PayWayByABA_bot",
-                    "PLBITBot",
-                    "CanadiaMerchant_bot",
-                    "HLBCAM_Bot",
-                    "vattanac_bank_merchant_prod_bot",
-                    "CPBankBot",
-                    "SathapanaBank_bot",
-                    "chipmongbankpaymentbot",
-                    "prasac_merchant_payment_bot",
-                    "AMKPlc_bot",
-                    "prince_pay_bot",
-                    "s7pos_bot",
-                    "payment_bk_bot",
-                    "CCUBank_bot"
-                }
-                if username not in allowed_bots:
-                    force_log(f"Message from bot '{username}' not in allowed list, ignoring.")
-                    return
-
                 # Skip if no message text
                 if not event.message.text:
                     force_log("No message text, skipping")
                     return
 
+                # Resolve the sender once per sender_id; later messages from the
+                # same sender are accepted or rejected without a network call
+                sender_id = event.sender_id
+                if sender_id is None:
+                    force_log("Message without sender id, ignoring.")
+                    return
+                identity = self.sender_cache.get(sender_id)
+                if identity is None:
+                    with metrics.timer("ingest_sender_resolution_seconds"):
+                        sender = await event.get_sender()
+                    identity = self.sender_cache.remember(sender_id, sender)
+                username = identity.username
+
+                # Only process messages from the payment bots in the parser registry
+                if not identity.allowed:
+                    force_log(f"Message from bot '{username}' not in allowed list, ignoring.")
+                    return
+
                 force_log(
                     f"Processing message from chat {event.chat_id}: {event.message.text}"
                 )
                 
-                message_id: int = event.message.id
-                message_time = event.message.date
-
-                try:
-                    await self.message_processor.store_message(
-                        chat_id=event.chat_id,
-                        message_id=message_id,
-                        message_text=event.message.text,
-                        origin_username=username,
-                        message_time=message_time,
-                    )
-                except Exception as income_error:
-                    force_log(f"ERROR saving income: {income_error}")
-                    import traceback
-
-                    force_log(f"Traceback: {traceback.format_exc()}")
+                # Hand off to the chat's ingest worker; while its queue is full this
+                # waits and, with sequential updates, so does the client's update loop
+                await self.ingest.submit(
+                    event.chat_id,
+                    self._store_income_message,
+                    event.chat_id,
+                    event.message.id,
+                    event.message.text,
+                    username,
+                    event.message.date,
+                )
 
             except Exception as e:
                 force_log(f"ERROR in message processing: {e}")
@@ -268,4 +296,8 @@ You can now receive transaction notifications from bank bots in this private cha
 
         # Start the client (periodic scheduler disabled to prevent rate limits)
         force_log("Starting client event listener (periodic verification disabled)")
-        await self.client.run_until_disconnected()  # type: ignore
+        try:
+            await self.client.run_until_disconnected()  # type: ignore
+        finally:
+            self.chat_filter_task.cancel()
+            await asyncio.gather(self.chat_filter_task, return_exceptions=True)
@@ -0,0 +1,150 @@
+"""
+Income loading memory benchmark.
+
+Seeds an in-memory SQLite database with income rows that carry a realistic
+bank message, then loads them the ways IncomeService can and measures with
+tracemalloc how much memory the returned list keeps alive and the peak while
+loading, per 10k rows:
+
+    orm+sources      IncomeBalance objects with revenue_sources joinedloaded (the old read path)
+    orm              IncomeBalance objects
+    records          slim IncomeRecords (slim=True, with_sources=False)
+    records+sources  slim IncomeRecords with their revenue sources (slim=True)
+
+Runs offline; no MySQL or Telegram connection is needed.
+
+Usage:
+    python tests/benchmark_income_loading.py [--rows 10000] [--breakdown-share 0.0]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: E402,F401  (initialises helper before models to avoid a circular import)
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from config import Base  # noqa: E402
+from models import IncomeBalance, RevenueSource  # noqa: E402
+from services.income_balance_service import IncomeService  # noqa: E402
+
+CHAT_ID = -1001
+START = datetime(2025, 10, 1)
+PER_ROWS = 10_000
+MESSAGE = (
+    "Received 12.50 USD from SAMPLE PAYER, ABA Bank *123 on 11-Oct-2025 10:12AM "
+    "at SAMPLE SHOP by KHQR.\nTrx. ID: {id:012d}\nAPV: 123456\n"
+    "Thank you for using our merchant service. For help call 023 999 999."
+)
+
+# name -> (slim, with_sources)
+VARIANTS = {
+    "orm+sources": (False, True),
+    "orm": (False, False),
+    "records": (True, False),
+    "records+sources": (True, True),
+}
+
+
+def seed(rows: int, breakdown_share: float):
+    """Session factory of an in-memory database with ``rows`` incomes"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with_sources = int(rows * breakdown_share)
+    with engine.begin() as connection:
+        connection.execute(insert(IncomeBalance), [
+            {
+                "id": index + 1, "chat_id": CHAT_ID, "message_id": index, "amount": 12.5, "amount_minor": 1250,
+                "original_amount": 12.5, "currency": "USD", "income_date": START + timedelta(seconds=index * 60),
+                "message": MESSAGE.format(id=index), "trx_id": f"{index:012d}", "sent_by": "PayWayByABA_bot",
+                "paid_by": "123", "paid_by_name": "SAMPLE PAYER",
+            }
+            for index in range(rows)
+        ])
+        if with_sources:
+            connection.execute(insert(RevenueSource), [
+                {"income_id": index + 1, "source_name": name, "amount": 6.25, "amount_minor": 625, "currency": "USD"}
+                for index in range(with_sources)
+                for name in ("Cash", "Card")
+            ])
+    return sessionmaker(bind=engine)
+
+
+def measure(session_factory, rows: int, slim: bool, with_sources: bool) -> dict:
+    """Retained and peak bytes per PER_ROWS rows and load time of one read path"""
+    criteria = [
+        IncomeBalance.chat_id == CHAT_ID,
+        IncomeBalance.income_date >= START,
+        IncomeBalance.income_date < START + timedelta(days=365),
+    ]
+
+    @contextmanager
+    def session():
+        with session_factory() as db:
+            yield db
+
+    def load():
+        with patch("services.income_balance_service.get_db_session", session):
+            return IncomeService._load_incomes(criteria, slim, with_sources)
+
+    load()  # warm up statement caches and imports
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        result = load()
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(result) == rows
+    scale = PER_ROWS / rows
+    return {
+        "retained_mb": (retained - before) * scale / 2**20,
+        "peak_mb": (peak - before) * scale / 2**20,
+        "seconds": elapsed * scale,
+    }
+
+
+def run_benchmark(rows: int, breakdown_share: float) -> dict[str, dict]:
+    session_factory = seed(rows, breakdown_share)
+    return {
+        name: measure(session_factory, rows, slim, with_sources)
+        for name, (slim, with_sources) in VARIANTS.items()
+    }
+
+
+def print_report(results: dict[str, dict]) -> None:
+    base = results["orm+sources"]
+    print(f"per {PER_ROWS:,} rows")
+    print(f"{'read path':<18} {'retained MB':>12} {'peak MB':>9} {'seconds':>8} {'vs orm+sources':>15}")
+    for name, result in results.items():
+        change = f"{result['retained_mb'] / base['retained_mb'] - 1:+.0%}"
+        print(f"{name:<18} {result['retained_mb']:>12.2f} {result['peak_mb']:>9.2f} "
+              f"{result['seconds']:>8.3f} {change:>15}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure memory of the income read paths")
+    parser.add_argument("--rows", type=int, default=PER_ROWS, help="Incomes seeded and loaded (default 10000)")
+    parser.add_argument("--breakdown-share", type=float, default=0.0,
+                        help="Share of incomes with two revenue sources (default 0: a chat without breakdowns)")
+    args = parser.parse_args(argv)
+
+    print_report(run_benchmark(args.rows, args.breakdown_share))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
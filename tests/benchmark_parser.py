@@ -0,0 +1,307 @@
+"""
+Parser throughput benchmark.
+
+Measures messages/sec and p99 latency of the bot-specific parsers
+(``extract_amount_currency_and_time``, per bot in BOT_PARSERS), the legacy
+``extract_amount_and_currency`` and ``extract_trx_id`` over the sample
+corpus in ``tests/fixtures/parser_corpus.json``, and compares the result with
+``tests/fixtures/parser_benchmark_baseline.json``.
+
+Each timed batch is scored against a calibration loop run just before it on
+the same machine, so a baseline recorded on a laptop can be compared on a
+server. Every parser is measured in ``--rounds`` passes over the whole
+corpus and keeps its best batch: interference only ever makes a batch
+slower, so the best of several spread-out batches is far steadier than any
+one run. Runs offline; no database or Telegram connection is needed.
+
+Usage:
+    python tests/benchmark_parser.py                    # compare with the baseline
+    python tests/benchmark_parser.py --update-baseline  # record a new baseline
+    python tests/benchmark_parser.py --build-corpus     # regenerate the corpus from test_bot_parsers.py
+
+Exits with status 1 when a parser's normalized throughput drops by more
+than ``--threshold`` (default 25%) against the baseline.
+"""
+
+import argparse
+import ast
+import gc
+import json
+import platform
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helper.bot_parsers_registry import BOT_PARSERS, get_parser_name  # noqa: E402
+from helper.message_parser import extract_amount_and_currency, extract_trx_id  # noqa: E402
+from helper.message_parser_optimized import extract_amount_currency_and_time  # noqa: E402
+
+TESTS_DIR = Path(__file__).parent
+CORPUS_PATH = TESTS_DIR / "fixtures" / "parser_corpus.json"
+BASELINE_PATH = TESTS_DIR / "fixtures" / "parser_benchmark_baseline.json"
+FIXTURE_SOURCE = TESTS_DIR / "test_bot_parsers.py"
+
+# Bump when the corpus changes; baselines of another version are not comparable
+CORPUS_VERSION = 1
+ANONYMIZED_NAME = "SAMPLE PAYER"
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_ROUNDS = 3
+
+
+# ========================================
+# Corpus
+# ========================================
+
+def _fixture_messages() -> list[tuple[str, str]]:
+    """(bot username, message) pairs used by test_bot_parsers.py"""
+    pairs = []
+    tree = ast.parse(FIXTURE_SOURCE.read_text(encoding="utf-8"))
+    for function in ast.walk(tree):
+        if not isinstance(function, ast.FunctionDef):
+            continue
+        messages = [
+            node.value.value
+            for node in ast.walk(function)
+            if isinstance(node, ast.Assign)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ]
+        bots = {
+            node.args[1].value
+            for node in ast.walk(function)
+            if isinstance(node, ast.Call)
+            and getattr(node.func, "id", "") == "extract_amount_currency_and_time"
+            and len(node.args) > 1
+            and isinstance(node.args[1], ast.Constant)
+        }
+        pairs.extend((bot, message) for bot in sorted(bots) if bot in BOT_PARSERS for message in messages)
+    return pairs
+
+
+def _expected(bot: str, text: str) -> dict:
+    currency, amount, trx_time, paid_by, _ = extract_amount_currency_and_time(text, bot)
+    return {
+        "currency": currency,
+        "amount": amount,
+        "has_time": trx_time is not None,
+        "paid_by": paid_by,
+        "trx_id": extract_trx_id(text),
+    }
+
+
+def build_corpus() -> dict:
+    """Corpus of fixture messages per bot, payer names replaced"""
+    messages: dict[str, list[dict]] = {bot: [] for bot in BOT_PARSERS}
+    seen = set()
+    for bot, text in _fixture_messages():
+        _, amount, _, _, paid_by_name = extract_amount_currency_and_time(text, bot)
+        if amount is None or (bot, text) in seen:
+            continue
+        seen.add((bot, text))
+        if paid_by_name:
+            text = re.sub(r"\s+".join(map(re.escape, paid_by_name.split())), ANONYMIZED_NAME, text)
+        messages[bot].append({"text": text, "expected": _expected(bot, text)})
+
+    # Aliases without fixtures of their own share their parser's messages
+    for bot, samples in messages.items():
+        if samples:
+            continue
+        for other, other_samples in messages.items():
+            if other_samples and get_parser_name(other) == get_parser_name(bot):
+                samples.extend({"text": s["text"], "expected": _expected(bot, s["text"])} for s in other_samples)
+                break
+
+    return {"version": CORPUS_VERSION, "messages": messages}
+
+
+def load_corpus() -> dict:
+    corpus = json.loads(CORPUS_PATH.read_text(encoding="utf-8"))
+    if corpus["version"] != CORPUS_VERSION:
+        raise SystemExit(f"Corpus version {corpus['version']} does not match {CORPUS_VERSION}; rebuild it")
+    return corpus
+
+
+def verify_corpus(corpus: dict) -> list[str]:
+    """Messages whose parse result no longer matches the corpus"""
+    failures = []
+    for bot, samples in corpus["messages"].items():
+        for sample in samples:
+            actual = _expected(bot, sample["text"])
+            if actual != sample["expected"]:
+                failures.append(f"{bot}: {sample['text'][:60]!r} expected {sample['expected']}, got {actual}")
+    return failures
+
+
+# ========================================
+# Measurement
+# ========================================
+
+_CALIBRATION_PATTERN = re.compile(r"([\d,]+(?:\.\d+)?)\s+(USD|KHR)", re.IGNORECASE)
+_CALIBRATION_TEXT = "Received 1,250.00 USD from SAMPLE PAYER on 11-Oct-2025 10:12AM"
+
+
+def calibration_rate(iterations: int = 10000) -> float:
+    """Iterations/ns of a fixed regex and string workload"""
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        match = _CALIBRATION_PATTERN.search(_CALIBRATION_TEXT)
+        float(match.group(1).replace(",", ""))
+        _CALIBRATION_TEXT.casefold()
+    return iterations / (time.perf_counter_ns() - started)
+
+
+def measure(func: Callable[[str], object], texts: list[str], calls: int, repeats: int = 5) -> dict:
+    """
+    Throughput and p99 latency of ``func`` over ``texts``, parsing at least
+    ``calls`` messages per batch.
+
+    Each batch runs right after a calibration batch. The score is the best
+    batch rate over the best calibration rate of the ``repeats`` pairs:
+    noisy neighbours only slow a batch down, so both maxima are steady,
+    while the ratio cancels out the machine's speed.
+    """
+    batch = texts * max(1, -(-calls // len(texts)))
+    for text in texts:
+        func(text)  # warm up
+
+    perf_counter_ns = time.perf_counter_ns
+    rates, references, latencies = [], [], []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            references.append(calibration_rate())
+            started = perf_counter_ns()
+            for text in batch:
+                func(text)
+            rate = len(batch) / (perf_counter_ns() - started)
+            rates.append(rate)
+
+        for text in batch:
+            started = perf_counter_ns()
+            func(text)
+            latencies.append(perf_counter_ns() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    return {
+        "msgs_per_sec": round(max(rates) * 1e9, 1),
+        "p99_us": round(p99 / 1000, 2),
+        "score": round(max(rates) / max(references), 6),
+    }
+
+
+def best_result(results: list[dict]) -> dict:
+    """The result with the highest score of several rounds"""
+    return max(results, key=lambda result: result["score"])
+
+
+def run_benchmark(corpus: dict, calls: int, rounds: int = DEFAULT_ROUNDS) -> dict:
+    """Best result per parser over ``rounds`` passes over every parser"""
+    all_texts = [sample["text"] for _, samples in sorted(corpus["messages"].items()) for sample in samples]
+    benchmarks: dict[str, tuple[Callable[[str], object], list[str]]] = {}
+    for bot, samples in sorted(corpus["messages"].items()):
+        if samples:
+            benchmarks[f"extract_amount_currency_and_time[{bot}]"] = (
+                lambda text, bot=bot: extract_amount_currency_and_time(text, bot),
+                [sample["text"] for sample in samples],
+            )
+    benchmarks["extract_amount_and_currency"] = (extract_amount_and_currency, all_texts)
+    benchmarks["extract_trx_id"] = (extract_trx_id, all_texts)
+
+    # Rounds are interleaved so a slow spell hits one round of each parser, not all of one
+    measured: dict[str, list[dict]] = {name: [] for name in benchmarks}
+    for _ in range(max(1, rounds)):
+        for name, (func, texts) in benchmarks.items():
+            measured[name].append(measure(func, texts, calls))
+    results = {name: best_result(runs) for name, runs in measured.items()}
+
+    return {
+        "corpus_version": corpus["version"],
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Parsers whose normalized throughput dropped by more than ``threshold``"""
+    regressions = []
+    for name, base in baseline["results"].items():
+        result = current["results"].get(name)
+        if result is None:
+            continue
+        ratio = result["score"] / base["score"]
+        if ratio < 1 - threshold:
+            regressions.append(
+                f"{name}: {result['msgs_per_sec']:.0f} msgs/sec is {(1 - ratio):.0%} slower than baseline "
+                f"(p99 {base['p99_us']}us -> {result['p99_us']}us)"
+            )
+    return regressions
+
+
+def print_report(current: dict, baseline: dict | None) -> None:
+    print(f"{'parser':<60} {'msgs/sec':>10} {'p99 us':>8} {'vs base':>8}")
+    for name, result in current["results"].items():
+        base = (baseline or {}).get("results", {}).get(name)
+        change = f"{result['score'] / base['score'] - 1:+.0%}" if base else "-"
+        print(f"{name:<60} {result['msgs_per_sec']:>10.0f} {result['p99_us']:>8.1f} {change:>8}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark message parsers against a stored baseline")
+    parser.add_argument("--calls", type=int, default=1500, help="Messages parsed per timed batch")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed throughput drop before failing (default 0.25)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS,
+                        help=f"Passes over every parser; the best is kept (default {DEFAULT_ROUNDS})")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--build-corpus", action="store_true", help="Regenerate the corpus from the test fixtures")
+    args = parser.parse_args(argv)
+
+    if args.build_corpus:
+        corpus = build_corpus()
+        CORPUS_PATH.parent.mkdir(exist_ok=True)
+        CORPUS_PATH.write_text(json.dumps(corpus, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {sum(map(len, corpus['messages'].values()))} messages to {CORPUS_PATH}")
+        return 0
+
+    corpus = load_corpus()
+    failures = verify_corpus(corpus)
+    if failures:
+        print("Parser output changed for corpus messages:\n  " + "\n  ".join(failures))
+        return 1
+
+    current = run_benchmark(corpus, args.calls, args.rounds)
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print_report(current, None)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else None
+    print_report(current, baseline)
+    if baseline is None:
+        print("No baseline yet; run with --update-baseline")
+        return 0
+    if baseline["corpus_version"] != current["corpus_version"]:
+        print("Baseline was recorded with another corpus version; run with --update-baseline")
+        return 1
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print("Regressions:\n  " + "\n  ".join(regressions))
+        return 1
+    print(f"No parser regressed by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
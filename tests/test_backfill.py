@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+import main_backfill
+from config import Base
+from models import Chat, IncomeBalance, Shift
+
+ABA_USD = "$10.00 paid by LOR PISETH (*467) on Oct 11, 10:21 AM via ABA PAY at KEAM LILAY. Trx. ID: {trx}, APV: 691804."
+
+
+def record(chat_id: int, message_id: int, date: str = "2025-10-11T03:21:00+00:00",
+           sender: str = "PayWayByABA_bot", trx: str | None = None) -> dict:
+    return {
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "sender_username": sender,
+        "date": date,
+        "text": ABA_USD.format(trx=trx or f"17601529{message_id:07d}"),
+    }
+
+
+class TestBackfill(unittest.TestCase):
+    """Tests for the offline JSONL backfill command (in-memory SQLite)"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        with self.Session() as db:
+            db.add(Chat(chat_id=1, group_name="Shop", created_at=datetime(2025, 10, 1, 9, 0)))
+            db.add(Chat(chat_id=2, group_name="Shift shop", enable_shift=True,
+                        created_at=datetime(2025, 10, 1, 9, 0)))
+            db.add(Shift(chat_id=2, shift_date=datetime(2025, 10, 11).date(), number=1,
+                         start_time=datetime(2025, 10, 11, 6, 0), end_time=datetime(2025, 10, 11, 14, 0),
+                         is_closed=True))
+            db.add(Shift(chat_id=2, shift_date=datetime(2025, 10, 11).date(), number=2,
+                         start_time=datetime(2025, 10, 11, 14, 0), is_closed=False))
+            db.commit()
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmpdir.name, "dump.jsonl")
+        self.checkpoint_path = self.input_path + ".checkpoint"
+
+        @contextmanager
+        def fake_session():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        patcher = patch.object(main_backfill, "get_db_session", fake_session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_dump(self, records: list) -> None:
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            for item in records:
+                f.write((item if isinstance(item, str) else json.dumps(item)) + "\n")
+
+    def run_backfill(self, chunk_size: int = 2):
+        return main_backfill.run(self.input_path, chunk_size, self.checkpoint_path, dry_run=False)
+
+    def test_inserts_in_chunks_and_skips_duplicates(self):
+        self.write_dump([record(1, 1), record(1, 2), record(1, 1), record(1, 3)])
+
+        stats = self.run_backfill()
+
+        self.assertEqual((stats.read, stats.inserted, stats.duplicates), (4, 3, 1))
+        with self.Session() as db:
+            rows = db.query(IncomeBalance).order_by(IncomeBalance.message_id).all()
+        self.assertEqual([row.message_id for row in rows], [1, 2, 3])
+        self.assertEqual(rows[0].amount, 10.0)
+        self.assertEqual(rows[0].currency, "USD")
+        self.assertEqual(rows[0].sent_by, "PayWayByABA_bot")
+
+    def test_skips_unregistered_chats_unknown_senders_and_early_messages(self):
+        self.write_dump([
+            record(99, 1),
+            record(1, 2, sender="SomeoneElse"),
+            # Before the chat was registered (09:00 ICT on Oct 1)
+            record(1, 3, date="2025-09-30T01:00:00+00:00"),
+            "not json",
+            record(1, 4),
+        ])
+
+        stats = self.run_backfill(chunk_size=10)
+
+        self.assertEqual((stats.inserted, stats.skipped, stats.invalid), (1, 3, 1))
+        with self.Session() as db:
+            self.assertEqual([row.message_id for row in db.query(IncomeBalance)], [4])
+
+    def test_assigns_the_shift_open_at_message_time(self):
+        self.write_dump([
+            record(2, 1, date="2025-10-11T03:21:00+00:00"),  # 10:21 ICT, first shift
+            record(2, 2, date="2025-10-11T08:00:00+00:00"),  # 15:00 ICT, open shift
+        ])
+
+        self.run_backfill()
+
+        with self.Session() as db:
+            shifts = dict(db.query(IncomeBalance.message_id, IncomeBalance.shift_id))
+            first, second = [s.id for s in db.query(Shift).order_by(Shift.number)]
+        self.assertEqual(shifts, {1: first, 2: second})
+
+    def test_yearless_times_are_placed_in_the_message_year(self):
+        # "Oct 11" prints no year; the parser puts it in the current one
+        self.write_dump([record(1, 1, date="2025-10-11T03:21:00+00:00")])
+
+        self.run_backfill()
+
+        with self.Session() as db:
+            self.assertEqual(db.query(IncomeBalance.income_date).scalar(), datetime(2025, 10, 11, 10, 21))
+
+    def test_resumes_after_checkpoint(self):
+        self.write_dump([record(1, 1), record(1, 2), record(1, 3)])
+        main_backfill.save_checkpoint(self.checkpoint_path, self.input_path, 2)
+
+        stats = self.run_backfill()
+
+        self.assertEqual(stats.read, 1)
+        with self.Session() as db:
+            self.assertEqual([row.message_id for row in db.query(IncomeBalance)], [3])
+        self.assertEqual(main_backfill.load_checkpoint(self.checkpoint_path, self.input_path), 3)
+
+    def test_checkpoint_for_another_file_is_rejected(self):
+        self.write_dump([record(1, 1)])
+        main_backfill.save_checkpoint(self.checkpoint_path, "/tmp/other.jsonl", 1)
+
+        with self.assertRaises(SystemExit):
+            self.run_backfill()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,8 +6,15 @@ Each test case uses real message samples from the production environment.
 """
 
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
 
-from helper.message_parser_optimized import extract_amount_currency_and_time
+from helper.bot_parsers import TIME_MATCHERS, extract_transaction_time
+from helper.bot_parsers_registry import BOT_PARSERS, PARSER_TIME_FORMATS
+from helper import message_parser_optimized
+from helper.message_parser_optimized import extract_amount_currency_and_time, parse_many, parse_payment
+from helper.parsed_payment import ParsedPayment, from_minor_units, to_minor_units
 
 
 class TestACLEDABankParser(unittest.TestCase):
@@ -657,6 +664,125 @@ class TestPaidByFieldExtraction(unittest.TestCase):
         self.assertEqual(paid_by, '012')
 
 
+class TestTransactionTimeFormats(unittest.TestCase):
+    """Tests for the per-bank timestamp formats declared in the registry"""
+
+    def test_every_parser_declares_known_formats(self):
+        """Each registered parser has a format entry naming known matchers"""
+        for parser_name in set(BOT_PARSERS.values()):
+            self.assertIn(parser_name, PARSER_TIME_FORMATS)
+            for time_format in PARSER_TIME_FORMATS[parser_name]:
+                self.assertIn(time_format, TIME_MATCHERS)
+
+    def test_bank_parser_only_tries_its_own_format(self):
+        """A timestamp in another bank's format is not picked up by a bank parser"""
+        message = "$10.00 paid by USER (*123) on 2025-10-11 10:21:33 via ABA PAY"
+        _, amount, trx_time, _, _ = extract_amount_currency_and_time(message, "PayWayByABA_bot")
+        self.assertEqual(amount, 10.0)
+        self.assertIsNone(trx_time)
+
+    def test_universal_parser_runs_full_cascade(self):
+        """Unknown bots still get the timestamp from any known format"""
+        message = "$10.00 received on 2025-10-11 10:21:33"
+        _, _, trx_time, _, _ = extract_amount_currency_and_time(message, "unknown_bot")
+        self.assertEqual(trx_time.replace(tzinfo=None), datetime(2025, 10, 11, 10, 21, 33))
+        self.assertEqual(str(trx_time.tzinfo), 'Asia/Phnom_Penh')
+
+    def test_cascade_order_is_kept(self):
+        """The first matching format in cascade order wins"""
+        text = "11-10-2025 10:52:51 AM and 2025-10-11 09:00:00"
+        self.assertEqual(extract_transaction_time(text).hour, 10)
+        self.assertEqual(extract_transaction_time(text, ("datetime_iso",)).hour, 9)
+
+
+class TestParsedPayment(unittest.TestCase):
+    """Tests for the ParsedPayment record returned by parse_payment"""
+
+    def test_single_parse_extracts_every_field(self):
+        message = "៛78,000 paid by CHOR SEIHA (*655) on Oct 11, 10:21 AM via ABA PAY at KEAM LILAY. Trx. ID: 176015291441643, APV: 134672."
+        payment = parse_payment(message, "PayWayByABA_bot")
+        self.assertIsInstance(payment, ParsedPayment)
+        self.assertEqual(payment.currency, '៛')
+        self.assertEqual(payment.amount_minor, 7800000)
+        self.assertEqual(payment.amount, 78000)
+        self.assertEqual((payment.trx_time.hour, payment.trx_time.minute), (10, 21))
+        self.assertEqual(payment.trx_id, '176015291441643')
+        self.assertEqual(payment.paid_by, '655')
+        self.assertEqual(payment.paid_by_name, 'CHOR SEIHA')
+        self.assertEqual(payment.parser, 'parse_aba')
+
+    def test_minor_units_round_trip(self):
+        self.assertEqual(to_minor_units("1,250.50"), 125050)
+        self.assertEqual(to_minor_units("1,250.5"), 125050)
+        self.assertEqual(to_minor_units("0.005"), 1)
+        self.assertEqual(to_minor_units(21.15), 2115)
+        self.assertEqual(to_minor_units(0.1) + to_minor_units(0.2), to_minor_units(0.3))
+        self.assertEqual(from_minor_units(125050), 1250.5)
+        self.assertEqual(from_minor_units(7800000), 78000)
+        self.assertEqual(ParsedPayment('$', 2115).amount, 21.15)
+
+    def test_fallback_records_universal_parser(self):
+        payment = parse_payment("$12.34 received, Hash: 2e720fc0", "PayWayByABA_bot")
+        self.assertEqual(payment.parser, 'parse_universal')
+        self.assertEqual(payment.amount, 12.34)
+        self.assertEqual(payment.trx_id, '2e720fc0')
+
+    def test_no_amount_returns_none(self):
+        self.assertIsNone(parse_payment("Hello there", "PayWayByABA_bot"))
+        self.assertEqual(extract_amount_currency_and_time("Hello there"), (None, None, None, None, None))
+
+    def test_s7days_carries_breakdown(self):
+        message = "10.10.2025\n-Cash=16.6$\n-Bank Card =341.2$\n-WeChat=0$"
+        payment = parse_payment(message, "S7days777")
+        self.assertEqual(payment.amount_minor, 35780)
+        self.assertEqual(payment.breakdown, {"Cash": 16.6, "Bank Card": 341.2})
+
+
+class TestParseMany(unittest.TestCase):
+    """Tests for batch parsing with parse_many"""
+
+    MESSAGES = [
+        ("៛78,000 paid by CHOR SEIHA (*655) on Oct 11, 10:21 AM via ABA PAY at KEAM LILAY. Trx. ID: 176015291441643, APV: 134672.", "PayWayByABA_bot"),
+        ("Hello there", None),
+        ("$12.34 received, Hash: 2e720fc0", "unknown_bot"),
+        ("", "PayWayByABA_bot"),
+        ("$10.00 paid by LOR PISETH (*467) on Oct 11, 10:21 AM via ABA PAY at KEAM LILAY. Trx. ID: 176015291441644, APV: 691804.", "PayWayByABA_bot"),
+    ]
+
+    def _fields(self, payment):
+        return None if payment is None else (payment.parser, payment.amount_minor, payment.trx_id, payment.trx_time)
+
+    def test_results_align_with_inputs(self):
+        results = parse_many(self.MESSAGES)
+        expected = [self._fields(parse_payment(text, bot) if text else None) for text, bot in self.MESSAGES]
+        self.assertEqual([self._fields(r) for r in results], expected)
+        self.assertEqual(results[4].trx_id, '176015291441644')
+        self.assertIsNone(results[1])
+        self.assertIsNone(results[3])
+
+    def test_pool_results_match_in_process(self):
+        messages = self.MESSAGES * 5
+        expected = [self._fields(r) for r in parse_many(messages)]
+        with patch.object(message_parser_optimized, "PARSE_MANY_POOL_MIN_MESSAGES", 1), \
+                patch.object(message_parser_optimized, "PARSE_MANY_POOL_CHUNK", 3), \
+                ProcessPoolExecutor(max_workers=2) as executor:
+            results = parse_many(messages, executor)
+        self.assertEqual([self._fields(r) for r in results], expected)
+
+    def test_pool_threshold_and_task_size_per_call(self):
+        messages = self.MESSAGES * 2
+        expected = [self._fields(r) for r in parse_many(messages)]
+        with ProcessPoolExecutor(max_workers=2) as executor, \
+                patch.object(executor, "submit", wraps=executor.submit) as submit:
+            results = parse_many(messages, executor, min_messages=1, task_size=2)
+        self.assertEqual([self._fields(r) for r in results], expected)
+        # ABA (6 messages) in three tasks, the universal parser (4) in two
+        self.assertEqual(submit.call_count, 5)
+
+    def test_empty_batch(self):
+        self.assertEqual(parse_many([]), [])
+
+
 if __name__ == '__main__':
     # Run with verbose output
     unittest.main(verbosity=2)
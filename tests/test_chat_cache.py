@@ -0,0 +1,107 @@
+import asyncio
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from models import Chat
+from services.chat_cache import ChatCache
+
+
+def make_chat(chat_id: int = 1, **kwargs) -> Chat:
+    return Chat(
+        id=kwargs.pop("id", 10),
+        chat_id=chat_id,
+        group_name=kwargs.pop("group_name", "Front Desk"),
+        is_active=True,
+        enable_shift=kwargs.pop("enable_shift", False),
+        created_at=datetime(2025, 10, 1, 8, 0),
+        updated_at=datetime(2025, 10, 1, 8, 0),
+        **kwargs,
+    )
+
+
+class TestChatCache(unittest.IsolatedAsyncioTestCase):
+    """Tests for TTL, negative caching and invalidation"""
+
+    async def asyncSetUp(self):
+        self.loads = 0
+        self.chat = make_chat()
+
+    async def load(self):
+        self.loads += 1
+        return self.chat
+
+    async def test_second_lookup_is_a_hit(self):
+        cache = ChatCache(ttl=60, negative_ttl=60)
+
+        first = await cache.get(1, self.load)
+        second = await cache.get(1, self.load)
+
+        self.assertEqual(self.loads, 1)
+        self.assertIs(first, second)
+        self.assertEqual(first.group_name, "Front Desk")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    async def test_expired_entry_is_reloaded(self):
+        cache = ChatCache(ttl=60, negative_ttl=60)
+        with patch("services.chat_cache.time.monotonic", return_value=1000.0):
+            await cache.get(1, self.load)
+        with patch("services.chat_cache.time.monotonic", return_value=1061.0):
+            await cache.get(1, self.load)
+        self.assertEqual(self.loads, 2)
+
+    async def test_unregistered_chat_is_cached(self):
+        cache = ChatCache(ttl=60, negative_ttl=60)
+        self.chat = None
+
+        self.assertIsNone(await cache.get(1, self.load))
+        self.assertIsNone(await cache.get(1, self.load))
+        self.assertEqual(self.loads, 1)
+
+    async def test_invalidate_forces_reload(self):
+        cache = ChatCache(ttl=60, negative_ttl=60)
+        await cache.get(1, self.load)
+
+        self.chat = make_chat(enable_shift=True)
+        cache.invalidate(1)
+
+        self.assertTrue((await cache.get(1, self.load)).enable_shift)
+        self.assertEqual(self.loads, 2)
+
+    async def test_string_chat_ids_share_the_integer_entry(self):
+        cache = ChatCache(ttl=60, negative_ttl=60)
+        await cache.get("1", self.load)
+        await cache.get(1, self.load)
+        self.assertEqual(self.loads, 1)
+
+        cache.invalidate(1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    async def test_load_racing_an_invalidation_is_not_stored(self):
+        cache = ChatCache(ttl=60, negative_ttl=60)
+        loading = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_load():
+            loading.set()
+            await release.wait()
+            return make_chat(group_name="Stale")
+
+        pending = asyncio.create_task(cache.get(1, slow_load))
+        await loading.wait()
+        cache.invalidate(1)
+        release.set()
+        await pending
+
+        self.assertEqual((await cache.get(1, self.load)).group_name, "Front Desk")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytz
+from sqlalchemy import column
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helper.date_ranges import in_days, on_day
+from helper.dateutils import DateUtils
+
+
+class TestTimezone(unittest.TestCase):
+    """Tests for the cached timezone lookups"""
+
+    def tearDown(self):
+        DateUtils.reset_timezone()
+
+    def test_timezone_is_resolved_once(self):
+        with patch.dict(os.environ, {"TIMEZONE": "Asia/Bangkok"}):
+            DateUtils.reset_timezone()
+            self.assertEqual(DateUtils.get_timezone().zone, "Asia/Bangkok")
+        # Still cached after the variable changes
+        self.assertEqual(DateUtils.get_timezone().zone, "Asia/Bangkok")
+        DateUtils.reset_timezone()
+        self.assertEqual(DateUtils.get_timezone().zone, os.getenv("TIMEZONE", "Asia/Phnom_Penh"))
+
+    def test_timezone_for_falls_back_to_configured(self):
+        self.assertEqual(DateUtils.timezone_for("Asia/Tokyo").zone, "Asia/Tokyo")
+        self.assertIs(DateUtils.timezone_for(None), DateUtils.get_timezone())
+        self.assertIs(DateUtils.timezone_for("Mars/Olympus"), DateUtils.get_timezone())
+
+    def test_now_matches_pytz(self):
+        for tz in (DateUtils.get_timezone(), pytz.timezone("America/New_York")):
+            ours, reference = DateUtils.now(tz), datetime.now(tz)
+            self.assertEqual(ours.utcoffset(), reference.utcoffset())
+            self.assertLess(abs(reference - ours), timedelta(seconds=1))
+
+
+class TestBounds(unittest.TestCase):
+    """Tests for the half-open day, week and month bounds"""
+
+    def test_day_bounds(self):
+        self.assertEqual(
+            DateUtils.day_bounds(datetime(2025, 10, 11, 22, 5)),
+            (datetime(2025, 10, 11), datetime(2025, 10, 12)),
+        )
+
+    def test_week_bounds_start_on_monday(self):
+        self.assertEqual(
+            DateUtils.week_bounds(date(2025, 10, 11)),
+            (datetime(2025, 10, 6), datetime(2025, 10, 13)),
+        )
+
+    def test_month_bounds_roll_over_the_year(self):
+        self.assertEqual(
+            DateUtils.month_bounds(date(2025, 12, 31)),
+            (datetime(2025, 12, 1), datetime(2026, 1, 1)),
+        )
+
+
+class TestDateRanges(unittest.TestCase):
+    """Tests for the half-open range filters"""
+
+    def test_on_day_compares_the_raw_column(self):
+        sql = str(on_day(column("income_date"), date(2025, 10, 11)).compile(compile_kwargs={"literal_binds": True}))
+        self.assertEqual(sql, "income_date >= '2025-10-11 00:00:00' AND income_date < '2025-10-12 00:00:00'")
+
+    def test_in_days_includes_the_last_day(self):
+        condition = in_days(column("income_date"), date(2025, 10, 1), datetime(2025, 10, 31, 15))
+        self.assertEqual(
+            [clause.right.value for clause in condition.clauses],
+            [datetime(2025, 10, 1), datetime(2025, 11, 1)],
+        )
+
+
+class TestBatchConversion(unittest.TestCase):
+    """Tests for the batch localize/convert helpers"""
+
+    def test_localize_many_matches_localize_across_dst(self):
+        tz = pytz.timezone("America/New_York")
+        naive = [datetime(2025, 3, 8, 22) + timedelta(minutes=13 * i) for i in range(500)]
+        self.assertEqual(DateUtils.localize_many(naive, tz), [tz.localize(dt) for dt in naive])
+
+    def test_to_utc_many_keeps_aware_values(self):
+        tz = DateUtils.get_timezone()
+        aware = datetime(2025, 10, 11, 3, 0, tzinfo=pytz.UTC)
+        result = DateUtils.to_utc_many([datetime(2025, 10, 11, 10, 21), aware])
+        self.assertEqual(result[0], tz.localize(datetime(2025, 10, 11, 10, 21)).astimezone(pytz.UTC))
+        self.assertEqual(result[1], aware)
+
+    def test_to_local_many_returns_naive_local(self):
+        tz = pytz.timezone("Asia/Phnom_Penh")
+        result = DateUtils.to_local_many([datetime(2025, 10, 11, 3, 21, tzinfo=pytz.UTC), datetime(2025, 1, 1)], tz)
+        self.assertEqual(result, [datetime(2025, 10, 11, 10, 21), datetime(2025, 1, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
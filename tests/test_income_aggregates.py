@@ -0,0 +1,242 @@
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from config import Base
+from helper import DateUtils
+from helper.monthly_report_helper import monthly_transaction_report
+from helper.total_summary_report_helper import total_summary_report
+from models import IncomeBalance, RevenueSource, Shift
+from services.chat_service import ChatService
+from services.custom_report_service import CustomReportService
+from services.income_aggregate_service import (
+    IncomeAggregateService,
+    closed_day_split,
+    query_income_totals,
+    summarize_incomes,
+    totals_by_currency,
+)
+from services.income_balance_service import IncomeService
+from services.income_rollups import rebuild_rollups
+from services.shift_service import ShiftService
+
+CHAT_ID = -1001
+START = datetime(2025, 10, 1, 9)
+
+
+def totals_key(totals, group_by=()):
+    return sorted(
+        ((t.currency, *(getattr(t, name) for name in group_by), t.amount_minor, t.count, t.first_income, t.last_income)
+         for t in totals),
+        key=repr,
+    )
+
+
+class TestIncomeAggregates(unittest.IsolatedAsyncioTestCase):
+    """Tests for the GROUP BY totals against an in-memory database"""
+
+    async def asyncSetUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+
+        with self.Session() as db:
+            db.add_all([
+                Shift(id=1, chat_id=CHAT_ID, shift_date=START.date(), number=1, start_time=START, is_closed=True),
+                Shift(id=2, chat_id=CHAT_ID, shift_date=START.date(), number=2, start_time=START, is_closed=False),
+            ])
+            for message_id in range(40):
+                income = IncomeBalance(
+                    chat_id=CHAT_ID, message_id=message_id,
+                    amount=0.1 if message_id % 2 else 12500, original_amount=0,
+                    currency="USD" if message_id % 2 else "KHR",
+                    income_date=START + timedelta(hours=message_id * 5),
+                    message="paid", shift_id=message_id % 2 + 1,
+                    paid_by=f"{message_id % 3:03d}" if message_id % 4 else None,
+                )
+                if message_id < 3:
+                    income.revenue_sources = [RevenueSource(source_name="Cash", amount=1.25, currency="USD", shift="A")]
+                db.add(income)
+            db.flush()
+            rebuild_rollups(db, CHAT_ID, START.date(), (START + timedelta(hours=195)).date())
+            db.commit()
+
+        @contextmanager
+        def fake_session():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        for target in (
+            "services.income_aggregate_service.get_db_session",
+            "services.income_balance_service.get_db_session",
+            "services.shift_service.get_db_session",
+            "services.chat_service.get_db_session",
+        ):
+            patcher = patch(target, fake_session)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def rows(self):
+        with self.Session() as db:
+            return db.query(IncomeBalance).all()
+
+    def test_grouped_totals_match_rows(self):
+        for group_by in ((), ("day",), ("shift_id",), ("paid_by",), ("shift_id", "day")):
+            with self.subTest(group_by=group_by), self.Session() as db:
+                totals = query_income_totals(db, [IncomeBalance.chat_id == CHAT_ID], group_by)
+                self.assertEqual(totals_key(totals, group_by), totals_key(summarize_incomes(self.rows(), group_by), group_by))
+
+    def test_sums_are_exact(self):
+        with self.Session() as db:
+            usd = totals_by_currency(query_income_totals(db, []))["USD"]
+        self.assertEqual(usd.amount_minor, 200)
+        self.assertEqual(usd.amount, 2)
+        self.assertEqual(usd.count, 20)
+
+    async def test_range_and_shift_filters(self):
+        service = IncomeAggregateService()
+        first_day = await service.get_totals(CHAT_ID, START.replace(hour=0), START.replace(hour=0) + timedelta(days=1))
+        self.assertEqual(sum(total.count for total in first_day), 3)
+        by_shift = await service.get_shift_totals([2])
+        self.assertEqual([(t.currency, t.count) for t in by_shift[2]], [("USD", 20)])
+        self.assertEqual(await service.get_totals(shift_ids=[]), [])
+
+    async def test_revenue_source_totals(self):
+        sources, labels = await IncomeAggregateService().get_revenue_source_totals([1, 2])
+        self.assertEqual(sources, {"Cash": 3.75})
+        self.assertEqual(labels, {"A"})
+
+    async def test_service_summaries(self):
+        summary = await ShiftService().get_shift_income_summary(1, CHAT_ID)
+        self.assertEqual(summary["transaction_count"], 20)
+        self.assertEqual(summary["currencies"], {"KHR": {"amount": 250000, "count": 20}})
+
+        summary = await IncomeService().get_income_summary_by_date_range(CHAT_ID, "2025-10-01", "2025-10-02")
+        self.assertEqual(summary["count"], 8)
+        self.assertEqual(summary["by_currency"]["USD"], {"total": 0.4, "count": 4})
+
+    def test_reports_render_the_same_from_query_and_rows(self):
+        with self.Session() as db:
+            daily = query_income_totals(db, [IncomeBalance.chat_id == CHAT_ID], ("day",))
+        rows = self.rows()
+        start, end = datetime(2025, 10, 1), datetime(2025, 11, 1)
+        self.assertEqual(
+            monthly_transaction_report(daily, start, end),
+            monthly_transaction_report(summarize_incomes(rows, ("day",)), start, end),
+        )
+        self.assertIn("20", total_summary_report(daily, "Total"))
+
+    async def test_rollups_give_the_same_totals_as_rows(self):
+        service = IncomeAggregateService()
+        calls = [
+            {"chat_id": CHAT_ID, "start": datetime(2025, 10, 1), "end": datetime(2025, 10, 10)},
+            {"chat_id": CHAT_ID, "start": datetime(2025, 10, 2, 12), "end": datetime(2025, 10, 6, 5)},
+            {"chat_id": CHAT_ID, "start": date(2025, 10, 2), "end": date(2025, 10, 4)},
+            {"shift_ids": [1, 2]},
+            {"chat_id": CHAT_ID},
+        ]
+        for group_by in ((), ("day",), ("shift_id", "paid_by")):
+            for kwargs in calls:
+                with self.subTest(group_by=group_by, **kwargs):
+                    with patch.dict(os.environ, {"INCOME_ROLLUP_READS": "0"}):
+                        expected = await service.get_totals(group_by=group_by, **kwargs)
+                    with patch.object(DateUtils, "today", return_value=date(2025, 10, 5)):
+                        actual = await service.get_totals(group_by=group_by, **kwargs)
+                    self.assertEqual(totals_key(actual, group_by), totals_key(expected, group_by))
+
+    async def test_closed_days_are_read_from_rollups(self):
+        with self.Session() as db:
+            db.query(RevenueSource).delete()
+            db.query(IncomeBalance).filter(IncomeBalance.income_date < datetime(2025, 10, 3)).delete()
+            db.commit()
+
+        with patch.object(DateUtils, "today", return_value=date(2025, 10, 5)):
+            totals = await IncomeAggregateService().get_totals(CHAT_ID, datetime(2025, 10, 1), datetime(2025, 10, 10))
+        self.assertEqual(sum(total.count for total in totals), 40)
+
+    async def test_migrated_chat_keeps_its_closed_day_totals(self):
+        new_chat_id = -1002
+        self.assertTrue(await ChatService.migrate_chat_id(CHAT_ID, new_chat_id))
+
+        service = IncomeAggregateService()
+        with patch.object(DateUtils, "today", return_value=date(2025, 10, 5)):
+            totals = await service.get_totals(new_chat_id, datetime(2025, 10, 1), datetime(2025, 10, 2))
+            old_totals = await service.get_totals(CHAT_ID, datetime(2025, 10, 1), datetime(2025, 10, 2))
+        self.assertEqual(sum(total.count for total in totals), 3)
+        self.assertEqual(old_totals, [])
+
+    async def test_aware_bounds_are_read_as_local_time(self):
+        # A weekly report on a Friday: the Monday start and the end come from DateUtils.now()
+        service = IncomeAggregateService()
+        tz = DateUtils.get_timezone()
+        start, end = tz.localize(datetime(2025, 9, 29)), tz.localize(datetime(2025, 10, 3, 14, 30))
+        with patch.dict(os.environ, {"INCOME_ROLLUP_READS": "0"}):
+            expected = await service.get_totals(CHAT_ID, start.replace(tzinfo=None), end.replace(tzinfo=None))
+        with patch.object(DateUtils, "today", return_value=date(2025, 10, 3)):
+            totals = await service.get_totals(CHAT_ID, start, end)
+            utc_totals = await service.get_totals(CHAT_ID, start.astimezone(timezone.utc), end)
+        self.assertEqual(sum(total.count for total in totals), 11)
+        self.assertEqual(totals_key(totals), totals_key(expected))
+        self.assertEqual(totals_key(utc_totals), totals_key(expected))
+
+    def test_custom_report_aggregates_in_database(self):
+        service = CustomReportService()
+        with self.Session() as db:
+            result = service._aggregate_in_database(db, "SELECT amount, currency FROM income_balance;")
+            self.assertEqual(result["total_count"], 40)
+            self.assertEqual(result["currencies"]["KHR"], {"amount": 250000, "count": 20})
+            # No currency column: rows are aggregated by _aggregate_results instead
+            self.assertIsNone(service._aggregate_in_database(db, "SELECT amount FROM income_balance"))
+
+
+class TestClosedDaySplit(unittest.TestCase):
+    """Splitting a time range into rollup days and raw row ranges"""
+
+    TODAY = date(2025, 10, 10)
+
+    def test_whole_days_before_today(self):
+        self.assertEqual(
+            closed_day_split(datetime(2025, 10, 1), datetime(2025, 10, 8), self.TODAY),
+            ((date(2025, 10, 1), date(2025, 10, 8)), []),
+        )
+
+    def test_partial_days_and_today_are_raw(self):
+        self.assertEqual(
+            closed_day_split(datetime(2025, 10, 1, 6), datetime(2025, 10, 11), self.TODAY),
+            ((date(2025, 10, 2), self.TODAY),
+             [(datetime(2025, 10, 1, 6), datetime(2025, 10, 2)), (datetime(2025, 10, 10), datetime(2025, 10, 11))]),
+        )
+        self.assertEqual(
+            closed_day_split(datetime(2025, 10, 3), datetime(2025, 10, 5, 23, 59, 59), self.TODAY),
+            ((date(2025, 10, 3), date(2025, 10, 5)), [(datetime(2025, 10, 5), datetime(2025, 10, 5, 23, 59, 59))]),
+        )
+
+    def test_range_within_one_day_is_raw(self):
+        start, end = datetime(2025, 10, 3, 8), datetime(2025, 10, 3, 20)
+        self.assertEqual(closed_day_split(start, end, self.TODAY), (None, [(start, end)]))
+        start, end = datetime(2025, 10, 10), datetime(2025, 10, 11)
+        self.assertEqual(closed_day_split(start, end, self.TODAY), (None, [(start, end)]))
+
+    def test_unbounded(self):
+        self.assertEqual(
+            closed_day_split(None, None, self.TODAY),
+            ((None, self.TODAY), [(datetime(2025, 10, 10), None)]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
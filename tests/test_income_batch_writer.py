@@ -0,0 +1,215 @@
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from config import Base
+from models import IncomeBalance, IncomeRollup, RevenueSource
+from services.income_batch_writer import IncomeBatchWriter, PendingIncome, write_income_batch
+from services.income_rollups import add_to_rollups
+
+
+def make_income(chat_id: int, message_id: int, amount: float = 10.0, **kwargs) -> PendingIncome:
+    return PendingIncome(
+        chat_id=chat_id,
+        amount=amount,
+        currency="USD",
+        original_amount=amount,
+        message_id=message_id,
+        message=f"${amount} paid",
+        trx_id=kwargs.pop("trx_id", None),
+        income_date=datetime(2025, 10, 11, 10, 21),
+        **kwargs,
+    )
+
+
+class TestWriteIncomeBatch(unittest.TestCase):
+    """Tests for the multi-row income writer against an in-memory database"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+    def race(self, db, items: list[PendingIncome]) -> None:
+        """Have another writer store ``items`` between ``db``'s existence check and insert"""
+        original_begin_nested = db.begin_nested
+
+        def racing_begin_nested():
+            db.begin_nested = original_begin_nested
+            with self.Session() as other:
+                write_income_batch(other, items)
+            return original_begin_nested()
+
+        db.begin_nested = racing_begin_nested
+
+    def test_inserts_batch_and_returns_aligned_ids(self):
+        items = [make_income(1, 100), make_income(2, 200, amount=5.5), make_income(1, 101)]
+        with self.Session() as db:
+            ids = write_income_batch(db, items)
+
+        self.assertEqual(len(ids), 3)
+        self.assertTrue(all(ids))
+        with self.Session() as db:
+            rows = {row.id: row for row in db.query(IncomeBalance).all()}
+        self.assertEqual(rows[ids[1]].chat_id, 2)
+        self.assertEqual(rows[ids[1]].amount, 5.5)
+        self.assertEqual(rows[ids[2]].message_id, 101)
+
+    def test_existing_and_repeated_keys_return_none(self):
+        with self.Session() as db:
+            write_income_batch(db, [make_income(1, 100)])
+
+        with self.Session() as db:
+            ids = write_income_batch(db, [make_income(1, 100), make_income(1, 102), make_income(1, 102)])
+
+        self.assertIsNone(ids[0])
+        self.assertIsNotNone(ids[1])
+        self.assertIsNone(ids[2])
+        with self.Session() as db:
+            self.assertEqual(db.query(IncomeBalance).count(), 2)
+
+    def test_row_stored_concurrently_is_skipped(self):
+        # Another process inserts the key after this batch's existence check
+        with self.Session() as db:
+            self.race(db, [make_income(1, 400, amount=1.0)])
+            ids = write_income_batch(db, [
+                make_income(1, 400, amount=2.0, revenue_sources=[{"source_name": "Cash", "amount": 2.0}]),
+                make_income(1, 401),
+            ])
+
+        with self.Session() as db:
+            rows = db.query(IncomeBalance).filter_by(message_id=400).all()
+            self.assertEqual([row.amount for row in rows], [1.0])
+            self.assertEqual(db.query(IncomeBalance).count(), 2)
+            # The other process's row is a duplicate here, not an insert of this batch
+            self.assertIsNone(ids[0])
+            self.assertEqual(ids[1], db.query(IncomeBalance.id).filter_by(message_id=401).scalar())
+            self.assertEqual(db.query(RevenueSource).count(), 0)
+            # Both incomes counted once in their rollup
+            rollup = db.query(IncomeRollup).one()
+            self.assertEqual((rollup.amount_minor, rollup.income_count), (1100, 2))
+
+    def test_race_with_a_writer_on_the_same_day_keeps_its_rollup(self):
+        with self.Session() as db:
+            # A writer still in flight: counted in the rollup, its row not yet visible
+            add_to_rollups(db, [make_income(1, 900, amount=7.0).to_row()])
+            db.commit()
+
+            self.race(db, [make_income(1, 400, amount=1.0), make_income(1, 402, amount=3.0)])
+            ids = write_income_batch(db, [make_income(1, 400, amount=2.0), make_income(1, 401, amount=4.0)])
+
+        with self.Session() as db:
+            self.assertEqual(db.query(IncomeBalance).count(), 3)
+            self.assertEqual(ids, [None, db.query(IncomeBalance.id).filter_by(message_id=401).scalar()])
+            rollup = db.query(IncomeRollup).one()
+            self.assertEqual((rollup.amount_minor, rollup.income_count), (1500, 4))
+
+    def test_new_incomes_are_added_to_rollups(self):
+        with self.Session() as db:
+            write_income_batch(db, [make_income(1, 100), make_income(1, 101, amount=0.1, paid_by="123")])
+            write_income_batch(db, [make_income(1, 100), make_income(1, 102, amount=2.5), make_income(2, 200)])
+
+        with self.Session() as db:
+            rollups = {
+                (r.chat_id, r.paid_by): (r.local_date, r.shift_id, r.amount_minor, r.income_count)
+                for r in db.query(IncomeRollup)
+            }
+        day = datetime(2025, 10, 11).date()
+        self.assertEqual(rollups, {
+            (1, ""): (day, 0, 1250, 2),
+            (1, "123"): (day, 0, 10, 1),
+            (2, ""): (day, 0, 1000, 1),
+        })
+
+    def test_revenue_sources_are_linked_to_new_income(self):
+        item = make_income(
+            1,
+            300,
+            revenue_sources=[
+                {"source_name": "Cash", "amount": 16.6},
+                {"source_name": "Agoda", "amount": 17.75, "shift": "C"},
+            ],
+        )
+        with self.Session() as db:
+            (income_id,) = write_income_batch(db, [item])
+
+        with self.Session() as db:
+            sources = db.query(RevenueSource).order_by(RevenueSource.id).all()
+        self.assertEqual([s.income_id for s in sources], [income_id, income_id])
+        self.assertEqual(sources[1].shift, "C")
+        self.assertEqual(sources[0].currency, "USD")
+        self.assertEqual([s.amount_minor for s in sources], [1660, 1775])
+
+    def test_amount_minor_is_stored_exactly(self):
+        items = [make_income(1, 500, amount=0.1), make_income(1, 501, amount=0.2, amount_minor=20)]
+        with self.Session() as db:
+            write_income_batch(db, items)
+            # ORM inserts fill amount_minor from amount as well
+            db.add(IncomeBalance(chat_id=1, message_id=502, amount=19.99, original_amount=19.99,
+                                 currency="USD", message="$19.99 paid", income_date=datetime(2025, 10, 11)))
+            db.commit()
+
+        with self.Session() as db:
+            minor = [row.amount_minor for row in db.query(IncomeBalance).order_by(IncomeBalance.message_id)]
+        self.assertEqual(minor, [10, 20, 1999])
+        self.assertEqual(sum(minor), 2029)
+
+
+class TestIncomeBatchWriter(unittest.IsolatedAsyncioTestCase):
+    """Tests for batching and future resolution"""
+
+    async def asyncSetUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.batches = []
+
+        async def fake_run_in_db_session(func):
+            self.batches.append(func)
+            with self.Session() as db:
+                return func(db)
+
+        patcher = patch("services.income_batch_writer.run_in_db_session", fake_run_in_db_session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_flushes_when_row_count_reached(self):
+        writer = IncomeBatchWriter(max_rows=3, max_delay_ms=10_000)
+        futures = [writer.submit(make_income(1, message_id)) for message_id in (1, 2, 3)]
+
+        ids = [await future for future in futures]
+
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(len(set(ids)), 3)
+
+    async def test_flushes_after_time_budget(self):
+        writer = IncomeBatchWriter(max_rows=100, max_delay_ms=5)
+
+        income_id = await writer.insert(make_income(1, 10))
+
+        self.assertIsNotNone(income_id)
+        self.assertEqual(len(self.batches), 1)
+
+    async def test_failed_batch_is_retried_row_by_row(self):
+        writer = IncomeBatchWriter(max_rows=2, max_delay_ms=10_000)
+        bad = make_income(1, 20)
+        bad.message = None  # violates NOT NULL
+        good_future = writer.submit(make_income(1, 21))
+        bad_future = writer.submit(bad)
+
+        self.assertIsNotNone(await good_future)
+        with self.assertRaises(Exception):
+            await bad_future
+
+
+if __name__ == "__main__":
+    unittest.main()
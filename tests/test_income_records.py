@@ -0,0 +1,112 @@
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from config import Base
+from models import IncomeBalance, RevenueSource
+from services.income_aggregate_service import summarize_incomes
+from services.income_balance_service import IncomeService
+from services.income_records import RECORD_COLUMNS, IncomeRecord, load_income_records
+from tests import benchmark_income_loading
+
+BREAKDOWN_CHAT = -1001
+PLAIN_CHAT = -1002
+START = datetime(2025, 10, 1, 9)
+
+
+class TestIncomeRecords(unittest.IsolatedAsyncioTestCase):
+    """Slim income records against the IncomeBalance objects they replace"""
+
+    async def asyncSetUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+
+        with self.Session() as db:
+            for message_id in range(12):
+                chat_id = BREAKDOWN_CHAT if message_id % 2 else PLAIN_CHAT
+                income = IncomeBalance(
+                    chat_id=chat_id, message_id=message_id, amount=2.5, original_amount=2.5, currency="USD",
+                    income_date=START + timedelta(hours=message_id), message=f"$2.50 paid {message_id}",
+                    trx_id=f"TRX{message_id}", sent_by="PayWayByABA_bot", paid_by="123", paid_by_name="PAYER",
+                    note="n" if message_id == 1 else None,
+                )
+                if chat_id == BREAKDOWN_CHAT:
+                    income.revenue_sources = [
+                        RevenueSource(source_name="Cash", amount=1.5, currency="USD", shift="A"),
+                        RevenueSource(source_name="Card", amount=1, currency="USD", shift="A"),
+                    ]
+                db.add(income)
+            db.commit()
+
+        @contextmanager
+        def fake_session():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        patcher = patch("services.income_balance_service.get_db_session", fake_session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = IncomeService()
+
+    def load(self, chat_id, with_sources):
+        with self.Session() as db:
+            return load_income_records(db, [IncomeBalance.chat_id == chat_id], with_sources)
+
+    def test_records_carry_the_orm_values(self):
+        with self.Session() as db:
+            rows = {row.id: row for row in db.query(IncomeBalance)}
+            records = load_income_records(db, [])
+        self.assertEqual(len(records), len(rows))
+        for record in records:
+            for column in RECORD_COLUMNS:
+                self.assertEqual(getattr(record, column.key), getattr(rows[record.id], column.key))
+        self.assertFalse(hasattr(records[0], "message"))
+
+    def test_sources_are_loaded_only_when_asked(self):
+        for record in self.load(BREAKDOWN_CHAT, with_sources=False):
+            self.assertEqual(record.revenue_sources, [])
+
+        records = self.load(BREAKDOWN_CHAT, with_sources=True)
+        self.assertEqual(len(records), 6)
+        for record in records:
+            self.assertEqual(
+                [(s.source_name, s.amount, s.amount_minor, s.shift) for s in record.revenue_sources],
+                [("Cash", 1.5, 150, "A"), ("Card", 1, 100, "A")],
+            )
+        self.assertTrue(all(record.revenue_sources == [] for record in self.load(PLAIN_CHAT, with_sources=True)))
+
+    async def test_service_read_path_is_selectable(self):
+        end = START + timedelta(days=1)
+        orm_rows = await self.service.get_income_by_date_and_chat_id(BREAKDOWN_CHAT, START, end)
+        records = await self.service.get_income_by_date_and_chat_id(BREAKDOWN_CHAT, START, end, slim=True)
+        self.assertIsInstance(orm_rows[0], IncomeBalance)
+        self.assertIsInstance(records[0], IncomeRecord)
+        self.assertEqual(
+            sorted((r.id, [s.source_name for s in r.revenue_sources]) for r in orm_rows),
+            sorted((r.id, [s.source_name for s in r.revenue_sources]) for r in records),
+        )
+        totals = [(t.currency, t.amount_minor, t.count) for t in summarize_incomes(records)]
+        self.assertEqual(totals, [(t.currency, t.amount_minor, t.count) for t in summarize_incomes(orm_rows)])
+
+    def test_benchmark_records_retain_less_than_orm(self):
+        results = benchmark_income_loading.run_benchmark(rows=200, breakdown_share=0.5)
+        self.assertLess(results["records"]["retained_mb"], results["orm"]["retained_mb"])
+        self.assertLess(results["records+sources"]["retained_mb"], results["orm+sources"]["retained_mb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+import main_rebuild_rollups
+from config import Base
+from helper import DateUtils
+from models import IncomeBalance, IncomeRollup
+from services.income_balance_service import IncomeService
+from services.income_rollups import add_to_rollups, rollup_rows
+
+START = datetime(2025, 10, 1, 9)
+
+
+def income_row(chat_id: int, hours: int, amount: float = 1.5, **fields) -> dict:
+    return {
+        "chat_id": chat_id,
+        "income_date": START + timedelta(hours=hours),
+        "shift_id": None,
+        "currency": "USD",
+        "paid_by": None,
+        "amount": amount,
+        **fields,
+    }
+
+
+class TestIncomeRollups(unittest.IsolatedAsyncioTestCase):
+    """Tests for rollup maintenance against an in-memory database"""
+
+    async def asyncSetUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+
+        @contextmanager
+        def fake_session():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def fake_run_in_db_session(func):
+            with fake_session() as db:
+                return func(db)
+
+        for target, value in (
+            ("main_rebuild_rollups.get_db_session", fake_session),
+            ("services.income_balance_service.run_in_db_session", fake_run_in_db_session),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def rollups(self) -> dict[tuple, tuple]:
+        with self.Session() as db:
+            return {
+                (r.chat_id, r.local_date, r.shift_id, r.currency, r.paid_by):
+                    (r.amount_minor, r.income_count, r.first_income, r.last_income)
+                for r in db.query(IncomeRollup)
+            }
+
+    def add_incomes(self, rows: list[dict]) -> None:
+        with self.Session() as db:
+            for message_id, row in enumerate(rows, start=db.query(IncomeBalance).count()):
+                db.add(IncomeBalance(**row, original_amount=row["amount"], message_id=message_id, message="paid"))
+            db.commit()
+
+    def test_rows_are_keyed_by_day_shift_currency_and_payer(self):
+        rows = rollup_rows([
+            income_row(1, 0),
+            income_row(1, 2, amount=0.1, amount_minor=10),
+            income_row(1, 3, paid_by="123"),
+            income_row(1, 4, shift_id=7),
+            income_row(1, 20),
+        ])
+        self.assertEqual(
+            sorted((r["local_date"].day, r["shift_id"], r["paid_by"], r["amount_minor"], r["income_count"]) for r in rows),
+            [(1, 0, "", 160, 2), (1, 0, "123", 150, 1), (1, 7, "", 150, 1), (2, 0, "", 150, 1)],
+        )
+
+    def test_aware_and_naive_income_dates_share_a_rollup(self):
+        # A backfill chunk: a parsed ICT trx_time next to a naive send-time fallback
+        aware = DateUtils.get_timezone().localize(START + timedelta(hours=2))
+        rows = rollup_rows([income_row(1, 0), income_row(1, 0, income_date=aware), income_row(1, 5)])
+        self.assertEqual(
+            [(r["local_date"], r["income_count"], r["first_income"], r["last_income"]) for r in rows],
+            [(START.date(), 3, START, START + timedelta(hours=5))],
+        )
+        self.assertIsNone(rows[0]["first_income"].tzinfo)
+
+    def test_upsert_adds_to_existing_rollups(self):
+        with self.Session() as db:
+            add_to_rollups(db, [income_row(1, 3), income_row(1, 5)])
+            add_to_rollups(db, [income_row(1, 1, amount=2), income_row(1, 4)])
+            db.commit()
+
+        self.assertEqual(self.rollups(), {
+            (1, date(2025, 10, 1), 0, "USD", ""): (650, 4, START + timedelta(hours=1), START + timedelta(hours=5)),
+        })
+
+    def test_days_are_recomputed_without_an_upsert(self):
+        self.add_incomes([income_row(1, 0), income_row(1, 1)])
+        with self.Session() as db, patch("services.income_rollups._upsert", return_value=None):
+            add_to_rollups(db, [income_row(1, 0), income_row(1, 1)])
+            db.commit()
+
+        self.assertEqual(self.rollups(), {
+            (1, START.date(), 0, "USD", ""): (300, 2, START, START + timedelta(hours=1)),
+        })
+
+    async def test_insert_income_counts_the_new_income(self):
+        service = IncomeService()
+        for message_id in (1, 2, 2):
+            await service.insert_income(
+                chat_id=1, amount=12.5, currency="USD", original_amount=12.5, message_id=message_id,
+                message="paid", trx_id=None, paid_by="123", income_date=START,
+            )
+
+        self.assertEqual(self.rollups(), {(1, START.date(), 0, "USD", "123"): (2500, 2, START, START)})
+
+    def test_rebuild_recomputes_only_the_given_range(self):
+        self.add_incomes([income_row(1, hours) for hours in range(-9, 87, 6)] + [income_row(2, 30)])
+        with self.Session() as db:
+            # Stale rollups: a wrong Oct 2 total and a chat without incomes left
+            add_to_rollups(db, [income_row(1, 30, amount=99), income_row(3, 0)])
+            db.commit()
+
+        main_rebuild_rollups.run(chat_id=1, start=date(2025, 10, 2), end=date(2025, 10, 3))
+        rollups = self.rollups()
+        self.assertEqual(rollups[(1, date(2025, 10, 2), 0, "USD", "")][:2], (600, 4))
+        self.assertNotIn((1, date(2025, 10, 1), 0, "USD", ""), rollups)
+        self.assertIn((3, date(2025, 10, 1), 0, "USD", ""), rollups)
+
+        windows = main_rebuild_rollups.run(days_per_transaction=2)
+        rollups = self.rollups()
+        self.assertEqual(windows, 2 + 1 + 1)
+        self.assertEqual(
+            {(chat_id, day.day): values[:2] for (chat_id, day, *_), values in rollups.items()},
+            {(1, 1): (600, 4), (1, 2): (600, 4), (1, 3): (600, 4), (1, 4): (600, 4), (2, 2): (150, 1)},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
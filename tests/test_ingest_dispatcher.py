@@ -0,0 +1,103 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from services.ingest_dispatcher import IngestDispatcher
+from services.telethon_client_service import TelethonClientService
+
+
+class TestIngestDispatcher(unittest.IsolatedAsyncioTestCase):
+    """Tests for per-chat ordering, bounded concurrency and backpressure"""
+
+    async def asyncTearDown(self):
+        await self.dispatcher.stop()
+
+    async def test_messages_of_a_chat_keep_arrival_order(self):
+        self.dispatcher = IngestDispatcher(workers=4, queue_size=100)
+        handled = []
+
+        async def handle(chat_id, message_id):
+            # Later messages finish faster; ordering must still hold per chat
+            await asyncio.sleep(0.001 * (10 - message_id))
+            handled.append((chat_id, message_id))
+
+        for message_id in range(10):
+            for chat_id in (1, 2, 3):
+                await self.dispatcher.submit(chat_id, handle, chat_id, message_id)
+        await self.dispatcher.join()
+
+        for chat_id in (1, 2, 3):
+            self.assertEqual([m for c, m in handled if c == chat_id], list(range(10)))
+        self.assertEqual(self.dispatcher.stats()["processed"], 30)
+
+    async def test_concurrency_is_bounded_by_workers(self):
+        self.dispatcher = IngestDispatcher(workers=2, queue_size=100)
+        running = 0
+        peak = 0
+
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+        for chat_id in range(20):
+            await self.dispatcher.submit(chat_id, handle)
+        await self.dispatcher.join()
+
+        self.assertLessEqual(peak, 2)
+
+    async def test_full_queue_applies_backpressure(self):
+        self.dispatcher = IngestDispatcher(workers=1, queue_size=1)
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        await self.dispatcher.submit(1, blocked)
+        await asyncio.sleep(0)  # worker takes the first job
+        await self.dispatcher.submit(1, blocked)
+
+        third = asyncio.create_task(self.dispatcher.submit(1, blocked))
+        await asyncio.sleep(0.01)
+        self.assertFalse(third.done())
+        self.assertEqual(self.dispatcher.backpressure_waits, 1)
+
+        release.set()
+        await third
+        await self.dispatcher.join()
+
+    async def test_clients_handle_updates_sequentially(self):
+        # Otherwise Telethon runs each update in its own task and a full queue only parks that task
+        self.dispatcher = IngestDispatcher()
+        with patch("services.telethon_client_service.TelegramClient") as client:
+            TelethonClientService._new_client("+85512345678", "123", "hash")
+        self.assertTrue(client.call_args.kwargs["sequential_updates"])
+
+    async def test_failed_job_does_not_stop_worker(self):
+        self.dispatcher = IngestDispatcher(workers=1, queue_size=10)
+        handled = []
+
+        async def fail():
+            raise ValueError("bad message")
+
+        async def handle():
+            handled.append(True)
+
+        await self.dispatcher.submit(1, fail)
+        await self.dispatcher.submit(1, handle)
+        await self.dispatcher.join()
+
+        self.assertEqual(handled, [True])
+        self.assertEqual(self.dispatcher.failed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
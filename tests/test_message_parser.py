@@ -295,6 +295,24 @@ Hash: 2e720fc0"""
                 self.assertEqual(amount, expected_amount)
                 self.assertEqual(trx_id, expected_trx_id)
 
+    def test_trx_id_priority_order(self):
+        """The earliest pattern in priority order wins when several are present"""
+        message = "Hash: abc123 Ref.ID: 555 Trx. ID: 42"
+        self.assertEqual(extract_trx_id(message), '42')
+        self.assertEqual(extract_trx_id("Ref.ID: 555 Hash: abc123"), '555')
+
+    def test_trx_id_case_handling(self):
+        """Keyword prefilter keeps case-insensitive patterns case-insensitive"""
+        self.assertEqual(extract_trx_id("TXN HASH: deadbeef"), 'deadbeef')
+        self.assertEqual(extract_trx_id("HASH ID #865ecfef"), '865ecfef')
+        # Case-sensitive patterns stay case-sensitive
+        self.assertIsNone(extract_trx_id("trx. id: 12345"))
+
+    def test_trx_id_with_precomputed_fold(self):
+        """A casefolded text passed by the caller gives the same result"""
+        message = "Paid $5.00 (Hash. 0a1b2c)"
+        self.assertEqual(extract_trx_id(message, message.casefold()), '0a1b2c')
+
 
 if __name__ == '__main__':
     # Run with verbose output
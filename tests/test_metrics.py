@@ -0,0 +1,92 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helper.metrics import Histogram, MetricsRegistry, _handle_scrape, metrics
+from services.income_message_processor import parse_income_message
+
+
+class TestHistogram(unittest.TestCase):
+    """Tests for histogram buckets and percentiles"""
+
+    def test_percentiles_over_recent_samples(self):
+        histogram = Histogram("test_seconds", "test")
+        for value in range(1, 101):
+            histogram.observe(value / 1000)
+
+        self.assertEqual(histogram.percentile(50), 0.05)
+        self.assertEqual(histogram.percentile(99), 0.099)
+        self.assertEqual(histogram.count, 100)
+
+    def test_render_uses_cumulative_buckets(self):
+        histogram = Histogram("test_seconds", "test", buckets=(0.01, 0.1))
+        for value in (0.005, 0.05, 0.5):
+            histogram.observe(value)
+
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{le="0.01"} 1', lines)
+        self.assertIn('test_seconds_bucket{le="0.1"} 2', lines)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("test_seconds_count 3", lines)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Tests for timers, counters, gauges and the log summary"""
+
+    def test_timer_counter_and_gauge_are_rendered(self):
+        registry = MetricsRegistry()
+        with registry.timer("stage_seconds"):
+            pass
+        registry.counter("stored_total").inc(2)
+        registry.gauge("queue_depth", lambda: 7)
+
+        text = registry.render()
+        self.assertIn("stage_seconds_count 1", text)
+        self.assertIn("stored_total 2", text)
+        self.assertIn("queue_depth 7", text)
+        self.assertIn("stage_seconds: n=1", registry.summary())
+
+
+class TestIngestStages(unittest.TestCase):
+    """The trx id is extracted in the parse stage, not timed on its own"""
+
+    def test_parse_stage_covers_trx_id_extraction(self):
+        parsed = metrics.histogram("ingest_parse_seconds").count
+        payment = parse_income_message(
+            "$10.00 paid by LOR PISETH (*467) on Oct 11, 10:21 AM via ABA PAY at KEAM LILAY. "
+            "Trx. ID: 176015291441644, APV: 691804.",
+            "PayWayByABA_bot",
+        )
+
+        self.assertEqual(payment.trx_id, "176015291441644")
+        self.assertEqual(metrics.histogram("ingest_parse_seconds").count, parsed + 1)
+        self.assertNotIn("ingest_trx_extract_seconds", metrics.histograms)
+
+
+class TestMetricsEndpoint(unittest.IsolatedAsyncioTestCase):
+    """The endpoint serves the shared registry in text format"""
+
+    async def test_scrape_returns_metrics(self):
+        metrics.counter("endpoint_test_total").inc()
+        server = await asyncio.start_server(_handle_scrape, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            response = (await reader.read()).decode()
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn("endpoint_test_total 1", response)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from config import Base
+from models import IncomeBalance, Shift
+from services.income_batch_writer import PendingIncome, write_income_batch
+from services.shift_service import OpenShiftRegistry, ShiftService
+
+
+class TestOpenShiftRegistry(unittest.IsolatedAsyncioTestCase):
+    """Tests for open-shift lookups and serialised shift creation"""
+
+    async def asyncSetUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.db_calls = 0
+
+        async def fake_run_in_db_session(func):
+            self.db_calls += 1
+            await asyncio.sleep(0)  # let concurrent callers interleave
+            with self.Session() as db:
+                return func(db)
+
+        @contextmanager
+        def fake_get_db_session():
+            with self.Session() as db:
+                yield db
+
+        for target, replacement in (
+            ("services.shift_service.run_in_db_session", fake_run_in_db_session),
+            ("services.shift_service.get_db_session", fake_get_db_session),
+        ):
+            patcher = patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.service = ShiftService()
+        self.service.open_shifts = OpenShiftRegistry(ttl=60)
+
+    def open_shift_ids(self, chat_id: int) -> list[int]:
+        with self.Session() as db:
+            return [
+                shift_id
+                for (shift_id,) in db.query(Shift.id).filter(
+                    Shift.chat_id == chat_id, Shift.is_closed == False
+                )
+            ]
+
+    async def test_concurrent_first_messages_create_one_shift(self):
+        shift_ids = await asyncio.gather(
+            *(self.service.ensure_open_shift_id(1) for _ in range(5))
+        )
+
+        self.assertEqual(len(set(shift_ids)), 1)
+        self.assertEqual(self.open_shift_ids(1), [shift_ids[0]])
+
+    async def test_open_shift_is_served_from_registry(self):
+        shift_id = await self.service.ensure_open_shift_id(1)
+        calls = self.db_calls
+
+        self.assertEqual(await self.service.ensure_open_shift_id(1), shift_id)
+        self.assertEqual(self.db_calls, calls)
+
+    async def test_close_shift_forgets_registry_entry(self):
+        first = await self.service.ensure_open_shift_id(1)
+        await self.service.close_shift(first)
+
+        self.assertIsNone(self.service.open_shifts.get(1))
+        second = await self.service.ensure_open_shift_id(1)
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.open_shift_ids(1), [second])
+
+    async def test_existing_open_shift_is_reused(self):
+        existing = await self.service.create_shift(1)
+        self.service.open_shifts.discard(1)
+
+        self.assertEqual(await self.service.ensure_open_shift_id(1), existing.id)
+
+
+class TestWriterShiftRevalidation(unittest.TestCase):
+    """The batch writer moves incomes off shifts closed by another process"""
+
+    def test_closed_shift_is_replaced_by_open_shift(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            closed = Shift(chat_id=1, shift_date=datetime(2025, 10, 11).date(), number=1,
+                           start_time=datetime(2025, 10, 11, 8), is_closed=True)
+            current = Shift(chat_id=1, shift_date=datetime(2025, 10, 11).date(), number=2,
+                            start_time=datetime(2025, 10, 11, 16), is_closed=False)
+            db.add_all([closed, current])
+            db.commit()
+            closed_id, current_id = closed.id, current.id
+
+        item = PendingIncome(
+            chat_id=1, amount=5.0, currency="USD", original_amount=5.0, message_id=1,
+            message="$5 paid", trx_id=None, income_date=datetime(2025, 10, 11, 17),
+            shift_id=closed_id,
+        )
+        with Session() as db:
+            (income_id,) = write_income_batch(db, [item])
+
+        self.assertEqual(item.shift_id, current_id)
+        with Session() as db:
+            self.assertEqual(db.get(IncomeBalance, income_id).shift_id, current_id)
+
+    def test_shift_is_opened_when_the_closed_shift_was_the_last(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            closed = Shift(chat_id=1, shift_date=datetime(2025, 10, 11).date(), number=1,
+                           start_time=datetime(2025, 10, 11, 8), is_closed=True)
+            db.add(closed)
+            db.commit()
+            closed_id = closed.id
+
+        items = [
+            PendingIncome(
+                chat_id=1, amount=5.0, currency="USD", original_amount=5.0, message_id=message_id,
+                message="$5 paid", trx_id=None, income_date=datetime(2025, 10, 11, 17),
+                shift_id=closed_id,
+            )
+            for message_id in (1, 2)
+        ]
+        with Session() as db:
+            write_income_batch(db, items)
+
+        with Session() as db:
+            (opened,) = db.query(Shift).filter(Shift.is_closed == False).all()
+            self.assertNotEqual(opened.id, closed_id)
+            self.assertEqual([item.shift_id for item in items], [opened.id, opened.id])
+            self.assertEqual({shift_id for (shift_id,) in db.query(IncomeBalance.shift_id)}, {opened.id})
+
+
+if __name__ == "__main__":
+    unittest.main()
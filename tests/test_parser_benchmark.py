@@ -0,0 +1,56 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helper.bot_parsers_registry import BOT_PARSERS
+from tests import benchmark_parser
+
+
+class TestParserBenchmarkCorpus(unittest.TestCase):
+    """The benchmark corpus stays in step with the parsers it measures"""
+
+    def setUp(self):
+        self.corpus = benchmark_parser.load_corpus()
+
+    def test_every_registered_bot_has_samples(self):
+        for bot in BOT_PARSERS:
+            with self.subTest(bot=bot):
+                self.assertTrue(self.corpus["messages"].get(bot))
+
+    def test_corpus_expectations_match_parsers(self):
+        self.assertEqual(benchmark_parser.verify_corpus(self.corpus), [])
+
+    def test_payer_names_are_anonymized(self):
+        texts = [s["text"] for samples in self.corpus["messages"].values() for s in samples]
+        self.assertFalse(any("LOR PISETH" in text for text in texts))
+        self.assertTrue(any(benchmark_parser.ANONYMIZED_NAME in text for text in texts))
+
+
+class TestBaselineComparison(unittest.TestCase):
+    """Regression detection against a stored baseline"""
+
+    @staticmethod
+    def run_result(score: float) -> dict:
+        return {"results": {"extract_trx_id": {"msgs_per_sec": 1000.0, "p99_us": 5.0, "score": score}}}
+
+    def test_drop_beyond_threshold_is_reported(self):
+        regressions = benchmark_parser.compare(self.run_result(0.10), self.run_result(0.07), threshold=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("extract_trx_id", regressions[0])
+
+    def test_drop_within_threshold_passes(self):
+        self.assertEqual(benchmark_parser.compare(self.run_result(0.10), self.run_result(0.08), threshold=0.25), [])
+
+    def test_best_round_is_kept(self):
+        rounds = [self.run_result(score)["results"]["extract_trx_id"] for score in (0.07, 0.10, 0.09)]
+        self.assertEqual(benchmark_parser.best_result(rounds)["score"], 0.10)
+
+    def test_parsers_missing_from_the_run_are_ignored(self):
+        self.assertEqual(benchmark_parser.compare(self.run_result(0.10), {"results": {}}, threshold=0.25), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import re
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helper.bot_parsers import PARSER_FUNCTIONS, compile_parser
+from helper.bot_parsers_registry import (
+    BOT_PARSERS,
+    FORWARD_ALLOWED_BOTS,
+    LISTENER_ALLOWED_BOTS,
+    VERIFICATION_ALLOWED_BOTS,
+)
+from helper.message_parser_optimized import parse_payment
+from helper.message_patterns import TIME_PATTERNS
+from helper.parser_specs import PARSER_SPECS, ParserSpec
+
+TEST_BANK = ParserSpec(
+    "parse_test_bank", ("TestBank_bot",),
+    amount=re.compile(r'Paid\s+(USD|KHR)\s+([\d,]+(?:\.\d+)?)'), amount_group=2, currency_group=1,
+    time_formats=("datetime_iso",),
+    trx_id=re.compile(r'Ref\s+([A-Z0-9]+)'),
+)
+
+
+class TestParserSpecs(unittest.TestCase):
+    """Tests for the declarative parser definitions"""
+
+    def test_names_and_bots_are_unique(self):
+        names = [spec.name for spec in PARSER_SPECS]
+        bots = [bot for spec in PARSER_SPECS for bot in spec.bots + spec.aliases]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(len(bots), len(set(bots)))
+        self.assertEqual(set(BOT_PARSERS), set(bots))
+
+    def test_every_spec_is_compiled(self):
+        for spec in PARSER_SPECS:
+            self.assertIn(spec.name, PARSER_FUNCTIONS)
+            for time_format in spec.time_formats:
+                self.assertIn(time_format, TIME_PATTERNS)
+
+    def test_allow_lists_come_from_the_specs(self):
+        self.assertEqual(VERIFICATION_ALLOWED_BOTS, FORWARD_ALLOWED_BOTS)
+        self.assertEqual(LISTENER_ALLOWED_BOTS - VERIFICATION_ALLOWED_BOTS, {"payment_bk_bot"})
+        self.assertIn("CCUBank_bot", FORWARD_ALLOWED_BOTS)
+        for bot in ("ccu_bank_bot", "S7days777"):
+            self.assertIn(bot, BOT_PARSERS)
+            self.assertNotIn(bot, LISTENER_ALLOWED_BOTS | VERIFICATION_ALLOWED_BOTS)
+
+    def test_compiled_spec_reads_every_field(self):
+        parse = compile_parser(TEST_BANK)
+        payment = parse("Paid KHR 12,500, paid by SOK DARA (*123) at 2025-10-11 10:21:33. Ref AB12")
+
+        self.assertEqual(parse.__name__, "parse_test_bank")
+        self.assertEqual((payment.currency, payment.amount_minor), ('៛', 1250000))
+        self.assertEqual((payment.trx_time.hour, payment.trx_time.minute), (10, 21))
+        self.assertEqual(payment.trx_id, "AB12")
+        self.assertEqual((payment.paid_by, payment.paid_by_name), ("123", "SOK DARA"))
+        self.assertEqual(payment.parser, "parse_test_bank")
+
+    def test_generic_trx_id_when_spec_pattern_misses(self):
+        payment = compile_parser(TEST_BANK)("Paid USD 5.00. Trx. ID: 42")
+        self.assertEqual(payment.trx_id, "42")
+
+    def test_fallback(self):
+        self.assertEqual(compile_parser(TEST_BANK)("$3.50 received").parser, "parse_universal")
+        strict = ParserSpec("parse_strict", ("Strict_bot",), amount=TEST_BANK.amount, fallback=False)
+        self.assertIsNone(compile_parser(strict)("$3.50 received"))
+
+    def test_summed_amounts(self):
+        payment = parse_payment("10.10.2025\n-Cash=16.6$\n-Card=1.4$", "S7days777")
+        self.assertEqual(payment.amount_minor, 1800)
+        self.assertEqual(payment.breakdown, {"Cash": 16.6, "Card": 1.4})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helper import pattern_stats
+from helper.bot_parsers import TIME_MATCHERS, extract_transaction_time, parse_universal
+from helper.message_parser import extract_trx_id
+from helper.message_patterns import TRX_ID_PATTERNS, UNIVERSAL_AMOUNT_PATTERNS
+from helper.pattern_stats import (
+    CASCADES,
+    TRX_ID_CASCADE,
+    UNIVERSAL_AMOUNT_CASCADE,
+    UNIVERSAL_TIME_CASCADE,
+    PatternCascade,
+)
+
+CORPUS_PATH = Path(__file__).parent / "fixtures" / "parser_corpus.json"
+
+
+class TestPatternStats(unittest.TestCase):
+    """Tests for fallback pattern hit counters and adaptive ordering"""
+
+    def setUp(self):
+        for cascade in CASCADES.values():
+            cascade.reset()
+        self.addCleanup(lambda: [cascade.reset() for cascade in CASCADES.values()])
+
+    def test_declared_order_matches_the_patterns(self):
+        self.assertEqual(UNIVERSAL_TIME_CASCADE.canonical, tuple(TIME_MATCHERS))
+        self.assertEqual(TRX_ID_CASCADE.canonical, tuple(c.name for c in TRX_ID_PATTERNS))
+        self.assertEqual(UNIVERSAL_AMOUNT_CASCADE.canonical, tuple(c.name for c in UNIVERSAL_AMOUNT_PATTERNS))
+
+    def test_universal_parse_counts_tries_and_hits(self):
+        parse_universal("$28.00 paid by HORN SAMIV (*708) on Nov 09, 03:02 AM via ABA PAY. Trx. ID: 176297292981")
+
+        self.assertEqual(UNIVERSAL_AMOUNT_CASCADE.hits["symbol_before"], 1)
+        self.assertEqual(UNIVERSAL_AMOUNT_CASCADE.tries["khmer_riel"], 0)  # keyword absent, regex skipped
+        self.assertEqual(UNIVERSAL_TIME_CASCADE.hits["datetime_comma"], 1)
+        self.assertEqual(TRX_ID_CASCADE.hits["trx_id"], 1)
+        # Bank parsers' declared formats are not counted
+        extract_transaction_time("Oct 11, 10:21 AM", ("datetime_comma",))
+        self.assertEqual(UNIVERSAL_TIME_CASCADE.tries["datetime_comma"], 1)
+
+    def test_reorder_sorts_within_tiers_only(self):
+        cascade = PatternCascade("test", (("a", "b", "c"), ("d", "e"), ("f",)))
+        cascade.hits.update({"f": 50, "c": 10, "b": 3, "e": 4})
+
+        self.assertEqual(cascade.reorder(), ("c", "b", "a", "e", "d", "f"))
+
+        UNIVERSAL_TIME_CASCADE.hits.update({"time_dots": 50, "datetime_comma": 10})
+        self.assertEqual(UNIVERSAL_TIME_CASCADE.reorder(), UNIVERSAL_TIME_CASCADE.canonical)
+        self.assertEqual(TRX_ID_CASCADE.reorder(), TRX_ID_CASCADE.canonical)
+
+    def test_order_cannot_cross_tiers(self):
+        cascade = PatternCascade("test", (("a", "b"), ("c",)))
+        self.assertTrue(cascade.apply_order(["b", "a", "c"]))
+        self.assertFalse(cascade.apply_order(["c", "a", "b"]))
+        self.assertFalse(cascade.apply_order(["a", "b"]))
+        self.assertEqual(cascade.order, ("b", "a", "c"))
+
+    def test_results_do_not_depend_on_the_order(self):
+        corpus = json.loads(CORPUS_PATH.read_text(encoding="utf-8"))
+        texts = [sample["text"] for samples in corpus["messages"].values() for sample in samples]
+        # Two timestamps in formats of the same priority group
+        texts.append("$5.00 paid on Oct 11, 10:21 AM. Settled 12/10/2025 11:05 PM")
+        texts.append("$5.00 paid 2025-10-10 14:35:22, settled 11/10/2025 09:00")
+
+        def results():
+            return [
+                (extract_transaction_time(text), extract_trx_id(text), getattr(parse_universal(text), "amount_minor", None))
+                for text in texts
+            ]
+
+        expected = results()
+        for cascade in CASCADES.values():
+            self.assertTrue(cascade.apply_order([p for tier in cascade.tiers for p in reversed(tier)]))
+        self.assertEqual(results(), expected)
+
+    def test_snapshot_round_trip(self):
+        cascade = PatternCascade("test", (("a", "b"), ("c",)))
+        cascade.hits["b"] = 3
+        cascade.reorder()
+        UNIVERSAL_TIME_CASCADE.hits["datetime_comma"] = 7
+        with tempfile.TemporaryDirectory() as tmpdir, patch.dict(pattern_stats.CASCADES, {"test": cascade}):
+            path = os.path.join(tmpdir, "order.json")
+            pattern_stats.save_snapshot(path)
+            cascade.reset()
+            UNIVERSAL_TIME_CASCADE.reset()
+
+            self.assertTrue(pattern_stats.load_snapshot(path))
+            self.assertEqual(cascade.order, ("b", "a", "c"))
+            self.assertEqual(UNIVERSAL_TIME_CASCADE.hits["datetime_comma"], 7)
+
+            self.assertFalse(pattern_stats.load_snapshot(os.path.join(tmpdir, "missing.json")))
+
+    def test_snapshot_with_foreign_order_keeps_declared_order(self):
+        entry = UNIVERSAL_TIME_CASCADE.snapshot()
+        entry["order"] = ["time_dots"] + [p for p in entry["order"] if p != "time_dots"]
+
+        self.assertFalse(UNIVERSAL_TIME_CASCADE.restore(entry))
+        self.assertEqual(UNIVERSAL_TIME_CASCADE.order, UNIVERSAL_TIME_CASCADE.canonical)
+
+    def test_render_metrics(self):
+        extract_trx_id("Hash: 2e720fc0")
+        lines = pattern_stats.render_metrics()
+        self.assertIn('parser_pattern_hits_total{cascade="trx_id",pattern="hash"} 1', lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+Query plan regression checks for the service queries on hot paths.
+
+Each case calls a service method against a seeded in-memory SQLite schema
+built from the models, records every SELECT it runs and asks SQLite for the
+plan. A ``SCAN`` of a table (reading all of it, with or without an index)
+fails the case unless the table is listed in the case's ``scans``. Add new
+service queries to CASES so a missing index shows up here.
+"""
+
+import re
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from config import Base
+from models import IncomeBalance, RevenueSource, Shift
+from services.income_aggregate_service import IncomeAggregateService
+from services.income_balance_service import IncomeService
+from services.income_rollups import rebuild_rollups
+from services.recent_transaction_index import RecentTransactionIndex
+from services.sender_report_service import SenderReportService
+from services.shift_service import ShiftService
+
+CHAT_ID = -1001
+FULL_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+class QueryPlanRecorder:
+    """Records the SELECTs run on an engine and explains them with SQLite"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: list[tuple[str, tuple]] = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, tuple(parameters or ())))
+
+    def plans(self) -> list[tuple[str, list[str]]]:
+        """(statement, plan detail lines) for every recorded SELECT"""
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            result = []
+            for statement, parameters in self.statements:
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                result.append((statement, [row[3] for row in cursor.fetchall()]))
+            return result
+        finally:
+            connection.close()
+
+    def full_scans(self) -> list[tuple[str, str]]:
+        """(scanned table, statement) for every plan step that reads a whole table"""
+        scans = []
+        for statement, details in self.plans():
+            for detail in details:
+                match = FULL_SCAN.match(detail)
+                if match:
+                    scans.append((match.group(1), statement))
+        return scans
+
+
+# (description, call, tables the query may scan)
+CASES = [
+    ("duplicate check by message id",
+     lambda income, shift: income.check_duplicate_transaction(CHAT_ID, None, 5), ()),
+    ("duplicate check by message and trx id",
+     lambda income, shift: income.check_duplicate_transaction(CHAT_ID, "TRX5", 5), ()),
+    ("income by trx id",
+     lambda income, shift: income.get_income_by_trx_id("TRX5", CHAT_ID), ()),
+    ("income by message id",
+     lambda income, shift: income.get_income_by_chat_and_message_id(CHAT_ID, 5), ()),
+    ("incomes of a shift",
+     lambda income, shift: income.get_income_by_shift_id(1), ()),
+    ("shift income summary",
+     lambda income, shift: shift.get_shift_income_summary(1, CHAT_ID), ()),
+    ("closed day totals from rollups",
+     lambda income, shift: IncomeAggregateService().get_totals(
+         CHAT_ID, datetime(2025, 10, 1), datetime(2025, 11, 1), group_by=("day",)), ()),
+    ("shift totals from rollups and today's incomes",
+     lambda income, shift: IncomeAggregateService().get_shift_totals([1, 2]), ()),
+    ("current open shift",
+     lambda income, shift: shift.get_current_shift(CHAT_ID), ()),
+    ("shifts in a date range",
+     lambda income, shift: shift.get_shifts_by_date_range(CHAT_ID, date(2025, 10, 1), date(2025, 10, 31)), ()),
+    ("incomes in a date range",
+     lambda income, shift: income.get_income_by_date_and_chat_id(
+         CHAT_ID, datetime(2025, 10, 1), datetime(2025, 11, 1)), ()),
+    ("slim incomes and their sources in a date range",
+     lambda income, shift: income.get_income_by_date_and_chat_id(
+         CHAT_ID, datetime(2025, 10, 1), datetime(2025, 11, 1), slim=True), ()),
+    ("income summary for a date range",
+     lambda income, shift: income.get_income_summary_by_date_range(CHAT_ID, "2025-10-01", "2025-10-31"), ()),
+    ("today's incomes",
+     lambda income, shift: income.get_today_income(CHAT_ID), ()),
+    ("this month's incomes with sources",
+     lambda income, shift: income.get_monthly_income_with_sources(CHAT_ID), ()),
+    ("incomes of a day",
+     lambda income, shift: income.get_income_by_specific_date_and_chat_id(CHAT_ID, datetime(2025, 10, 11)), ()),
+    ("last message of a day",
+     lambda income, shift: income.get_last_yesterday_message(datetime(2025, 10, 11)), ()),
+    ("sender report date range",
+     lambda income, shift: SenderReportService()._get_transactions_by_date_range(
+         CHAT_ID, datetime(2025, 10, 1), datetime(2025, 11, 1)), ()),
+    ("sender report day",
+     lambda income, shift: SenderReportService()._get_daily_transactions(CHAT_ID, date(2025, 10, 11)), ()),
+    ("shifts started on a day",
+     lambda income, shift: shift.get_shifts_by_start_date(CHAT_ID, date(2025, 10, 1)), ()),
+    ("shift start dates in a month",
+     lambda income, shift: shift.get_all_start_dates_with_shifts_in_month(CHAT_ID, 2025, 10), ()),
+]
+
+
+class TestQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """Service queries must be answered from an index, not a full table scan"""
+
+    async def asyncSetUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.seed()
+
+        @contextmanager
+        def fake_session():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def fake_run_in_db_session(func):
+            with fake_session() as db:
+                return func(db)
+
+        for target, value in (
+            ("services.income_aggregate_service.get_db_session", fake_session),
+            ("services.income_balance_service.get_db_session", fake_session),
+            ("services.income_balance_service.run_in_db_session", fake_run_in_db_session),
+            ("services.income_balance_service.get_recent_transaction_index", RecentTransactionIndex),
+            ("services.sender_report_service.get_db_session", fake_session),
+            ("services.shift_service.get_db_session", fake_session),
+            ("services.shift_service.run_in_db_session", fake_run_in_db_session),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.income_service = IncomeService()
+        self.shift_service = ShiftService()
+        self.recorder = QueryPlanRecorder(self.engine)
+
+    def seed(self):
+        start = datetime(2025, 10, 1, 8)
+        with self.Session() as db:
+            for number, chat_id in enumerate((CHAT_ID, -1002, -1003), start=1):
+                db.add(Shift(id=number, chat_id=chat_id, shift_date=start.date(), number=1,
+                             start_time=start, is_closed=False))
+            for message_id in range(60):
+                income_date = start + timedelta(hours=message_id * 7)
+                income = IncomeBalance(
+                    chat_id=(CHAT_ID, -1002, -1003)[message_id % 3], message_id=message_id,
+                    amount=10.5, original_amount=10.5, currency="USD", income_date=income_date,
+                    message=f"${message_id} paid", trx_id=f"TRX{message_id}", shift_id=message_id % 3 + 1,
+                    sent_by="PayWayByABA_bot",
+                )
+                income.revenue_sources = [RevenueSource(source_name="Cash", amount=10.5, currency="USD")]
+                db.add(income)
+            db.flush()
+            for chat_id in (CHAT_ID, -1002, -1003):
+                rebuild_rollups(db, chat_id, start.date(), (start + timedelta(hours=60 * 7)).date())
+            db.commit()
+
+    async def test_service_queries_use_indexes(self):
+        for description, call, allowed_scans in CASES:
+            with self.subTest(description):
+                self.recorder.statements.clear()
+                await call(self.income_service, self.shift_service)
+                self.assertTrue(self.recorder.statements, "no query was recorded")
+                scans = [(table, sql) for table, sql in self.recorder.full_scans() if table not in allowed_scans]
+                self.assertEqual(scans, [], f"{description} scans a whole table")
+
+    def test_recorder_flags_unindexed_filter(self):
+        with self.Session() as db:
+            db.query(IncomeBalance.id).filter(IncomeBalance.message == "$5 paid").all()
+        self.assertEqual([table for table, _ in self.recorder.full_scans()], ["income_balance"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytz
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from config import Base
+from helper import DateUtils
+from models import IncomeBalance
+from services.recent_transaction_index import RecentTransactionIndex
+
+
+def utc_now() -> datetime:
+    return datetime.now(pytz.UTC)
+
+
+class TestRecentTransactionIndex(unittest.TestCase):
+    """Tests for lookups, recording and eviction"""
+
+    def test_unknown_until_warmed(self):
+        index = RecentTransactionIndex(max_entries=10, window_days=1)
+        self.assertIsNone(index.lookup(1, 100, message_time=utc_now()))
+
+    def test_recorded_key_is_duplicate(self):
+        index = RecentTransactionIndex(max_entries=10, window_days=1)
+        index.record(1, 100, "TRX1")
+
+        self.assertTrue(index.lookup(1, 100))
+        self.assertTrue(index.lookup(1, 100, "TRX1"))
+        self.assertFalse(index.lookup(1, 100, "OTHER"))
+        self.assertTrue(index.has_trx_id(1, "TRX1"))
+        self.assertIsNone(index.has_trx_id(2, "TRX1"))
+
+    def test_key_recorded_without_trx_id_defers_to_database(self):
+        index = RecentTransactionIndex(max_entries=10, window_days=1)
+        index.record(1, 100)
+        self.assertIsNone(index.lookup(1, 100, "TRX1"))
+
+    def test_eviction_moves_coverage_forward(self):
+        index = RecentTransactionIndex(max_entries=2, window_days=1)
+        index._coverage_start = utc_now() - timedelta(days=1)
+        stored_at = utc_now() - timedelta(hours=1)
+        index.record(1, 1, stored_at=stored_at)
+        index.record(1, 2)
+        index.record(1, 3)
+
+        # The evicted key is no longer known, so older messages are unknown
+        self.assertIsNone(index.lookup(1, 1, message_time=stored_at))
+        self.assertFalse(index.lookup(1, 4, message_time=utc_now() + timedelta(minutes=10)))
+
+
+class TestRecentTransactionIndexWarm(unittest.IsolatedAsyncioTestCase):
+    """Tests for warming the index from income_balance"""
+
+    async def asyncSetUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+
+        async def fake_run_in_db_session(func):
+            with self.Session() as db:
+                return func(db)
+
+        patcher = patch("services.recent_transaction_index.run_in_db_session", fake_run_in_db_session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_income(self, message_id: int, created_at: datetime, trx_id: str | None = None):
+        with self.Session() as db:
+            db.add(IncomeBalance(
+                chat_id=1,
+                amount=1.0,
+                currency="USD",
+                original_amount=1.0,
+                income_date=created_at,
+                message_id=message_id,
+                message="$1 paid",
+                trx_id=trx_id,
+                created_at=created_at,
+            ))
+            db.commit()
+
+    async def test_warm_loads_recent_rows_only(self):
+        now = DateUtils.now().replace(tzinfo=None)
+        self.add_income(10, now - timedelta(hours=2), "TRX10")
+        self.add_income(11, now - timedelta(days=5))
+
+        index = RecentTransactionIndex(max_entries=100, window_days=1)
+        self.assertEqual(await index.warm(), 1)
+
+        self.assertTrue(index.lookup(1, 10, "TRX10"))
+        # Newer than the window: authoritative miss, no DB needed
+        self.assertFalse(index.lookup(1, 12, message_time=utc_now()))
+        # Older than the window: must fall back to the DB
+        self.assertIsNone(index.lookup(1, 11, message_time=utc_now() - timedelta(days=5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+import main_reconcile
+from config import Base
+from models import IncomeBalance, IncomeRollup
+
+ABA_USD = "$10.00 paid by LOR PISETH (*467) on Oct 11, 10:21 AM via ABA PAY at KEAM LILAY. Trx. ID: {trx}, APV: 691804."
+STORED_AT = datetime(2025, 10, 11, 10, 21, 30)
+
+
+def income(message_id: int, amount: float = 10.0, sent_by: str = "PayWayByABA_bot",
+           message: str | None = None, **fields) -> IncomeBalance:
+    values = {
+        "chat_id": 1,
+        "message_id": message_id,
+        "amount": amount,
+        "original_amount": amount,
+        "currency": "USD",
+        "income_date": datetime(2025, 10, 11, 10, 21),
+        "message": message or ABA_USD.format(trx=f"17601529{message_id:07d}"),
+        "trx_id": f"17601529{message_id:07d}",
+        "sent_by": sent_by,
+        "paid_by": "467",
+        "paid_by_name": "LOR PISETH",
+        "created_at": STORED_AT,
+        "updated_at": STORED_AT,
+    }
+    values.update(fields)
+    return IncomeBalance(**values)
+
+
+class TestReconcile(unittest.TestCase):
+    """Tests for re-parsing stored incomes (in-memory SQLite)"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.report_path = os.path.join(self.tmpdir.name, "report.jsonl")
+        self.checkpoint_path = os.path.join(self.tmpdir.name, "reconcile.checkpoint")
+
+        @contextmanager
+        def fake_session():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        patcher = patch.object(main_reconcile, "get_db_session", fake_session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def add(self, *incomes):
+        with self.Session() as db:
+            db.add_all(incomes)
+            db.commit()
+
+    def reconcile(self, apply: bool = True, chunk_size: int = 2, **kwargs):
+        return main_reconcile.run(chunk_size, apply, self.report_path, self.checkpoint_path, **kwargs)
+
+    def report(self) -> list[dict]:
+        with open(self.report_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def stored(self) -> dict[int, IncomeBalance]:
+        with self.Session() as db:
+            return {row.message_id: row for row in db.query(IncomeBalance)}
+
+    def test_updates_only_rows_that_differ(self):
+        self.add(
+            income(1),
+            income(2, amount=1.0, paid_by=None),
+            income(3, currency="KHR"),
+            income(4),
+        )
+
+        stats = self.reconcile()
+
+        self.assertEqual((stats.scanned, stats.changed, stats.unparsed), (4, 2, 0))
+        rows = self.stored()
+        self.assertEqual((rows[2].amount, rows[2].original_amount, rows[2].paid_by), (10.0, 10.0, "467"))
+        self.assertEqual(rows[3].currency, "USD")
+        self.assertEqual(rows[1].updated_at, STORED_AT)
+        self.assertNotEqual(rows[2].updated_at, STORED_AT)
+        self.assertEqual(
+            [(entry["message_id"], sorted(entry["changes"])) for entry in self.report()],
+            [(2, ["amount", "original_amount", "paid_by"]), (3, ["currency"])],
+        )
+
+    def test_rollups_of_changed_days_are_recomputed(self):
+        self.add(income(1), income(2, amount=1.0), income(3, income_date=datetime(2025, 10, 12, 9)))
+
+        self.reconcile()
+
+        with self.Session() as db:
+            rollups = [(r.local_date.day, r.amount_minor, r.income_count) for r in db.query(IncomeRollup)]
+        # Message 3 was parsed back to Oct 11; Oct 12 has no incomes left
+        self.assertEqual(rollups, [(11, 3000, 3)])
+
+    def test_dry_run_reports_without_writing(self):
+        self.add(income(1, amount=1.0))
+
+        stats = self.reconcile(apply=False)
+
+        self.assertEqual(stats.changed, 1)
+        self.assertEqual(self.stored()[1].amount, 1.0)
+        self.assertEqual(self.report()[0]["changes"]["amount"], [1.0, 10])
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_skips_unparsed_rows_and_other_senders(self):
+        self.add(
+            income(1, message="Hello there", amount=5.0),
+            income(2, sent_by=None, amount=5.0),
+            income(3, sent_by="SomeoneElse", amount=5.0),
+        )
+
+        stats = self.reconcile()
+
+        self.assertEqual((stats.scanned, stats.changed, stats.unparsed), (1, 0, 1))
+        self.assertEqual({row.amount for row in self.stored().values()}, {5.0})
+
+    def test_yearless_times_keep_the_stored_year(self):
+        self.add(income(1, income_date=datetime(2025, 10, 11, 9, 0)))
+
+        with patch("helper.bot_parsers.datetime") as fake_datetime:
+            fake_datetime.now.return_value = datetime(2026, 3, 1)
+            fake_datetime.side_effect = datetime
+            self.reconcile()
+
+        self.assertEqual(self.stored()[1].income_date, datetime(2025, 10, 11, 10, 21))
+
+    def test_resumes_after_checkpoint(self):
+        self.add(income(1, amount=1.0), income(2, amount=1.0), income(3, amount=1.0))
+        with self.Session() as db:
+            second_id = db.query(IncomeBalance.id).filter(IncomeBalance.message_id == 2).scalar()
+        main_reconcile.save_checkpoint(self.checkpoint_path, second_id)
+
+        stats = self.reconcile()
+
+        self.assertEqual(stats.scanned, 1)
+        self.assertEqual({k: row.amount for k, row in self.stored().items()}, {1: 1.0, 2: 1.0, 3: 10.0})
+        self.assertEqual(main_reconcile.load_checkpoint(self.checkpoint_path), second_id + 1)
+
+    def test_sender_filter(self):
+        self.add(income(1, amount=1.0), income(2, amount=1.0, sent_by="ACLEDABankBot"))
+
+        stats = self.reconcile(sender="PayWayByABA_bot")
+
+        self.assertEqual(stats.scanned, 1)
+        self.assertEqual(self.stored()[2].amount, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
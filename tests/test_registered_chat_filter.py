@@ -0,0 +1,104 @@
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import helper  # noqa: F401  (initialises helper before models to avoid a circular import)
+from config import Base
+from models import Chat
+from services.chat_cache import get_chat_cache
+from services.registered_chat_filter import RegisteredChatFilter
+
+
+def event(chat_id: int) -> SimpleNamespace:
+    return SimpleNamespace(chat_id=chat_id)
+
+
+class TestRegisteredChatFilter(unittest.IsolatedAsyncioTestCase):
+    """Tests for registered chat filtering and incremental refresh"""
+
+    async def asyncSetUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+
+        async def fake_run_in_db_session(func):
+            with self.Session() as db:
+                return func(db)
+
+        for target in ("services.registered_chat_filter.run_in_db_session", "services.chat_service.run_in_db_session"):
+            patcher = patch(target, fake_run_in_db_session)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        get_chat_cache().clear()
+        self.addCleanup(get_chat_cache().clear)
+
+        self.add_chat(-1001, registered_by=None)
+        self.add_chat(-1002, registered_by="85511111111")
+        self.add_chat(-1003, registered_by="85522222222")
+        self.add_chat(-1004, registered_by=None, is_active=False)
+
+    def add_chat(self, chat_id: int, registered_by: str | None, is_active: bool = True,
+                 updated_at: datetime | None = None):
+        with self.Session() as db:
+            db.add(Chat(chat_id=chat_id, group_name=str(chat_id), registered_by=registered_by,
+                        is_active=is_active, updated_at=updated_at or datetime(2025, 10, 1)))
+            db.commit()
+
+    async def test_everything_passes_until_loaded(self):
+        chat_filter = RegisteredChatFilter()
+        self.assertTrue(chat_filter(event(-999)))
+
+    async def test_every_registered_chat_passes_whichever_account_registered_it(self):
+        chat_filter = RegisteredChatFilter()
+        await chat_filter.refresh(full=True)
+
+        self.assertEqual(chat_filter.chat_ids, {-1001, -1002, -1003, -1004})
+        for chat_id in (-1001, -1002, -1003, -1004):
+            self.assertIs(chat_filter(event(chat_id)), True)
+
+    async def test_unknown_chat_is_checked_before_it_is_dropped(self):
+        chat_filter = RegisteredChatFilter()
+        await chat_filter.refresh(full=True)
+
+        self.assertFalse(await chat_filter(event(-999)))
+        self.assertEqual(chat_filter.dropped, 1)
+
+        # Registered by another process after the last refresh
+        self.add_chat(-1005, registered_by="85522222222")
+        self.assertTrue(await chat_filter(event(-1005)))
+        self.assertIs(chat_filter(event(-1005)), True)
+
+    async def test_incremental_refresh_picks_up_changes(self):
+        chat_filter = RegisteredChatFilter()
+        await chat_filter.refresh(full=True)
+
+        later = datetime(2025, 10, 1) + timedelta(hours=1)
+        self.add_chat(-1005, registered_by=None, updated_at=later)
+        await chat_filter.refresh()
+
+        self.assertEqual(chat_filter.chat_ids, {-1001, -1002, -1003, -1004, -1005})
+
+    async def test_refresh_chats_handles_registration_and_migration(self):
+        chat_filter = RegisteredChatFilter()
+        await chat_filter.refresh(full=True)
+
+        self.add_chat(-1006, registered_by="85511111111")
+        with self.Session() as db:
+            db.query(Chat).filter_by(chat_id=-1001).update({"chat_id": -1007})
+            db.commit()
+        await chat_filter.refresh_chats([-1006, -1001, -1007])
+
+        self.assertEqual(chat_filter.chat_ids, {-1002, -1003, -1004, -1006, -1007})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add parent directory to path to import modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from helper.bot_parsers_registry import BOT_PARSERS, LISTENER_ALLOWED_BOTS
+from services.sender_identity_cache import SenderIdentityCache
+
+
+class TestListenerAllowList(unittest.TestCase):
+    """The listener allow-list is derived from the parser registry"""
+
+    def test_allow_list_comes_from_registry(self):
+        self.assertTrue(LISTENER_ALLOWED_BOTS <= set(BOT_PARSERS))
+        self.assertIn("CCUBank_bot", LISTENER_ALLOWED_BOTS)
+        self.assertIn("payment_bk_bot", LISTENER_ALLOWED_BOTS)
+        self.assertNotIn("S7days777", LISTENER_ALLOWED_BOTS)
+
+
+class TestSenderIdentityCache(unittest.TestCase):
+    """Tests for sender resolution caching"""
+
+    def test_remembered_sender_is_served_from_cache(self):
+        cache = SenderIdentityCache(max_entries=10, ttl=60)
+        self.assertIsNone(cache.get(1))
+
+        cache.remember(1, SimpleNamespace(username="ACLEDABankBot", bot=True))
+        identity = cache.get(1)
+
+        self.assertTrue(identity.allowed)
+        self.assertTrue(identity.is_bot)
+        self.assertEqual(cache.allowed_sender_ids, {1})
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_human_sender_is_rejected(self):
+        cache = SenderIdentityCache(max_entries=10, ttl=60)
+        cache.remember(2, SimpleNamespace(username="waiter_01", bot=False))
+        self.assertFalse(cache.get(2).allowed)
+
+    def test_unresolved_sender_is_not_cached(self):
+        cache = SenderIdentityCache(max_entries=10, ttl=60)
+        self.assertFalse(cache.remember(3, None).allowed)
+        self.assertIsNone(cache.get(3))
+
+    def test_least_recently_used_sender_is_evicted(self):
+        cache = SenderIdentityCache(max_entries=2, ttl=60)
+        for sender_id in (1, 2):
+            cache.remember(sender_id, SimpleNamespace(username=f"user{sender_id}", bot=False))
+        cache.get(1)
+        cache.remember(3, SimpleNamespace(username="user3", bot=False))
+
+        self.assertIsNotNone(cache.get(1))
+        self.assertIsNone(cache.get(2))
+
+    def test_entries_expire(self):
+        cache = SenderIdentityCache(max_entries=10, ttl=60)
+        with patch("services.sender_identity_cache.time.monotonic", return_value=100.0):
+            cache.remember(1, SimpleNamespace(username="PLBITBot", bot=True))
+        with patch("services.sender_identity_cache.time.monotonic", return_value=161.0):
+            self.assertIsNone(cache.get(1))
+
+
+if __name__ == "__main__":
+    unittest.main()